@@ -2,7 +2,7 @@
 
 import { Injectable } from '@angular/core';
 import { HttpClient, HttpHeaders } from '@angular/common/http'; // Import HttpHeaders
-import { Observable, of, Subject, BehaviorSubject } from 'rxjs';
+import { Observable, of, Subject, BehaviorSubject, catchError, map, shareReplay, switchMap } from 'rxjs';
 import { Router } from '@angular/router';
 import { environment } from './shared/environments/environment'; // Import environment
 
@@ -12,6 +12,7 @@ import { environment } from './shared/environments/environment'; // Import envir
 })
 export class AppService {
   private baseUrl = environment.baseUrl; 
+  private uiBundles: { [language: string]: Observable<{ [text: string]: string }> } = {};
 
   constructor(private http: HttpClient, private router: Router) {}
 
@@ -103,6 +104,42 @@ export class AppService {
     });
   }
 
+  // for loading the pre-translated static texts of a language (cached by the browser with its ETag)
+  getUiBundle(targetLanguage: string): Observable<{ [text: string]: string }> {
+    if (!this.uiBundles[targetLanguage]) {
+      this.uiBundles[targetLanguage] = this.http
+        .get<any>(`${this.baseUrl}/translate/bundle/${targetLanguage}`)
+        .pipe(
+          map((bundle) => bundle.translations),
+          catchError(() => {
+            delete this.uiBundles[targetLanguage];
+            return of({});
+          }),
+          shareReplay(1)
+        );
+    }
+    return this.uiBundles[targetLanguage];
+  }
+
+  // for translating static texts: from the bundle, and through /translate only for texts it lacks
+  translateUiTexts(texts: string[], targetLanguage: string): Observable<any> {
+    return this.getUiBundle(targetLanguage).pipe(
+      switchMap((bundle) => {
+        const missingTexts = Array.from(new Set(texts.filter((text) => !(text in bundle))));
+        if (!missingTexts.length) {
+          return of({ translations: texts.map((text) => bundle[text]) });
+        }
+        return this.translateTexts(missingTexts, targetLanguage).pipe(
+          map((response) => {
+            const translations: { [text: string]: string } = { ...bundle };
+            missingTexts.forEach((text, index) => (translations[text] = response.translations[index]));
+            return { translations: texts.map((text) => translations[text]) };
+          })
+        );
+      })
+    );
+  }
+
   // Fetch quiz questions based on topic or file
   getQuizQuestions(userId: string, topic?: string, file?: File, numQuestions: number = 5, level?: string): Observable<any> {
     const formData = new FormData();
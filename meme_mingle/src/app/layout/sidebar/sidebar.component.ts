@@ -60,7 +60,7 @@ export class SidebarComponent implements OnInit {
     const allTextsToTranslate = [...textsToTranslate, ...additionalTexts];
 
     this.appService
-      .translateTexts(allTextsToTranslate, targetLanguage)
+      .translateUiTexts(allTextsToTranslate, targetLanguage)
       .subscribe((response) => {
         const translations = response.translations;
 
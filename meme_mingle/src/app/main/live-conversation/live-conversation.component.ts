@@ -253,7 +253,7 @@ export class LiveConversationComponent implements OnInit, OnDestroy {
     const allTextsToTranslate = [...textsToTranslate, ...additionalTexts];
 
     this.appService
-      .translateTexts(allTextsToTranslate, targetLanguage)
+      .translateUiTexts(allTextsToTranslate, targetLanguage)
       .subscribe((response) => {
         const translations = response.translations;
 
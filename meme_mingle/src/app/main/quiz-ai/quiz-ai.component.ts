@@ -188,7 +188,7 @@ export class QuizAiComponent implements OnInit, OnDestroy {
     const allTextsToTranslate = [...textsToTranslate, ...additionalTexts];
 
     this.appService
-      .translateTexts(allTextsToTranslate, targetLanguage)
+      .translateUiTexts(allTextsToTranslate, targetLanguage)
       .subscribe((response) => {
         const translations = response.translations;
 
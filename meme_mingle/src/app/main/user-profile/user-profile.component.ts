@@ -144,7 +144,7 @@ export class UserProfileComponent implements OnInit {
     const allTextsToTranslate = [...textsToTranslate, ...additionalTexts];
 
     this.appService
-      .translateTexts(allTextsToTranslate, targetLanguage)
+      .translateUiTexts(allTextsToTranslate, targetLanguage)
       .subscribe((response) => {
         const translations = response.translations;
 
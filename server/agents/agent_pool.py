@@ -0,0 +1,84 @@
+"""
+This module keeps a per-worker pool of warm MemeMingle agents.
+
+Building a MemeMingleAIAgent creates the LLM and embedding clients, builds every tool
+and probes the vector store collections. The pool does that once per worker process
+for each (desired_role, tool set) pair, and routes pass the per-user state at call time.
+"""
+
+"""Step 1: Import necessary modules"""
+# -- Standard libraries --
+import os
+import logging
+import threading
+# -- Custom modules --
+from .meme_mingle_agent import MemeMingleAIAgent
+
+
+"""Step 2: Define the AgentPool class"""
+class AgentPool:
+    """
+    A registry of shared MemeMingleAIAgent instances, keyed by desired role and tool set.
+
+    The registry is bound to the process that created it, so workers forked by gunicorn
+    never reuse clients (and their sockets) that were opened in the parent process.
+    """
+    _agents: dict = {}
+    _pid: int = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def is_enabled() -> bool:
+        """
+        Returns whether pooling is enabled. Set AGENT_POOL_ENABLED=false to build
+        a fresh agent per request (useful for benchmarking and debugging).
+        """
+        return os.getenv("AGENT_POOL_ENABLED", "true").lower() not in ("0", "false", "no")
+
+    @staticmethod
+    def get_pool_key(desired_role: str, tool_names: list[str]) -> tuple:
+        return desired_role, tuple(sorted(set(tool_names)))
+
+    @classmethod
+    def get_agent(cls, desired_role: str = "MemeMingle", tool_names: list[str] = []) -> MemeMingleAIAgent:
+        """
+        Returns a warm agent for the given role and tool set, creating it on first use.
+
+        Args:
+            desired_role (str): The role the agent plays in the conversation.
+            tool_names (list[str]): The names of the tools the agent can use.
+        """
+        if not cls.is_enabled():
+            return MemeMingleAIAgent(tool_names=list(tool_names), desired_role=desired_role)
+
+        key = cls.get_pool_key(desired_role, tool_names)
+
+        with cls._lock:
+            if cls._pid != os.getpid():
+                # First use in this worker (or we were forked): start with an empty pool
+                cls._agents = {}
+                cls._pid = os.getpid()
+
+            agent = cls._agents.get(key)
+            if agent is None:
+                logging.info(f"Creating pooled agent for role '{desired_role}' in worker {cls._pid}.")
+                agent = MemeMingleAIAgent(tool_names=list(key[1]), desired_role=desired_role)
+                cls._agents[key] = agent
+
+        return agent
+
+    @classmethod
+    def warm_up(cls, desired_roles: list[str], tool_names: list[str]):
+        """
+        Builds the agents for the given roles ahead of the first request.
+        """
+        for desired_role in desired_roles:
+            try:
+                cls.get_agent(desired_role=desired_role, tool_names=tool_names)
+            except Exception as e:
+                logging.error(f"Failed to warm up agent for role '{desired_role}': {e}")
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._agents = {}
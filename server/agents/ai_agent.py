@@ -4,7 +4,9 @@ This module defines a general structure for AI agents in the app.
 
 """Step 1: Import necessary modules"""
 # -- Standard libraries --
+import os
 import logging
+import threading
 # -- 3rd Party libraries --
 ## Langchain
 from langchain_community.vectorstores.azure_cosmos_db import (
@@ -15,7 +17,7 @@ from langchain_community.vectorstores.azure_cosmos_db import (
 from langchain.agents import Tool
 from langchain.tools import StructuredTool
 from langchain_core.messages import SystemMessage
-from langchain_core.vectorstores import VectorStoreRetriever
+from langchain_core.retrievers import BaseRetriever
 from langchain_community.document_loaders.mongodb import MongodbLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
@@ -25,6 +27,8 @@ from pymongo.database import Database
 
 # -- Custom Modules --
 from services.azure_mongodb import MongoDBClient
+from services.db.vector_index import get_vector_store, build_vector_store, ActiveVectorStoreRetriever
+from services.local_vector_search import get_retriever_backend, get_local_retriever
 from services.azure_open_ai import (
     get_azure_openai_llm,
     get_azure_openai_embeddings,
@@ -38,6 +42,11 @@ class AIAgent:
     """
     A class that models AI agents and their core functionality in the context of the app.
     """
+    # Retrievers are shared by every agent of the process, and not inherited by forked
+    # workers (their MongoDB clients must not be shared), as in AgentPool
+    _retrievers: dict = {}
+    _retrievers_pid: int = None
+    _retrievers_lock = threading.Lock()
 
 
     """Step 3: Define the constructor"""
@@ -66,92 +75,44 @@ class AIAgent:
         result = self.agent_executor({"input": message})
         return result["output"]
 
-    def _get_vector_store_retriever(self, collection_name, top_k=3) -> VectorStoreRetriever:
+    def _get_vector_store_retriever(self, collection_name, top_k=3) -> BaseRetriever:
         """
-        Returns a vector store retriever for a given collection using Azure Cosmos DB.
+        Returns a vector store retriever for a given collection, using Azure Cosmos DB
+        or the in-process engine depending on RETRIEVER_BACKEND.
+
+        The vector stores are built ahead of time by index_vector_stores.py, so this is
+        only a lookup, cached for the lifetime of the process. The retrievers follow the
+        rebuilds of their vector store.
 
         Args:
             collection_name: The name of the collection to retrieve.
             top_k: The number of similar documents to retrieve.
         """
-        db = self.db
-        db_name = MongoDBClient.get_db_name()
-        CONNECTION_STRING = MongoDBClient.get_mongodb_variables()
-        embeddings_model = self.embedding_model
-        vector_store_name = f"{collection_name}_vector_store"
-        vector_store_collection = self.db[vector_store_name]
-
-        # Check if the vector store exists
-        if db[vector_store_name].find_one({}):
-            logging.info(f"Vector store '{vector_store_name}' exists. Loading existing vector store.")
-            vector_store = AzureCosmosDBVectorSearch.from_connection_string(
-                connection_string=CONNECTION_STRING,
-                namespace=f"{db_name}.{vector_store_name}",
-                embedding=embeddings_model,
-                index_name="VectorSearchIndex",
-                embedding_key="vectorContent",
-                text_key="textContent",
-            )
-        else:
-            logging.info(f"Vector store '{vector_store_name}' does not exist. Creating new vector store.")
-            # Manually fetch documents from MongoDB
-            collection = db[collection_name]
-            documents_cursor = collection.find({})
-            documents = list(documents_cursor)
-            logging.info(f"Loaded {len(documents)} documents from collection '{collection_name}'.")
-
-            # Create LangChain Document objects
-            docs = []
-            for doc in documents:
-                page_content = doc.get('fact', '')
-                metadata = {'sample_query': doc.get('sample_query', '')}
-                if page_content.strip():  # Ensure there's content
-                    docs.append(Document(page_content=page_content, metadata=metadata))
-
-            logging.info(f"Documents with content: {len(docs)}")
-
-            if not docs:
-                logging.error("No documents to index. Exiting retriever creation.")
-                return None
-
-            # Split the documents
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=1000,
-                chunk_overlap=20,
-                length_function=len,
-                is_separator_regex=False,
-            )
-
-            docs = text_splitter.split_documents(docs)
-            logging.info(f"Split documents into {len(docs)} chunks.")
-
-            if not docs:
-                logging.error("No documents to index after splitting. Exiting retriever creation.")
-                return None
-
-            # Create the vector store
-            vector_store = AzureCosmosDBVectorSearch.from_documents(
-                docs,
-                embeddings_model,
-                collection=vector_store_collection,
-                index_name="vectorSearchIndex",
-            )
-
-            num_lists = 1
-            dimensions = 1536
-            similarity_algorithm = CosmosDBSimilarityType.COS
-            kind = CosmosDBVectorSearchType.VECTOR_IVF
-            m = 16
-            ef_construction = 64
-
-            vector_store.create_index(
-                num_lists, dimensions, similarity_algorithm, kind, m, ef_construction
-            )
-            logging.info("Vector store index created successfully.")
-
-        retriever = vector_store.as_retriever(search_kwargs={"k": top_k})
-        return retriever
+        cache_key = (MongoDBClient.get_db_name(), collection_name, top_k)
+        with AIAgent._retrievers_lock:
+            if AIAgent._retrievers_pid != os.getpid():
+                AIAgent._retrievers = {}
+                AIAgent._retrievers_pid = os.getpid()
+
+            retriever = AIAgent._retrievers.get(cache_key)
+            if retriever is not None:
+                return retriever
+
+            vector_store = get_vector_store(collection_name, self.embedding_model)
+            if vector_store.get_collection().find_one({}, {"_id": 1}) is None:
+                # Keep a fresh deployment working, but this belongs in the deploy step
+                logging.warning(
+                    f"Vector store for '{collection_name}' is empty; building it now. "
+                    "Run `python index_vector_stores.py` at deploy time instead."
+                )
+                build_vector_store(collection_name, self.embedding_model)
 
+            if get_retriever_backend() == "local":
+                retriever = get_local_retriever(collection_name, self.embedding_model, top_k)
+            else:
+                retriever = ActiveVectorStoreRetriever(collection_name=collection_name, embeddings=self.embedding_model, k=top_k)
+            AIAgent._retrievers[cache_key] = retriever
+            return retriever
 
 
 
@@ -189,10 +150,14 @@ class AIAgent:
                 def retriever_func(query: str):
                     return retriever_chain.invoke(query)
 
+                async def aretriever_func(query: str):
+                    return await retriever_chain.ainvoke(query)
+
                 custom_tools.append(
                     StructuredTool(
                         name=f"vector_search_{tool_name}",
                         func=retriever_func,
+                        coroutine=aretriever_func,
                         description=description,
                         args_schema=args_schema,
                     )
@@ -203,6 +168,7 @@ class AIAgent:
                     StructuredTool(
                         name=tool_name,
                         func=func,
+                        coroutine=tool_dict.get("coroutine"),
                         description=description,
                         args_schema=args_schema,
                     )
@@ -0,0 +1,208 @@
+"""
+This module keeps a small vector index of the documents uploaded to each chat, so a
+document is chunked and embedded once and every turn only retrieves the chunks that
+are relevant to the question.
+"""
+
+"""Step 1: Import necessary modules"""
+# -- Standard libraries --
+import os
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from collections import OrderedDict
+# -- 3rd Party libraries --
+import numpy as np
+# -- Custom modules --
+from utils.consts import DOCUMENT_INDEX_CACHE_SIZE
+from services.local_vector_search import normalize
+from .prompt_budget import split_document
+
+try:
+    import fcntl
+except ImportError:  # Windows: indexes are only locked within the process
+    fcntl = None
+
+DOCUMENT_INDEX_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'document_indexes'))
+
+
+"""Step 2: Define the DocumentIndex class"""
+class DocumentIndex:
+    """
+    The chunks of a chat's documents with their normalized embeddings. An index is not
+    modified once built, so it can be searched while a newer version replaces it.
+    """
+
+    def __init__(self, chunks: list[str] = None, vectors: np.ndarray = None, document_hashes: list[str] = None):
+        self.chunks = list(chunks or [])
+        self.vectors = vectors if vectors is not None else np.zeros((0, 0), dtype=np.float32)
+        self.document_hashes = list(document_hashes or [])
+
+    def contains(self, document_hash: str) -> bool:
+        return document_hash in self.document_hashes
+
+    def with_document(self, document_hash: str, chunks: list[str], vectors) -> "DocumentIndex":
+        """
+        Returns a new index with the chunks of one more document.
+        """
+        vectors = normalize(vectors)
+        return DocumentIndex(
+            chunks=self.chunks + list(chunks),
+            vectors=vectors if len(self.chunks) == 0 else np.vstack([self.vectors, vectors]),
+            document_hashes=self.document_hashes + [document_hash],
+        )
+
+    def search(self, query_vector, k: int) -> list[str]:
+        """
+        Returns the k chunks most similar to the query, most similar first.
+        """
+        if not self.chunks or k <= 0:
+            return []
+        scores = self.vectors @ normalize(query_vector)[0]
+        k = min(k, len(self.chunks))
+        top = np.argpartition(-scores, k - 1)[:k]
+        return [self.chunks[i] for i in top[np.argsort(-scores[top])]]
+
+    def save(self, path: str) -> None:
+        # Write to a temporary file first so readers never see a partial index
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, vectors=self.vectors, chunks=np.array(self.chunks), document_hashes=np.array(self.document_hashes))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "DocumentIndex":
+        with np.load(path) as data:
+            return cls(
+                chunks=data["chunks"].tolist(),
+                vectors=data["vectors"],
+                document_hashes=data["document_hashes"].tolist(),
+            )
+
+
+"""Step 3: Define the DocumentIndexStore class"""
+class DocumentIndexStore:
+    """
+    Per-chat document indexes, saved to disk so every worker process can serve the
+    follow-up turns of a chat, and kept in a bounded in-memory LRU along with the
+    modification time of their file. An index updated by another worker is reloaded.
+    Saved indexes are removed by the job that cleans up generated files.
+    """
+    _indexes: OrderedDict = OrderedDict()  # session_id -> (index, file version)
+    _lock = threading.Lock()
+    index_dir: str = DOCUMENT_INDEX_DIR
+
+    @staticmethod
+    def get_document_hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def get_index_path(cls, session_id: str) -> str:
+        # Hash the session id so it is always a safe file name
+        file_name = hashlib.sha256(session_id.encode("utf-8")).hexdigest()
+        return os.path.join(cls.index_dir, f"{file_name}.npz")
+
+    @staticmethod
+    def get_file_version(path: str):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    @classmethod
+    @contextmanager
+    def locked(cls, session_id: str):
+        """
+        Serializes the updates of a chat's index across worker processes.
+        """
+        os.makedirs(cls.index_dir, exist_ok=True)
+        with open(f"{cls.get_index_path(session_id)}.lock", "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @classmethod
+    def remember(cls, session_id: str, index: DocumentIndex, version) -> None:
+        with cls._lock:
+            cls._indexes[session_id] = (index, version)
+            cls._indexes.move_to_end(session_id)
+            while len(cls._indexes) > DOCUMENT_INDEX_CACHE_SIZE:
+                cls._indexes.popitem(last=False)
+
+    @classmethod
+    def get_index(cls, session_id: str) -> DocumentIndex | None:
+        path = cls.get_index_path(session_id)
+        version = cls.get_file_version(path)
+        with cls._lock:
+            if version is None:
+                # Never saved, or removed by the cleanup job
+                cls._indexes.pop(session_id, None)
+                return None
+            cached = cls._indexes.get(session_id)
+            if cached is not None and cached[1] == version:
+                cls._indexes.move_to_end(session_id)
+                return cached[0]
+
+        try:
+            index = DocumentIndex.load(path)
+        except Exception as e:
+            logging.error(f"Failed to load document index for session {session_id}: {e}")
+            return None
+        cls.remember(session_id, index, version)
+        return index
+
+    @classmethod
+    def add_document(cls, session_id: str, text: str, embeddings) -> DocumentIndex:
+        """
+        Chunks and embeds a document into the chat's index, unless the same document
+        was already indexed for this chat.
+
+        Args:
+            session_id (str): The chat the document was uploaded to.
+            text (str): The text extracted from the document.
+            embeddings: The embeddings model (an AzureOpenAIEmbeddings instance).
+        """
+        document_hash = cls.get_document_hash(text)
+        index = cls.get_index(session_id) or DocumentIndex()
+        if index.contains(document_hash):
+            return index
+
+        chunks = split_document(text)
+        if not chunks:
+            return index
+
+        # Embed before locking, then add to the latest saved index so the documents
+        # other workers added meanwhile are kept
+        vectors = embeddings.embed_documents(chunks)
+        with cls.locked(session_id):
+            index = cls.get_index(session_id) or DocumentIndex()
+            if index.contains(document_hash):
+                return index
+            index = index.with_document(document_hash, chunks, vectors)
+            path = cls.get_index_path(session_id)
+            index.save(path)
+            cls.remember(session_id, index, cls.get_file_version(path))
+
+        logging.info(f"Indexed {len(chunks)} document chunks for session {session_id}.")
+        return index
+
+    @classmethod
+    def retrieve(cls, session_id: str, query: str, embeddings, k: int) -> list[str]:
+        """
+        Returns the k chunks of the chat's documents most relevant to the query,
+        or an empty list when no document was uploaded to the chat.
+        """
+        index = cls.get_index(session_id)
+        if index is None or not index.chunks:
+            return []
+        return index.search(embeddings.embed_query(query), k)
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._indexes.clear()
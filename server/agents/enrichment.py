@@ -0,0 +1,238 @@
+"""
+This module runs the post-response enrichment of an agent turn (meme, speech, avatar
+expression, lip-sync) as a dependency graph, so independent steps run concurrently
+and a turn costs the longest branch instead of the sum of all steps.
+"""
+
+"""Step 1: Import necessary modules"""
+# -- Standard libraries --
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+# -- Custom modules --
+from utils.consts import ENRICHMENT_STEP_TIMEOUTS
+from .response_annotator import is_merged_annotation_enabled, DEFAULT_ANNOTATION
+
+
+"""Step 2: Define the enrichment graph primitives"""
+class EnrichmentStep:
+    """
+    A single unit of enrichment work.
+
+    Args:
+        name (str): The name of the step; its result is stored under this key.
+        func (callable): Called with the results of `depends_on`, in order.
+        depends_on (tuple[str]): Names of the steps whose results this step needs.
+        timeout (float): Seconds the step may run before its fallback is used.
+        fallback: The result to use when the step fails, times out or a dependency failed.
+    """
+
+    def __init__(self, name: str, func, depends_on: tuple = (), timeout: float = None, fallback=None):
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+        self.timeout = timeout
+        self.fallback = fallback
+
+
+def run_enrichment_steps(steps: list[EnrichmentStep], max_workers: int = None, on_result=None) -> dict:
+    """
+    Runs the given steps as soon as their dependencies are available.
+
+    A step that raises or exceeds its timeout is replaced by its fallback, and the
+    steps depending on it still run with that fallback value. A timed-out step keeps
+    running in the background but its result is ignored.
+
+    Args:
+        on_result (callable): Called with (step name, result) as soon as each step settles.
+
+    Returns:
+        dict: The result of every step, keyed by step name.
+    """
+    steps_by_name = {step.name: step for step in steps}
+    for step in steps:
+        missing = [dep for dep in step.depends_on if dep not in steps_by_name]
+        if missing:
+            raise ValueError(f"Enrichment step '{step.name}' depends on unknown steps: {missing}")
+
+    results = {}
+
+    def settle(step, value):
+        results[step.name] = value
+        if on_result:
+            on_result(step.name, value)
+
+    pending = list(steps)
+    running = {}  # future -> (step, deadline)
+    executor = ThreadPoolExecutor(max_workers=max_workers or len(steps) or 1, thread_name_prefix="enrichment")
+
+    def submit_ready_steps():
+        for step in list(pending):
+            if all(dep in results for dep in step.depends_on):
+                pending.remove(step)
+                args = [results[dep] for dep in step.depends_on]
+                deadline = time.monotonic() + step.timeout if step.timeout else None
+                running[executor.submit(step.func, *args)] = (step, deadline)
+
+    try:
+        submit_ready_steps()
+        while running:
+            deadlines = [deadline for _, deadline in running.values() if deadline is not None]
+            wait_timeout = max(0, min(deadlines) - time.monotonic()) if deadlines else None
+            done, _ = wait(list(running), timeout=wait_timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                step, _ = running.pop(future)
+                try:
+                    value = future.result()
+                except Exception as e:
+                    logging.error(f"Enrichment step '{step.name}' failed, using fallback: {e}")
+                    value = step.fallback
+                settle(step, value)
+
+            now = time.monotonic()
+            for future, (step, deadline) in list(running.items()):
+                if deadline is not None and now >= deadline and not future.done():
+                    logging.warning(f"Enrichment step '{step.name}' timed out after {step.timeout}s, using fallback.")
+                    running.pop(future)
+                    future.cancel()
+                    settle(step, step.fallback)
+
+            submit_ready_steps()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return results
+
+
+"""Step 3: Define the response enrichment graph"""
+DEFAULT_LIP_SYNC_DATA = {"METADATA": {}, "MOUTH_CUES": {}}
+DEFAULT_EXPRESSION = {"facial_expression": "default", "animation": "Idle"}
+
+
+def build_annotation_steps(agent, ai_text_response: str, is_initial: bool, merged: bool) -> list[EnrichmentStep]:
+    """
+    Builds the steps producing 'meme_topic' and 'expression', either from one merged
+    annotation call or from two separate LLM calls.
+    """
+    timeouts = ENRICHMENT_STEP_TIMEOUTS
+
+    if not merged:
+        return [
+            EnrichmentStep(
+                "meme_topic",
+                lambda: agent.determine_meme_topic(ai_response=ai_text_response, is_initial=is_initial),
+                timeout=timeouts.get("meme_topic"),
+                fallback="funny",
+            ),
+            EnrichmentStep(
+                "expression",
+                lambda: agent.determine_facial_expression_and_animation(ai_text_response),
+                timeout=timeouts.get("expression"),
+                fallback=DEFAULT_EXPRESSION,
+            ),
+        ]
+
+    return [
+        EnrichmentStep(
+            "annotation",
+            lambda: agent.annotate_response(ai_text_response, is_initial=is_initial),
+            timeout=timeouts.get("annotation"),
+            fallback=DEFAULT_ANNOTATION,
+        ),
+        EnrichmentStep("meme_topic", lambda annotation: annotation["meme_topic"], depends_on=("annotation",), fallback="funny"),
+        EnrichmentStep(
+            "expression",
+            lambda annotation: {"facial_expression": annotation["facial_expression"], "animation": annotation["animation"]},
+            depends_on=("annotation",),
+            fallback=DEFAULT_EXPRESSION,
+        ),
+    ]
+
+
+def build_response_enrichment_steps(agent, ai_text_response: str, user_id: str, chat_id: int, turn_id: int, is_initial: bool = False, merged_annotation: bool = None) -> list[EnrichmentStep]:
+    """
+    Builds the enrichment graph for an AI response:
+
+        [annotation ─┬─>] meme_topic ──> meme_url
+                     └─>  expression
+        speech ──┬──> avatar_audio
+                 └──> lip_sync_data
+
+    Args:
+        agent: The agent providing the enrichment services (a MemeMingleAIAgent).
+        merged_annotation (bool): Use one annotation call for meme topic and expression.
+            Defaults to the RESPONSE_ANNOTATOR_MODE setting.
+    """
+    timeouts = ENRICHMENT_STEP_TIMEOUTS
+    if merged_annotation is None:
+        merged_annotation = is_merged_annotation_enabled()
+
+    def fetch_meme(meme_topic):
+        fetch_meme_tool = agent.get_tool_by_name("fetch_meme")
+        if not fetch_meme_tool:
+            logging.error("Tool 'fetch_meme' not found.")
+            return None
+        return fetch_meme_tool.func(meme_topic)
+
+    def convert_text_to_speech():
+        # convert_text_to_speech returns None when the user cannot be found
+        return agent.convert_text_to_speech(ai_text_response, user_id, chat_id, turn_id) or ("", "")
+
+    return build_annotation_steps(agent, ai_text_response, is_initial, merged_annotation) + [
+        EnrichmentStep("meme_url", fetch_meme, depends_on=("meme_topic",), timeout=timeouts.get("meme_url")),
+        EnrichmentStep("speech", convert_text_to_speech, timeout=timeouts.get("speech"), fallback=("", "")),
+        EnrichmentStep(
+            "avatar_audio",
+            lambda speech: agent.convert_and_encode_audio(speech[1]) if speech[1] else "",
+            depends_on=("speech",),
+            timeout=timeouts.get("avatar_audio"),
+            fallback="",
+        ),
+        EnrichmentStep(
+            "lip_sync_data",
+            lambda speech: agent.generate_lipsync_data(speech[1]) if speech[1] else DEFAULT_LIP_SYNC_DATA,
+            depends_on=("speech",),
+            timeout=timeouts.get("lip_sync_data"),
+            fallback=DEFAULT_LIP_SYNC_DATA,
+        ),
+    ]
+
+
+def enrich_response(agent, ai_text_response: str, user_id: str, chat_id: int, turn_id: int, is_initial: bool = False, merged_annotation: bool = None) -> dict:
+    """
+    Runs the enrichment graph and shapes the result like the ai_mentor JSON response.
+    """
+    steps = build_response_enrichment_steps(agent, ai_text_response, user_id, chat_id, turn_id, is_initial, merged_annotation)
+    results = run_enrichment_steps(steps)
+
+    audio_url, _ = results["speech"]
+    expression = results["expression"]
+    return {
+        "message": ai_text_response,
+        "meme_url": results["meme_url"],
+        "audio_url": audio_url,
+        "facial_expression": expression["facial_expression"],
+        "animation": expression["animation"],
+        "avatar_audio": results["avatar_audio"],
+        "lip_sync_data": results["lip_sync_data"],
+    }
+
+
+def enrichment_result_to_events(step_name: str, value) -> list[tuple]:
+    """
+    Maps an enrichment step result to the (event, data) pairs sent to streaming clients.
+    Intermediate steps such as 'annotation' and 'meme_topic' produce no events.
+    """
+    if step_name == "meme_url":
+        return [("meme_url", {"meme_url": value})]
+    if step_name == "speech":
+        audio_url, _ = value
+        return [("audio_url", {"audio_url": audio_url})]
+    if step_name == "expression":
+        return [("expression", {"facial_expression": value["facial_expression"], "animation": value["animation"]})]
+    if step_name == "avatar_audio":
+        return [("avatar_audio", {"avatar_audio": value})]
+    if step_name == "lip_sync_data":
+        return [("lip_sync_data", {"lip_sync_data": value})]
+    return []
@@ -0,0 +1,147 @@
+"""
+This module runs the final processes of chat sessions (mood detection and summarization)
+in background threads, taking jobs from the finalization_jobs collection, so the
+finalize endpoint does not hold a request worker while the LLM calls run.
+
+Only one server process per host runs the threads: the one holding the workers' file
+lock. Another process takes over when it next starts the pool (at startup or on a
+finalize request) after the holder exited.
+"""
+
+"""Step 1: Import necessary modules"""
+# -- Standard libraries --
+import os
+import uuid
+import socket
+import logging
+import tempfile
+import threading
+# -- Custom modules --
+from .agent_pool import AgentPool
+from services.db.finalization_jobs import claim_next_finalization_job, complete_finalization_job, fail_finalization_job
+from utils.consts import MENTOR_TOOL_NAMES, FINALIZATION_POLL_SECONDS
+
+try:
+    import fcntl
+except ImportError:  # Windows: every process runs its own workers
+    fcntl = None
+
+FINALIZATION_LOCK_PATH = os.path.join(tempfile.gettempdir(), "mememingle-finalization-workers.lock")
+
+
+"""Step 2: Define the FinalizationWorkerPool class"""
+class FinalizationWorkerPool:
+    """
+    A pool of threads processing finalization jobs, run by one server process per host.
+    Jobs are claimed atomically in MongoDB, so each job runs in one place only even
+    across hosts.
+    """
+    _threads: list = []
+    _pid: int = None
+    _lock_file = None
+    _stop_event = threading.Event()
+    _wake_event = threading.Event()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def get_worker_count() -> int:
+        """
+        Returns the number of worker threads per process. Set FINALIZATION_WORKERS=0
+        to finalize chats synchronously in the request instead.
+        """
+        try:
+            return max(0, int(os.getenv("FINALIZATION_WORKERS", "2")))
+        except ValueError:
+            return 2
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        return cls.get_worker_count() > 0
+
+    @classmethod
+    def acquire_process_lock(cls) -> bool:
+        """
+        Returns whether this process holds the workers' file lock, taking it if it is free.
+        """
+        if fcntl is None:
+            return True
+        lock_file = open(FINALIZATION_LOCK_PATH, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        cls._lock_file = lock_file
+        return True
+
+    @classmethod
+    def start(cls) -> None:
+        """
+        Starts the worker threads in the current process, unless they are running here or
+        in another process of the host.
+        """
+        with cls._lock:
+            if cls._pid == os.getpid() and cls._threads:
+                return
+            if not cls.acquire_process_lock():
+                return
+            cls._pid = os.getpid()
+            cls._stop_event = threading.Event()
+            cls._threads = []
+            for i in range(cls.get_worker_count()):
+                worker_id = f"{socket.gethostname()}-{os.getpid()}-{i}-{uuid.uuid4().hex[:8]}"
+                thread = threading.Thread(target=cls.work, args=(worker_id, cls._stop_event), name=f"finalization-{i}", daemon=True)
+                thread.start()
+                cls._threads.append(thread)
+            logging.info(f"Started {len(cls._threads)} finalization workers.")
+
+    @classmethod
+    def stop(cls, timeout: float = None) -> None:
+        with cls._lock:
+            cls._stop_event.set()
+            cls._wake_event.set()
+            for thread in cls._threads:
+                thread.join(timeout)
+            cls._threads = []
+            cls._pid = None
+            if cls._lock_file is not None:
+                # Closing the file releases the lock
+                cls._lock_file.close()
+                cls._lock_file = None
+
+    @classmethod
+    def notify(cls) -> None:
+        """
+        Wakes up idle workers of this process after a job was queued. Workers in another
+        process pick the job up at their next poll.
+        """
+        cls._wake_event.set()
+
+    @classmethod
+    def work(cls, worker_id: str, stop_event: threading.Event) -> None:
+        while not stop_event.is_set():
+            try:
+                job = claim_next_finalization_job(worker_id)
+            except Exception as e:
+                logging.error(f"Error claiming a finalization job: {e}")
+                job = None
+
+            if job is None:
+                cls._wake_event.wait(FINALIZATION_POLL_SECONDS)
+                cls._wake_event.clear()
+                continue
+
+            cls.run_job(job)
+
+    @staticmethod
+    def run_job(job: dict) -> None:
+        logging.info(f"Finalizing chat {job['chat_id']} for user {job['user_id']} (attempt {job.get('attempts', 1)})")
+        try:
+            # Finalization only needs the LLM, so reuse the default pooled agent
+            agent = AgentPool.get_agent(tool_names=MENTOR_TOOL_NAMES)
+            agent.perform_final_processes(job["user_id"], job["chat_id"])
+        except Exception as e:
+            logging.error(f"Error during finalizing chat: {e}", exc_info=True)
+            fail_finalization_job(job, str(e))
+            return
+        complete_finalization_job(job)
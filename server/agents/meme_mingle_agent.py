@@ -4,9 +4,11 @@
 from datetime import datetime
 import logging
 import json
-import asyncio
 from operator import itemgetter
 import os
+import queue
+import asyncio
+import threading
 # -- 3rd Party libraries --
 # Azure
 # Langchain
@@ -14,24 +16,34 @@ from langchain_core.runnables.history import RunnableWithMessageHistory
 from langchain_core.chat_history import BaseChatMessageHistory
 from langchain.memory.chat_memory import BaseChatMemory
 from langchain.memory.summary import ConversationSummaryMemory
-from langchain_core.runnables import RunnablePassthrough
+from langchain.memory.prompt import SUMMARY_PROMPT
+from langchain_core.runnables import RunnablePassthrough, RunnableLambda
 from langchain.agents import create_tool_calling_agent, AgentExecutor
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_mongodb.chat_message_histories import MongoDBChatMessageHistory
-from langchain_core.messages import trim_messages
+from langchain_core.messages import trim_messages, get_buffer_string
 from langchain_core.messages.human import HumanMessage
+from langchain_core.messages.ai import AIMessage
 from langchain_core.messages.system import SystemMessage
 
 # MongoDB
 # -- Custom modules --
 from .ai_agent import AIAgent
+from .enrichment import enrich_response, build_response_enrichment_steps, run_enrichment_steps, enrichment_result_to_events
+from .response_annotator import annotate_response
+from .prompt_budget import PromptBudget, split_document, rank_chunks_by_overlap
+from .document_index import DocumentIndexStore
+from .semantic_cache import SemanticResponseCache, CachedTurn
 from services.azure_mongodb import MongoDBClient
+from services.azure_open_ai import get_azure_openai_llm
 from services.azure_form_recognizer import extract_text_from_file
 from services.text_to_speech_service import text_to_speech
 from models.user import User
-from services.db.user import get_user_profile_by_user_id
+from services.db.user import get_user_profile_by_user_id, get_user_preferred_language
+from services.db.user_memory import get_user_memory_digest, update_user_memory_digest
+from services.db.chat_history import PooledMongoDBChatMessageHistory, ChatSessionSnapshot
+from utils.sse import TokenQueueCallbackHandler
 # Constants
-from utils.consts import SYSTEM_MESSAGE
+from utils.consts import SYSTEM_MESSAGE, FACIAL_EXPRESSIONS, ANIMATIONS, WELCOME_MEME_TOPICS, DOCUMENT_RETRIEVAL_TOP_K
 from pydub import AudioSegment
 import base64
 import subprocess
@@ -70,23 +82,28 @@ class MemeMingleAIAgent(AIAgent):
         # Create a SystemMessage object
         self.system_message = SystemMessage(content=formatted_system_message)
         super().__init__(formatted_system_message, tool_names)
+        # Same deployment with token streaming enabled, used by stream()
+        self.streaming_llm = get_azure_openai_llm(streaming=True)
 
         # Define the base prompt messages without extracted_text
+        self.tool_hint_lines = [
+            "You can retrieve information about the AI using the 'agent_facts' tool.",
+            "You can generate suggestions using the 'generate_suggestions' tool.",
+            "You can search for information using the 'web_search_bing' tool.",
+            "You can search for textbook PDFs using the 'textbook_search' tool.",
+            "You can search for textbooks using the 'gutendex_textbook_search' tool.",
+            #"You can search for information using the 'web_search_youtube' tool.",
+            "You can search for information using the 'web_search_tavily' tool.",
+            "You can search for locations using the 'location_search_gplaces' tool.",
+            "You can retrieve your user profile using the 'user_profile_retrieval' tool.",
+            #"You can retrieve your user journey using the 'user_journey_retrieval' tool.",
+            "You can generate documents using the 'generate_document' tool.",
+            "You can fetch popular memes using the 'fetch_meme' tool.",
+        ]
         self.base_prompt_messages = [
             ("system", self.system_message.content),
             ("system", "{past_summaries}"),
-            ("system", "You can retrieve information about the AI using the 'agent_facts' tool."),
-            ("system", "You can generate suggestions using the 'generate_suggestions' tool."),
-            ("system", "You can search for information using the 'web_search_bing' tool."),
-            ("system", "You can search for textbook PDFs using the 'textbook_search' tool."),
-            ("system", "You can search for textbooks using the 'gutendex_textbook_search' tool."),
-            #("system", "You can search for information using the 'web_search_youtube' tool."),
-            ("system", "You can search for information using the 'web_search_tavily' tool."),
-            ("system", "You can search for locations using the 'location_search_gplaces' tool."),
-            ("system", "You can retrieve your user profile using the 'user_profile_retrieval' tool."),
-            #("system", "You can retrieve your user journey using the 'user_journey_retrieval' tool."),
-            ("system", "You can generate documents using the 'generate_document' tool."),
-            ("system", "You can fetch popular memes using the 'fetch_meme' tool."),
+            *[("system", line) for line in self.tool_hint_lines],
             ("system", "user_id:{user_id}"),
             MessagesPlaceholder(variable_name="chat_turns"),
             ("human", "{input}"),
@@ -104,27 +121,15 @@ class MemeMingleAIAgent(AIAgent):
 
     
 
-    def get_session_history(self, session_id: str) -> MongoDBChatMessageHistory:
+    def get_session_history(self, session_id: str) -> PooledMongoDBChatMessageHistory:
         """
         Retrieves the chat history for a given session ID from the database.
 
         Args:
             session_id (str): The session ID to retrieve the chat history for.
         """
-        CONNECTION_STRING = MongoDBClient.get_mongodb_variables()
-
-        history = MongoDBChatMessageHistory(
-            CONNECTION_STRING,
-            session_id,
-            MongoDBClient.get_db_name(),
-            collection_name="chat_turns"
-        )
-
-        logging.info(f"Retrieved chat history for session {history}")
-        if history is None:
-            return []
-        else:
-            return history
+        # Uses the shared MongoDB connection pool rather than a client per call
+        return PooledMongoDBChatMessageHistory(session_id)
 
     def get_agent_memory(self, user_id:str, chat_id:int) -> BaseChatMemory:
             """
@@ -150,17 +155,37 @@ class MemeMingleAIAgent(AIAgent):
 
             return memory
 
-    def get_agent_with_history(self, agent_executor) -> RunnableWithMessageHistory:
+    @staticmethod
+    def format_document_context(document_chunks: list[str]) -> str:
+        """
+        Formats the document chunks that fit the prompt budget as a system message.
+        """
+        if not document_chunks:
+            return "The user has provided a document, but it is too large to include here."
+        excerpts = "\n\n---\n\n".join(document_chunks)
+        return f"The user has provided a document. The most relevant parts of it are:\n\n{excerpts}\n\nPlease use this content to assist the user."
+
+
+    def get_session_snapshot(self, user_id: str, chat_id: int) -> ChatSessionSnapshot:
+        """
+        Returns a history for the session that is read from the database at most once,
+        to be shared by everything that needs the session's messages within a request.
+        """
+        session_id = f"{user_id}-{chat_id}"
+        return ChatSessionSnapshot(session_id, self.get_session_history(session_id))
+
+    def get_agent_with_history(self, agent_executor, history: BaseChatMessageHistory = None) -> RunnableWithMessageHistory:
         """
         Wraps the agent executor with a message history object to use history within the conversation.
 
         Args:
             agent_executor (AgentExecutor): The agent executor to wrap with message history.
+            history (BaseChatMessageHistory): An already loaded history of the session to use.
         """
 
         agent_with_history = RunnableWithMessageHistory(
             agent_executor,
-            get_session_history=self.get_session_history,
+            get_session_history=(lambda session_id: history) if history is not None else self.get_session_history,
             input_messages_key="input",
             history_messages_key="chat_turns",
             verbose=True
@@ -183,14 +208,14 @@ class MemeMingleAIAgent(AIAgent):
 
         return agent_executor
     
-    def get_suggestions_based_on_mood(self, user_id, chat_id, user_input):
-        mood = self.get_user_mood(user_id, chat_id)
+    def get_suggestions_based_on_mood(self, user_id, chat_id, user_input, history: BaseChatMessageHistory = None):
+        mood = self.get_user_mood(user_id, chat_id, history=history)
         suggestions = self.tools["generate_suggestions"].func(mood, user_input)
         return suggestions
 
-    def get_user_mood(self, user_id, chat_id):
-        history:BaseChatMessageHistory = self.get_session_history(f"{user_id}-{chat_id}")
-        history_log = asyncio.run(history.aget_messages()) # Running async function as synchronous
+    def get_user_mood(self, user_id, chat_id, history: BaseChatMessageHistory = None):
+        history = history or self.get_session_snapshot(user_id, chat_id)
+        history_log = history.messages
 
         # Get perceived mood
         instructions = """
@@ -216,7 +241,6 @@ class MemeMingleAIAgent(AIAgent):
             start_on="human",
         )
 
-        trimmer.invoke(history_log)
         chain = RunnablePassthrough.assign(messages=itemgetter("messages") | trimmer) | prompt | self.llm
         response = chain.invoke({"messages": history_log})
         user_mood = None if response.content == "None" else response.content
@@ -244,34 +268,54 @@ class MemeMingleAIAgent(AIAgent):
         return most_recent_chat_summary.get("chat_id")
 
 
-    def run(self, message: str, file_content: bytes = None, file_mime_type: str = None, with_history:bool =True, user_id: str=None, chat_id:int=None, turn_id:int=None) -> str:
+    def load_turn_context(self, user_id: str) -> dict:
         """
-        Runs the agent with the given message and context.
+        Loads what the answer of a turn depends on besides the message: the current chat,
+        its history, the digest of past conversation summaries for the user and whether
+        documents were uploaded to the chat.
+
+        Returns:
+            dict: {"chat_id", "history", "chat_turns", "past_summaries", "has_documents"}
+        """
+        chat_id = MemeMingleAIAgent.get_chat_id(user_id)
+        history = self.get_session_snapshot(user_id, chat_id)
+        return {
+            "chat_id": chat_id,
+            "history": history,
+            # Loaded here so the snapshot is never first read by the agent on an event loop
+            "chat_turns": history.messages,
+            "past_summaries": get_user_memory_digest(user_id),
+            "has_documents": DocumentIndexStore.get_index(f"{user_id}-{chat_id}") is not None,
+        }
+
+    def prepare_turn(self, message: str, file_content: bytes = None, file_mime_type: str = None, user_id: str = None, extra_system_message: str = None, llm=None, context: dict = None, standalone: bool = False) -> tuple:
+        """
+        Builds the history-aware agent executor and its input for a conversation turn.
 
         Args:
             message (str): The message to be processed by the agent.
             file_content (bytes): The content of the uploaded file.
-            with_history (bool): A flag indicating whether to use history in the conversation.
+            file_mime_type (str): The MIME type of the uploaded file.
             user_id (str): A unique identifier for the user.
-            chat_id (int): A unique identifier for the conversation.
-            turn_id (int): A unique identifier for the evaluated turn in the conversation.
-        """
-
+            extra_system_message (str): Optional per-call instructions appended after the system message.
+            llm: The chat model to run the agent with. Defaults to self.llm.
+            context (dict): The turn context from load_turn_context(), if already loaded.
+            standalone (bool): Whether to answer from the message alone, without the chat
+                history and the digest of past conversations, so the answer can be cached.
+                The turn is still added to the history.
 
-        chat_id = MemeMingleAIAgent.get_chat_id(user_id)
+        Returns:
+            tuple: (agent_with_history, agent_input, chat_id, session_id)
+        """
+        context = context or self.load_turn_context(user_id)
+        chat_id = context["chat_id"]
 
        
         # TODO: throw error if user_id, chat_id is set to None.
         session_id = f"{user_id}-{chat_id}"
        
-       # Retrieve past conversation summaries for the user
-        db_client = MongoDBClient.get_client()
-        db_name = MongoDBClient.get_db_name()
-        db = db_client[db_name]
-        chat_summary_collection = db["chat_summaries"]
-        past_summaries_cursor = chat_summary_collection.find({"user_id": user_id}).sort("chat_id", -1)
-        past_summaries = list(past_summaries_cursor)
-        summaries_text = "\n".join([summary.get("summary_text", "") for summary in past_summaries])
+        # The digest of past conversation summaries for the user
+        summaries_text = "" if standalone else context["past_summaries"]
 
        # Process the uploaded file if provided
         extracted_text = ""
@@ -290,75 +334,263 @@ class MemeMingleAIAgent(AIAgent):
         # Dynamically build the prompt messages
         prompt_messages = self.base_prompt_messages.copy()
 
-        if extracted_text:
-            # Include the extracted text in the prompt with clear instruction
-            prompt_messages.insert(2, ("system", f"The user has provided a document with the following content:\n\n{extracted_text}\n\nPlease use this content to assist the user."))
+        # Index the document for this chat once, and retrieve only the chunks relevant
+        # to the question. Documents uploaded earlier in the chat stay available.
+        try:
+            if extracted_text:
+                DocumentIndexStore.add_document(session_id, extracted_text, self.embedding_model)
+            ranked_chunks = DocumentIndexStore.retrieve(session_id, message, self.embedding_model, k=DOCUMENT_RETRIEVAL_TOP_K)
+        except Exception as e:
+            logging.error(f"Document retrieval failed, ranking chunks by word overlap instead: {e}")
+            ranked_chunks = rank_chunks_by_overlap(split_document(extracted_text), message)
+        if ranked_chunks:
+            prompt_messages.insert(2, ("system", "{document_context}"))
+
+        if extra_system_message:
+            # Literal text, so braces in it must not be read as template variables
+            prompt_messages.insert(1, SystemMessage(content=extra_system_message))
 
         # Create a ChatPromptTemplate with the prompt messages
         prompt = ChatPromptTemplate.from_messages(prompt_messages)
 
-        # Create the agent with the new prompt
-        agent = create_tool_calling_agent(self.llm, self.tools, prompt)
+        # Create the agent with the new prompt. The executor is kept local to this
+        # call because the agent instance itself may be shared between requests.
+        agent = create_tool_calling_agent(llm or self.llm, self.tools, prompt)
         agent_executor = AgentExecutor(
             agent=agent, tools=self.tools, verbose=True, handle_parsing_errors=True
         )
-        self.agent_executor = self.get_agent_with_history(agent_executor)
 
-        try:
-            invocation = self.agent_executor.invoke(
-                agent_input,
-                config={"configurable": {"session_id": session_id}}
+        fixed_text = "\n".join([self.system_message.content, extra_system_message or ""] + self.tool_hint_lines)
+
+        def fit_prompt_to_budget(inputs: dict) -> dict:
+            # Runs inside the history wrapper, so the stored history itself is untouched
+            sections, usage = PromptBudget().fit(
+                fixed_text,
+                inputs["input"],
+                past_summaries=inputs.get("past_summaries", ""),
+                chat_turns=[] if standalone else inputs.get("chat_turns", []),
+                ranked_chunks=ranked_chunks,
             )
+            logging.info(f"Prompt token usage for session {session_id}: {usage}")
 
-            ai_text_response = invocation["output"]
+            budgeted_inputs = {**inputs, "past_summaries": sections["past_summaries"], "chat_turns": sections["chat_turns"]}
+            if ranked_chunks:
+                budgeted_inputs["document_context"] = self.format_document_context(sections["document_chunks"])
+            return budgeted_inputs
 
-            # Determine if it's the initial greeting
-            is_initial = (turn_id == 0)
+        agent_with_history = self.get_agent_with_history(RunnableLambda(fit_prompt_to_budget) | agent_executor, context["history"])
 
-            # Fetch a relevant meme/GIF based on the AI's response or user input
-            meme_topic = self.determine_meme_topic(ai_response=ai_text_response, is_initial=is_initial)
+        return agent_with_history, agent_input, chat_id, session_id
 
-           
-            # Use helper method to get fetch_meme tool
-            fetch_meme_tool = self.get_tool_by_name("fetch_meme")
-            if fetch_meme_tool:
-                meme_url = fetch_meme_tool.func(meme_topic)
-            else:
-                logging.error("Tool 'fetch_meme' not found.")
-                meme_url = None
 
-            # Convert AI text response to speech
-            audio_url, filename = self.convert_text_to_speech(ai_text_response, user_id, chat_id, turn_id)
-            
-             # 4) Determine Facial Expression & Animation
-            fa_data = self.determine_facial_expression_and_animation(ai_text_response)
-            facial_expression = fa_data["facial_expression"]
-            animation = fa_data["animation"]
-            ##convert wav to mp3 and do base64 encoding
-            avatar_audio = self.convert_and_encode_audio(filename)
+    def start_cached_turn(self, message: str, user_id: str, context: dict, file_content: bytes = None, turn_id: int = None, extra_system_message: str = None) -> CachedTurn:
+        """
+        Returns the semantic cache side of a turn, which is cacheable if the question can
+        be answered without the conversation before it.
+        """
+        language = get_user_preferred_language(user_id) if SemanticResponseCache.is_enabled() else None
+        cacheable = SemanticResponseCache.is_cacheable_turn(
+            message, language, file_content, turn_id, extra_system_message, has_documents=context["has_documents"]
+        )
+        return CachedTurn(self.desired_role, language, message, self.embedding_model, cacheable)
 
-            ##lipsync data
-            lip_sync_data = self.generate_lipsync_data(filename)
-           
+    def record_cached_answer(self, context: dict, message: str, ai_text_response: str) -> None:
+        # The turn is still recorded so the conversation stays coherent
+        context["history"].add_messages([HumanMessage(content=message), AIMessage(content=ai_text_response)])
 
 
-            
-            # Structure the response to include both text and meme/GIF
-            response = {
-                "message": ai_text_response,
-                "meme_url": meme_url,
-                "audio_url": audio_url,
-                "facial_expression": facial_expression,
-                "animation": animation,
-                "avatar_audio": avatar_audio,
-                "lip_sync_data": lip_sync_data
-            }   
+    def run(self, message: str, file_content: bytes = None, file_mime_type: str = None, with_history:bool =True, user_id: str=None, chat_id:int=None, turn_id:int=None, extra_system_message: str = None) -> str:
+        """
+        Runs the agent with the given message and context.
+
+        All per-user state is passed in here rather than stored on the agent,
+        so a single instance can be shared between requests (see AgentPool).
+
+        Args:
+            message (str): The message to be processed by the agent.
+            file_content (bytes): The content of the uploaded file.
+            with_history (bool): A flag indicating whether to use history in the conversation.
+            user_id (str): A unique identifier for the user.
+            chat_id (int): A unique identifier for the conversation.
+            turn_id (int): A unique identifier for the evaluated turn in the conversation.
+            extra_system_message (str): Optional per-call instructions appended after the system message.
+        """
+        context = self.load_turn_context(user_id)
+        chat_id = context["chat_id"]
+
+        try:
+            # Reuse the answer to a near-identical standalone question, if cached, before
+            # the document retrieval and prompt building
+            cached_turn = self.start_cached_turn(message, user_id, context, file_content, turn_id, extra_system_message)
+            ai_text_response = cached_turn.lookup()
+
+            if ai_text_response is not None:
+                self.record_cached_answer(context, message, ai_text_response)
+            else:
+                agent_with_history, agent_input, chat_id, session_id = self.prepare_turn(
+                    message,
+                    file_content=file_content,
+                    file_mime_type=file_mime_type,
+                    user_id=user_id,
+                    extra_system_message=extra_system_message,
+                    context=context,
+                    standalone=cached_turn.cacheable,
+                )
+                invocation = agent_with_history.invoke(
+                    agent_input,
+                    config={"configurable": {"session_id": session_id}, "callbacks": [cached_turn.tool_usage]}
+                )
+
+                ai_text_response = invocation["output"]
+                cached_turn.store(ai_text_response)
+
+            # Determine if it's the initial greeting
+            is_initial = (turn_id == 0)
+
+            # Fetch a meme, synthesize speech and pick the avatar's expression
+            # concurrently; see agents/enrichment.py for the step graph.
+            response = enrich_response(
+                self,
+                ai_text_response,
+                user_id=user_id,
+                chat_id=chat_id,
+                turn_id=turn_id,
+                is_initial=is_initial,
+            )
             return response
         except Exception as e:
             logging.error(f"Error during agent execution: {e}", exc_info=True)
             raise   
 
-   
+
+    async def arun(self, message: str, file_content: bytes = None, file_mime_type: str = None, user_id: str = None, chat_id: int = None, turn_id: int = None, extra_system_message: str = None) -> dict:
+        """
+        Async version of run(), for the async server (async_app.py).
+
+        The agent runs with AgentExecutor.ainvoke, so LLM calls and the tools that have
+        an async version do not hold a thread. The remaining blocking work (MongoDB,
+        embeddings, enrichment) runs in the default thread pool, keeping the event
+        loop free to serve other conversations.
+
+        Args:
+            See run().
+        """
+        context = await asyncio.to_thread(self.load_turn_context, user_id)
+        chat_id = context["chat_id"]
+
+        try:
+            cached_turn = await asyncio.to_thread(self.start_cached_turn, message, user_id, context, file_content, turn_id, extra_system_message)
+            ai_text_response = await asyncio.to_thread(cached_turn.lookup)
+
+            if ai_text_response is not None:
+                await asyncio.to_thread(self.record_cached_answer, context, message, ai_text_response)
+            else:
+                agent_with_history, agent_input, chat_id, session_id = await asyncio.to_thread(
+                    self.prepare_turn,
+                    message,
+                    file_content=file_content,
+                    file_mime_type=file_mime_type,
+                    user_id=user_id,
+                    extra_system_message=extra_system_message,
+                    context=context,
+                    standalone=cached_turn.cacheable,
+                )
+                invocation = await agent_with_history.ainvoke(
+                    agent_input,
+                    config={"configurable": {"session_id": session_id}, "callbacks": [cached_turn.tool_usage]}
+                )
+
+                ai_text_response = invocation["output"]
+                await asyncio.to_thread(cached_turn.store, ai_text_response)
+
+            return await asyncio.to_thread(
+                enrich_response,
+                self,
+                ai_text_response,
+                user_id=user_id,
+                chat_id=chat_id,
+                turn_id=turn_id,
+                is_initial=(turn_id == 0),
+            )
+        except Exception as e:
+            logging.error(f"Error during async agent execution: {e}", exc_info=True)
+            raise
+
+
+    def stream(self, message: str, file_content: bytes = None, file_mime_type: str = None, user_id: str = None, chat_id: int = None, turn_id: int = None, extra_system_message: str = None):
+        """
+        Runs the agent like run(), but yields (event, data) pairs as results become ready:
+        'token' events while the answer is generated, then 'message', one event per
+        enrichment result ('meme_url', 'audio_url', 'expression', 'avatar_audio',
+        'lip_sync_data') and finally 'done'.
+
+        Args:
+            See run().
+        """
+        events = queue.Queue()
+        token_handler = TokenQueueCallbackHandler(events)
+
+        def run_turn():
+            try:
+                context = self.load_turn_context(user_id)
+                chat_id = context["chat_id"]
+
+                # Same semantic cache as run(); a cached answer is sent as a single token
+                cached_turn = self.start_cached_turn(message, user_id, context, file_content, turn_id, extra_system_message)
+                ai_text_response = cached_turn.lookup()
+
+                if ai_text_response is not None:
+                    self.record_cached_answer(context, message, ai_text_response)
+                    events.put(("token", {"token": ai_text_response}))
+                else:
+                    agent_with_history, agent_input, chat_id, session_id = self.prepare_turn(
+                        message,
+                        file_content=file_content,
+                        file_mime_type=file_mime_type,
+                        user_id=user_id,
+                        extra_system_message=extra_system_message,
+                        llm=self.streaming_llm,
+                        context=context,
+                        standalone=cached_turn.cacheable,
+                    )
+                    invocation = agent_with_history.invoke(
+                        agent_input,
+                        config={"configurable": {"session_id": session_id}, "callbacks": [token_handler, cached_turn.tool_usage]}
+                    )
+                    ai_text_response = invocation["output"]
+                    cached_turn.store(ai_text_response)
+
+                events.put(("message", {"message": ai_text_response}))
+
+                steps = build_response_enrichment_steps(
+                    self,
+                    ai_text_response,
+                    user_id=user_id,
+                    chat_id=chat_id,
+                    turn_id=turn_id,
+                    is_initial=(turn_id == 0),
+                )
+                run_enrichment_steps(steps, on_result=lambda name, value: events.put(("step", (name, value))))
+                events.put(("done", {}))
+            except Exception as e:
+                logging.error(f"Error during streamed agent execution: {e}", exc_info=True)
+                events.put(("error", {"error": str(e)}))
+
+        threading.Thread(target=run_turn, name="agent-stream", daemon=True).start()
+
+        while True:
+            event, data = events.get()
+            if event == "step":
+                name, value = data
+                for stream_event in enrichment_result_to_events(name, value):
+                    yield stream_event
+                continue
+
+            yield event, data
+            if event in ("done", "error"):
+                break
+
+
     def convert_and_encode_audio(self, wav_file_name):
         """
         Converts a WAV file to MP3 and encodes it in Base64.
@@ -495,7 +727,7 @@ class MemeMingleAIAgent(AIAgent):
                 "AI Response:\n"
                 f"{ai_response}\n\n"
                 "Available Meme Topics for Welcome:\n"
-                "welcome, hello, introduction, greeting\n\n"
+                f"{', '.join(WELCOME_MEME_TOPICS)}\n\n"
                 "Based on the AI Response, select the most suitable meme topic:"
                 "you must provide the meme topic."
             )
@@ -522,6 +754,19 @@ class MemeMingleAIAgent(AIAgent):
 
         
         
+    def annotate_response(self, ai_response: str, is_initial: bool = False) -> dict:
+        """
+        Determines the meme topic, facial expression and animation in one LLM call.
+
+        Args:
+            ai_response (str): The AI's textual response.
+            is_initial (bool): Flag indicating if it's the initial interaction.
+
+        Returns:
+            dict: A dictionary with keys 'meme_topic', 'facial_expression' and 'animation'.
+        """
+        return annotate_response(self.llm, ai_response, is_initial=is_initial)
+
     def get_initial_greeting(self, user_id:str) -> dict:
         """
         Retrieves the initial greeting message for a user.
@@ -537,27 +782,21 @@ class MemeMingleAIAgent(AIAgent):
         chat_summary_collection = db["chat_summaries"]
         user_journey = user_journey_collection.find_one({"user_id": user_id})
 
-         # Retrieve past conversation summaries for the user
-        past_summaries_cursor = chat_summary_collection.find({"user_id": user_id}).sort("chat_id", -1)
-
-        past_summaries = list(past_summaries_cursor)
-
-        # Combine the past summaries into a single string
-        recent_summaries = past_summaries[:2]
-        summaries_text = "\n".join([summary.get("summary_text", "") for summary in recent_summaries])
+        # Retrieve the digest of past conversation summaries for the user
+        summaries_text = get_user_memory_digest(user_id)
         print(f"Past summaries retrieved:\n{summaries_text}")
 
-        # Include the summaries in the system prompt
-        system_message = self.system_message
+        # Collect per-user instructions for this greeting. They are passed to run()
+        # instead of being written onto self.system_message, which is shared.
+        greeting_context = ""
 
         if summaries_text:
-            addendum = f"""
+            greeting_context += f"""
         Previous Conversations Summary:
         {summaries_text}
 
         Please use the above information to continue assisting the user.
         """
-            self.system_message.content += addendum
 
 
         now = datetime.now()
@@ -596,8 +835,7 @@ In this session, do your best to understand what the user hopes to achieve throu
 Explain that you are here to provide personalized tutoring, mentorship, and career guidance to support their educational journey. Ensure the student feels welcomed, understood, and excited to embark on their learning experience with your assistance.
 """
 
-            full_system_message = ''.join([system_message.content, introduction])
-            system_message.content = full_system_message
+            greeting_context += introduction
 
         chat_id = MemeMingleAIAgent.get_chat_id(user_id)
 
@@ -607,6 +845,7 @@ Explain that you are here to provide personalized tutoring, mentorship, and care
             user_id=user_id,
             chat_id=chat_id,
             turn_id=0,
+            extra_system_message=greeting_context or None,
         )
 
        
@@ -618,36 +857,31 @@ Explain that you are here to provide personalized tutoring, mentorship, and care
         
         
 
-    def get_summary_from_chat_history(self, user_id, chat_id):
-        history: BaseChatMessageHistory = self.get_session_history(f"{user_id}-{chat_id}")
-
-        memory = ConversationSummaryMemory(
-            llm=self.llm,
-            chat_memory=history,
-            return_messages=False,
-            input_key='input',
-            output_key='output'
-        )
+    def get_summary_from_chat_history(self, user_id, chat_id, history: BaseChatMessageHistory = None, previous_summary: str = "", summarized_count: int = 0):
+        """
+        Extends the running summary of a chat with the messages it does not cover yet,
+        in a single LLM call.
 
-        messages = asyncio.run(history.aget_messages())
+        Args:
+            history (BaseChatMessageHistory): The session's history, if already loaded.
+            previous_summary (str): The summary of the first summarized_count messages.
+            summarized_count (int): How many messages of the history are already summarized.
 
-        # Process messages in pairs (HumanMessage and AIMessage)
-        for i in range(0, len(messages), 2):
-            if i + 1 < len(messages):
-                human_msg = messages[i]
-                ai_msg = messages[i + 1]
+        Returns:
+            str: The summary of the whole conversation.
+        """
+        history = history or self.get_session_snapshot(user_id, chat_id)
+        new_messages = history.messages[summarized_count:]
 
-                if isinstance(human_msg, HumanMessage) and not isinstance(ai_msg, HumanMessage):
-                    memory.save_context({'input': human_msg.content}, {'output': ai_msg.content})
-                else:
-                    # Handle mismatched pairs if necessary
-                    pass
-            else:
-                # Handle the case where there's an unmatched message at the end
-                pass
+        if not new_messages:
+            return previous_summary
 
-        # Retrieve the summary
-        summary = memory.load_memory_variables({}).get('history', '')
+        chain = SUMMARY_PROMPT | self.llm
+        response = chain.invoke({
+            "summary": previous_summary or "",
+            "new_lines": get_buffer_string(new_messages),
+        })
+        summary = response.content.strip()
         print(f"Generated summary: {summary}")
         return summary
 
@@ -659,16 +893,35 @@ Explain that you are here to provide personalized tutoring, mentorship, and care
         db = db_client[db_name]
 
         chat_summary_collection = db["chat_summaries"]
-
-        mood = self.get_user_mood(user_id, chat_id)
-        summary = self.get_summary_from_chat_history(user_id, chat_id)
+        chat_summary = chat_summary_collection.find_one(
+            {"user_id": user_id, "chat_id": int(chat_id)},
+            {"summary_text": 1, "summarized_message_count": 1, "_id": 0}
+        ) or {}
+
+        # Load the session's messages once for both the mood and the summary
+        history = self.get_session_snapshot(user_id, chat_id)
+        message_count = len(history.messages)
+        mood = self.get_user_mood(user_id, chat_id, history=history)
+
+        # Only the messages after the watermark are summarized, so finalizing the
+        # same chat again costs at most one LLM call for its new turns
+        summary = self.get_summary_from_chat_history(
+            user_id,
+            chat_id,
+            history=history,
+            previous_summary=chat_summary.get("summary_text", ""),
+            summarized_count=chat_summary.get("summarized_message_count", 0),
+        )
 
         # Update the chat summary
         result = chat_summary_collection.update_one(
             {"user_id": user_id, "chat_id": int(chat_id)}, 
-            {"$set": {"perceived_mood": mood, "summary_text": summary}}
+            {"$set": {"perceived_mood": mood, "summary_text": summary, "summarized_message_count": message_count}}
         )
 
+        # Fold the new summary into the user's rolling memory digest
+        update_user_memory_digest(user_id, chat_id, summary)
+
         print(result)
         pass
 
@@ -738,26 +991,8 @@ Explain that you are here to provide personalized tutoring, mentorship, and care
         """
 
         # The available options you want the LLM to choose from
-        facial_expressions_list = [
-            "smile", 
-            "sad", 
-            "angry", 
-            "surprised", 
-            "funnyFace", 
-            "default"
-        ]
-
-        animations_list = [
-            "Talking_0", 
-            "Talking_1", 
-            "Talking_2", 
-            "Crying", 
-            "Laughing", 
-            "Rumba", 
-            "Idle", 
-            "Terrified", 
-            "Angry"
-        ]
+        facial_expressions_list = FACIAL_EXPRESSIONS
+        animations_list = ANIMATIONS
 
         prompt = f"""
 You are given a list of possible facial expressions and animations. Based on the content and sentiment of the AI's response, choose the best matching facial expression and animation.
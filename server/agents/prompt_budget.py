@@ -0,0 +1,150 @@
+"""
+This module fits the sections of an agent prompt (system message, past summaries,
+uploaded document, chat history and user input) into a token budget.
+"""
+
+"""Step 1: Import necessary modules"""
+# -- Standard libraries --
+import re
+import logging
+# -- 3rd Party libraries --
+from langchain_core.messages import BaseMessage, trim_messages
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+# -- Custom modules --
+from utils.consts import PROMPT_TOKEN_BUDGET, PROMPT_SECTION_SHARES, PROMPT_RESERVED_TOKENS
+from utils.tokens import count_tokens, truncate_to_tokens
+
+# Approximate per-message overhead of the chat format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+"""Step 2: Define the document helpers"""
+def split_document(text: str, chunk_size: int = 1000, chunk_overlap: int = 100) -> list[str]:
+    """
+    Splits extracted document text into chunks.
+    """
+    if not text or not text.strip():
+        return []
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+        is_separator_regex=False,
+    )
+    return text_splitter.split_text(text)
+
+
+def rank_chunks_by_overlap(chunks: list[str], query: str) -> list[str]:
+    """
+    Orders chunks by how many of the query's words they contain, keeping the
+    document order for ties (and for everything when the query is empty).
+    """
+    query_terms = set(re.findall(r"\w+", (query or "").lower()))
+    if not query_terms:
+        return list(chunks)
+
+    def score(indexed_chunk):
+        index, chunk = indexed_chunk
+        chunk_terms = set(re.findall(r"\w+", chunk.lower()))
+        return (-len(query_terms & chunk_terms), index)
+
+    return [chunk for _, chunk in sorted(enumerate(chunks), key=score)]
+
+
+def count_message_tokens(messages: list[BaseMessage]) -> int:
+    return sum(count_tokens(str(message.content)) + MESSAGE_OVERHEAD_TOKENS for message in messages)
+
+
+"""Step 3: Define the PromptBudget class"""
+class PromptBudget:
+    """
+    Allocates the prompt token budget between sections.
+
+    The system message and the user input are kept as they are. Past summaries are
+    capped at their share. Chat history is trimmed first (oldest turns go first) but
+    keeps at least its share, and the document gets what is left, up to its share,
+    filled with its most relevant chunks.
+    """
+
+    def __init__(self, total_tokens: int = PROMPT_TOKEN_BUDGET, shares: dict = PROMPT_SECTION_SHARES, reserved_tokens: int = PROMPT_RESERVED_TOKENS):
+        self.total_tokens = total_tokens
+        self.shares = shares
+        self.reserved_tokens = reserved_tokens
+
+    def allowance(self, section: str) -> int:
+        return int(self.total_tokens * self.shares.get(section, 0))
+
+    def trim_history(self, chat_turns: list[BaseMessage], max_tokens: int) -> list[BaseMessage]:
+        if not chat_turns or max_tokens <= 0:
+            return []
+        return trim_messages(
+            chat_turns,
+            max_tokens=max_tokens,
+            strategy="last",
+            token_counter=count_message_tokens,
+            start_on="human",
+            allow_partial=False,
+        )
+
+    def select_chunks(self, ranked_chunks: list[str], max_tokens: int) -> list[str]:
+        selected = []
+        used_tokens = 0
+        for chunk in ranked_chunks:
+            tokens = count_tokens(chunk)
+            if used_tokens + tokens > max_tokens:
+                continue
+            selected.append(chunk)
+            used_tokens += tokens
+        return selected
+
+    def fit(self, fixed_text: str, input_text: str, past_summaries: str = "", chat_turns: list[BaseMessage] = None, ranked_chunks: list[str] = None) -> tuple[dict, dict]:
+        """
+        Fits the variable sections into what the fixed sections leave of the budget.
+
+        Args:
+            fixed_text (str): The system instructions, which are never trimmed.
+            input_text (str): The user's message, which is never trimmed.
+            past_summaries (str): The digest of past conversations.
+            chat_turns (list[BaseMessage]): The conversation history, oldest first.
+            ranked_chunks (list[str]): Document chunks, most relevant first.
+
+        Returns:
+            tuple: (sections, usage) where sections holds the trimmed 'past_summaries',
+            'chat_turns' and 'document_chunks', and usage the tokens used per section.
+        """
+        chat_turns = chat_turns or []
+        ranked_chunks = ranked_chunks or []
+
+        usage = {
+            "system": count_tokens(fixed_text),
+            "input": count_tokens(input_text),
+        }
+        available = max(0, self.total_tokens - self.reserved_tokens - usage["system"] - usage["input"])
+
+        past_summaries = truncate_to_tokens(past_summaries or "", min(self.allowance("past_summaries"), available))
+        usage["past_summaries"] = count_tokens(past_summaries)
+        available -= usage["past_summaries"]
+
+        # History gives way to the document, but never below its own share
+        document_wanted = min(sum(count_tokens(chunk) for chunk in ranked_chunks), self.allowance("document"))
+        history_limit = min(available, max(self.allowance("history"), available - document_wanted))
+        trimmed_turns = self.trim_history(chat_turns, history_limit)
+        usage["history"] = count_message_tokens(trimmed_turns)
+        available -= usage["history"]
+
+        document_chunks = self.select_chunks(ranked_chunks, min(available, self.allowance("document")))
+        usage["document"] = sum(count_tokens(chunk) for chunk in document_chunks)
+        usage["total"] = sum(usage.values())
+
+        if len(trimmed_turns) < len(chat_turns) or len(document_chunks) < len(ranked_chunks):
+            logging.info(
+                f"Prompt trimmed to budget: kept {len(trimmed_turns)}/{len(chat_turns)} history messages "
+                f"and {len(document_chunks)}/{len(ranked_chunks)} document chunks."
+            )
+
+        sections = {
+            "past_summaries": past_summaries,
+            "chat_turns": trimmed_turns,
+            "document_chunks": document_chunks,
+        }
+        return sections, usage
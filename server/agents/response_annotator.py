@@ -0,0 +1,109 @@
+"""
+This module annotates an AI response with a meme topic, a facial expression and an
+animation in a single structured LLM call, instead of one call for the meme topic and
+another one for the avatar.
+"""
+
+"""Step 1: Import necessary modules"""
+# -- Standard libraries --
+import os
+import logging
+from typing import Optional
+# -- 3rd Party libraries --
+from pydantic import BaseModel, Field
+# -- Custom modules --
+from utils.consts import FACIAL_EXPRESSIONS, ANIMATIONS, WELCOME_MEME_TOPICS
+
+
+"""Step 2: Define the annotation schema"""
+class ResponseAnnotation(BaseModel):
+    meme_topic: Optional[str] = Field(None, description="A short meme/GIF search topic that fits the response.")
+    facial_expression: Optional[str] = Field(None, description=f"One of: {', '.join(FACIAL_EXPRESSIONS)}.")
+    animation: Optional[str] = Field(None, description=f"One of: {', '.join(ANIMATIONS)}.")
+
+
+DEFAULT_ANNOTATION = {
+    "meme_topic": "funny",
+    "facial_expression": "default",
+    "animation": "Idle",
+}
+
+
+"""Step 3: Define the annotator functions"""
+def is_merged_annotation_enabled() -> bool:
+    """
+    Returns whether the merged annotator is used. Set RESPONSE_ANNOTATOR_MODE=split to
+    go back to the separate meme topic and facial expression calls for comparison.
+    """
+    return os.getenv("RESPONSE_ANNOTATOR_MODE", "merged").lower() != "split"
+
+
+def validate_annotation(annotation: dict, is_initial: bool = False) -> dict:
+    """
+    Validates each field of an annotation on its own and falls back per field.
+    """
+    annotation = annotation or {}
+
+    meme_topic = (annotation.get("meme_topic") or "").strip().lower()
+    if is_initial and meme_topic not in WELCOME_MEME_TOPICS:
+        logging.warning(f"Invalid welcome meme topic: {meme_topic!r}. Defaulting to 'welcome'.")
+        meme_topic = "welcome"
+    elif not meme_topic:
+        meme_topic = DEFAULT_ANNOTATION["meme_topic"]
+
+    facial_expression = annotation.get("facial_expression")
+    if facial_expression not in FACIAL_EXPRESSIONS:
+        logging.warning(f"Invalid facial expression: {facial_expression}. Defaulting to 'default'.")
+        facial_expression = DEFAULT_ANNOTATION["facial_expression"]
+
+    animation = annotation.get("animation")
+    if animation not in ANIMATIONS:
+        logging.warning(f"Invalid animation: {animation}. Defaulting to 'Idle'.")
+        animation = DEFAULT_ANNOTATION["animation"]
+
+    return {
+        "meme_topic": meme_topic,
+        "facial_expression": facial_expression,
+        "animation": animation,
+    }
+
+
+def annotate_response(llm, ai_response: str, is_initial: bool = False) -> dict:
+    """
+    Determines the meme topic, facial expression and animation for an AI response.
+
+    Args:
+        llm: The chat model used for the structured output call.
+        ai_response (str): The AI's textual response.
+        is_initial (bool): Flag indicating if it's the initial interaction.
+
+    Returns:
+        dict: A dictionary with keys 'meme_topic', 'facial_expression' and 'animation'.
+    """
+    if is_initial:
+        meme_instructions = f"Pick the most appropriate welcoming meme topic from: {', '.join(WELCOME_MEME_TOPICS)}."
+    else:
+        meme_instructions = "Pick the most appropriate meme topic for the response (a few words)."
+
+    prompt = f"""
+Annotate the AI response below for the avatar that presents it.
+
+- meme_topic: {meme_instructions}
+- facial_expression: choose from {', '.join(FACIAL_EXPRESSIONS)}.
+- animation: choose from {', '.join(ANIMATIONS)}.
+
+If the sentiment or tone is unclear, use "default" and "Idle".
+
+AI Response:
+"{ai_response}"
+"""
+
+    try:
+        annotation = llm.with_structured_output(ResponseAnnotation).invoke(prompt)
+        if isinstance(annotation, BaseModel):
+            annotation = annotation.model_dump()
+    except Exception as e:
+        logging.error(f"AI-based response annotation failed: {e}")
+        annotation = {}
+
+    return validate_annotation(annotation, is_initial=is_initial)
@@ -0,0 +1,198 @@
+"""
+This module contains an opt-in semantic cache of agent answers. A question close enough
+(by embedding similarity) to one answered before for the same role and language reuses
+that answer instead of running the agent; the answer still goes through enrichment.
+
+Only standalone questions are cached: no uploaded file in the chat, no greeting or extra
+instructions, and short prompts that do not refer back to the conversation. Such turns
+are answered from the message alone, without the chat history or the digest of past
+conversations, so the answer can be shared; it is not stored if it used a personalized
+tool (e.g. the user's profile).
+"""
+
+"""Step 1: Import necessary modules"""
+# -- Standard libraries --
+import os
+import re
+import time
+import logging
+import threading
+from datetime import timezone
+# -- 3rd Party libraries --
+import numpy as np
+from langchain_core.callbacks import BaseCallbackHandler
+# -- Custom modules --
+from services.db.semantic_cache import find_semantic_cache_entries, insert_semantic_cache_entry
+from utils.consts import (
+    SEMANTIC_CACHE_SIMILARITY_THRESHOLD,
+    SEMANTIC_CACHE_TTL_SECONDS,
+    SEMANTIC_CACHE_REFRESH_SECONDS,
+    SEMANTIC_CACHE_MAX_ENTRIES,
+    SEMANTIC_CACHE_MAX_PROMPT_CHARS,
+    SEMANTIC_CACHE_MIN_PROMPT_WORDS,
+    SEMANTIC_CACHE_CONTEXT_WORDS,
+    PERSONALIZED_TOOL_NAMES,
+)
+
+
+"""Step 2: Define the tool usage recorder"""
+class ToolUsageRecorder(BaseCallbackHandler):
+    """
+    Records the names of the tools the agent called during a turn.
+    """
+
+    def __init__(self):
+        self.tool_names = set()
+
+    def on_tool_start(self, serialized: dict, input_str: str, **kwargs) -> None:
+        name = (serialized or {}).get("name") or kwargs.get("name")
+        if name:
+            self.tool_names.add(name)
+
+    def used_personalized_tool(self) -> bool:
+        return bool(self.tool_names & set(PERSONALIZED_TOOL_NAMES))
+
+
+"""Step 3: Define the SemanticResponseCache class"""
+class SemanticResponseCache:
+    """
+    Cached answers per (role, language), held in memory as a matrix of normalized
+    embeddings and refreshed from MongoDB every SEMANTIC_CACHE_REFRESH_SECONDS so the
+    answers cached by other workers are picked up.
+    """
+    _groups: dict = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def is_enabled() -> bool:
+        """
+        Returns whether the cache is used. It is off unless SEMANTIC_CACHE_ENABLED=true.
+        """
+        return os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+
+    @staticmethod
+    def is_standalone_question(message: str, language: str) -> bool:
+        """
+        Returns whether a message can be answered without the conversation before it:
+        it has a few words, none of which refers back to the conversation.
+        """
+        context_words = SEMANTIC_CACHE_CONTEXT_WORDS.get(language)
+        if context_words is None:
+            return False
+        words = re.findall(r"\w+", message.lower())
+        return len(words) >= SEMANTIC_CACHE_MIN_PROMPT_WORDS and not set(words) & set(context_words)
+
+    @classmethod
+    def is_cacheable_turn(cls, message: str, language: str, file_content: bytes = None, turn_id: int = None, extra_system_message: str = None, has_documents: bool = False) -> bool:
+        """
+        Returns whether a turn can be answered from the message, the role and the
+        language alone, so its answer can be shared between users.
+        """
+        return (
+            cls.is_enabled()
+            and bool(message and message.strip())
+            and len(message) <= SEMANTIC_CACHE_MAX_PROMPT_CHARS
+            and not file_content
+            and not has_documents
+            and turn_id != 0
+            and not extra_system_message
+            and cls.is_standalone_question(message, language)
+        )
+
+    @staticmethod
+    def normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    @staticmethod
+    def to_timestamp(created_at) -> float:
+        # MongoDB returns naive UTC datetimes
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        return created_at.timestamp()
+
+    @classmethod
+    def get_group(cls, role: str, language: str) -> dict:
+        key = (role, language)
+        with cls._lock:
+            group = cls._groups.get(key)
+            if group is not None and time.time() - group["loaded_at"] < SEMANTIC_CACHE_REFRESH_SECONDS:
+                return group
+
+        entries = find_semantic_cache_entries(role, language)
+        group = {
+            "loaded_at": time.time(),
+            "vectors": np.array([cls.normalize(entry["embedding"]) for entry in entries], dtype=np.float32),
+            "responses": [entry["response"] for entry in entries],
+            "created_at": [cls.to_timestamp(entry["created_at"]) for entry in entries],
+        }
+        with cls._lock:
+            cls._groups[key] = group
+        return group
+
+    @classmethod
+    def lookup(cls, role: str, language: str, embedding) -> str | None:
+        """
+        Returns the cached answer most similar to the question, if it is similar enough
+        and has not expired.
+        """
+        group = cls.get_group(role, language)
+        if not group["responses"]:
+            return None
+
+        scores = group["vectors"] @ cls.normalize(embedding)
+        best = int(np.argmax(scores))
+        expired = time.time() - group["created_at"][best] > SEMANTIC_CACHE_TTL_SECONDS
+        if scores[best] < SEMANTIC_CACHE_SIMILARITY_THRESHOLD or expired:
+            return None
+
+        logging.info(f"Semantic cache hit for role {role!r} ({language}) with similarity {scores[best]:.3f}.")
+        return group["responses"][best]
+
+    @classmethod
+    def store(cls, role: str, language: str, prompt: str, embedding, response: str) -> None:
+        created_at = insert_semantic_cache_entry(role, language, prompt, embedding, response)
+
+        # Make the answer available to this worker right away
+        with cls._lock:
+            group = cls._groups.get((role, language))
+            if group is None:
+                return
+            vector = cls.normalize(embedding).reshape(1, -1)
+            group["vectors"] = vector if not group["responses"] else np.vstack([vector, group["vectors"]])[:SEMANTIC_CACHE_MAX_ENTRIES]
+            group["responses"] = ([response] + group["responses"])[:SEMANTIC_CACHE_MAX_ENTRIES]
+            group["created_at"] = ([cls.to_timestamp(created_at)] + group["created_at"])[:SEMANTIC_CACHE_MAX_ENTRIES]
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._groups.clear()
+
+
+"""Step 4: Define the CachedTurn class"""
+class CachedTurn:
+    """
+    The semantic cache side of a conversation turn: the answer is looked up before the
+    agent runs, and stored after it unless the agent used a personalized tool. The
+    agent answers a cacheable turn without the chat history (see
+    MemeMingleAIAgent.prepare_turn).
+    """
+
+    def __init__(self, role: str, language: str, message: str, embedding_model, cacheable: bool):
+        self.role = role
+        self.language = language
+        self.message = message
+        self.cacheable = cacheable
+        self.embedding = embedding_model.embed_query(message) if cacheable else None
+        # Passed as a callback to the agent run
+        self.tool_usage = ToolUsageRecorder()
+
+    def lookup(self) -> str | None:
+        if not self.cacheable:
+            return None
+        return SemanticResponseCache.lookup(self.role, self.language, self.embedding)
+
+    def store(self, response: str) -> None:
+        if self.cacheable and not self.tool_usage.used_personalized_tool():
+            SemanticResponseCache.store(self.role, self.language, self.message, self.embedding, response)
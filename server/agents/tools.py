@@ -6,7 +6,10 @@ from services.db.user import get_user_profile_by_user_id
 from services.db.user_journey import get_user_journey_by_user_id
 from langchain.tools import Tool
 from utils.agents import fetch_meme,get_job_listings,get_bing_search_results,get_gutendex_domain_textbooks, get_public_domain_textbooks, generate_suggestions, generate_document
+from utils.agents import afetch_meme, aget_job_listings, aget_gutendex_domain_textbooks, aget_public_domain_textbooks
 from langchain_google_community import GooglePlacesTool
+from utils.tool_cache import cached_tool
+from utils.consts import TOOL_CACHE_TTL_SECONDS
 from .tool_schemas import (
     GenerateDocumentInput,
     UserProfileRetrievalInput,
@@ -20,7 +23,16 @@ from .tool_schemas import (
 
 
 
-"""Step 2: Define the toolbox"""
+"""Step 2: Define the cached external API tools"""
+# Async versions (used by MemeMingleAIAgent.arun) share the cache of their tool
+cached_fetch_meme = cached_tool(ttl=TOOL_CACHE_TTL_SECONDS["fetch_meme"])(fetch_meme, coroutine=afetch_meme)
+cached_bing_search = cached_tool(ttl=TOOL_CACHE_TTL_SECONDS["web_search_bing"])(get_bing_search_results)
+cached_textbook_search = cached_tool(ttl=TOOL_CACHE_TTL_SECONDS["textbook_search"])(get_public_domain_textbooks, coroutine=aget_public_domain_textbooks)
+cached_gutendex_search = cached_tool(ttl=TOOL_CACHE_TTL_SECONDS["gutendex_textbook_search"])(get_gutendex_domain_textbooks, coroutine=aget_gutendex_domain_textbooks)
+cached_job_search = cached_tool(ttl=TOOL_CACHE_TTL_SECONDS["job_search"])(get_job_listings, coroutine=aget_job_listings)
+
+
+"""Step 3: Define the toolbox"""
 toolbox = {
     "community": {
         "web_search_tavily": TavilySearchResults(),
@@ -28,7 +40,8 @@ toolbox = {
     },
     "custom": {
         "fetch_meme": {
-            "func": fetch_meme,
+            "func": cached_fetch_meme,
+            "coroutine": cached_fetch_meme.coroutine,
             "description": "Fetches a popular meme related to a given topic using Giphy API.",
             "structured": True,
             "args_schema": FetchMemeInput,
@@ -40,7 +53,7 @@ toolbox = {
             "args_schema": AgentFactsInput,
         },
         "web_search_bing": {
-            "func": get_bing_search_results,
+            "func": cached_bing_search,
             "description": "Uses Bng Search to fetch search results for a given query.",
             "retriever": False,
             "structured": True,
@@ -61,13 +74,15 @@ toolbox = {
         },
         
         "textbook_search": {
-            "func": get_public_domain_textbooks,
+            "func": cached_textbook_search,
+            "coroutine": cached_textbook_search.coroutine,
              "description": "Searches for textbooks in public domain or open-access libraries based on the user's query. Provides direct PDF links if available.",
             "structured": True,
             "args_schema": TextbookSearchInput
         },
          "gutendex_textbook_search": {
-            "func": get_gutendex_domain_textbooks,
+            "func": cached_gutendex_search,
+            "coroutine": cached_gutendex_search.coroutine,
             "description": "Searches OpenStax for open-access textbooks based on the user's query. Provides direct PDF download links.",
             "structured": True,
             "args_schema": TextbookSearchInput
@@ -79,7 +94,8 @@ toolbox = {
             "args_schema": GenerateDocumentInput
         },
          "job_search": {
-            "func": get_job_listings,
+            "func": cached_job_search,
+            "coroutine": cached_job_search.coroutine,
             "description": "Fetches current job listings that match the user's skills and optional location.",
             "structured": True,
             "args_schema": JobSearchInput,
@@ -11,9 +11,12 @@ from flask_cors import CORS
 from config.config import Config
 from flask_jwt_extended import JWTManager
 from routes import register_blueprints
-from services.db.agent_facts import load_agent_facts_to_db
+from index_vector_stores import index_vector_stores
 from flask_apscheduler import APScheduler
 from utils.delete_generated_doc import delete_old_files_job
+from agents.agent_pool import AgentPool
+from agents.finalization_worker import FinalizationWorkerPool
+from utils.consts import MENTOR_TOOL_NAMES
 import logging  
 
 """ Load environment variables """
@@ -59,6 +62,15 @@ def run_app():
     # Register routes
     register_blueprints(app)
 
+    # Optionally build the default pooled agent before the first request
+    if os.getenv("AGENT_POOL_WARMUP", "false").lower() == "true":
+        AgentPool.warm_up(["MemeMingle"], MENTOR_TOOL_NAMES)
+
+    # Start the background workers that finalize chat sessions, if no other process of
+    # the host runs them
+    if FinalizationWorkerPool.is_enabled():
+        FinalizationWorkerPool.start()
+
     # Base endpoint
     @app.get("/")
     def root():
@@ -93,5 +105,5 @@ if __name__ == '__main__':
     HOST = os.getenv("FLASK_RUN_HOST") or "0.0.0.0"
     PORT = os.getenv("FLASK_RUN_PORT") or 8000
     # DB pre-load
-    load_agent_facts_to_db()
+    index_vector_stores()
     app.run(debug=True, host=HOST, port=PORT)
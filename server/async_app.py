@@ -0,0 +1,102 @@
+"""
+This module is the entry point of the async server. It serves the main conversation route
+with MemeMingleAIAgent.arun, so a single worker process holds many concurrent
+conversations instead of one per gunicorn sync worker. The other routes stay on the
+Flask app (app.py); route /ai_mentor/<user_id>/<chat_id> to this server in the proxy.
+
+Run it with:
+    gunicorn async_app:app -b 0.0.0.0:8001 --worker-class aiohttp.GunicornWebWorker
+"""
+
+""" Step 1: Import required libraries """
+import os
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from aiohttp import web
+from dotenv import load_dotenv
+from routes.AI import get_chat_agent, validate_uploaded_file, MAX_FILE_SIZE
+from services.http_client import AsyncHttpClient
+
+""" Load environment variables """
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+""" Step 2: Define the handlers """
+async def root(request: web.Request) -> web.Response:
+    """
+    Health probe endpoint.
+    """
+    return web.json_response({"status": "ready"})
+
+
+async def run_mental_health_agent(request: web.Request) -> web.Response:
+    """
+    Same input and output as the main conversation route of the Flask app.
+    """
+    user_id = request.match_info["user_id"]
+    chat_id = request.match_info["chat_id"]
+
+    body = await request.post()
+    if not body:
+        return web.json_response({"error": "No data provided"}, status=400)
+
+    prompt = body.get("prompt")
+    turn_id = int(body.get("turn_id", 0))
+
+    # Check for file in the request
+    file_content = None
+    file_mime_type = None
+    uploaded_file = body.get("file")
+    if isinstance(uploaded_file, web.FileField):
+        file_content = uploaded_file.file.read()
+        file_mime_type, error_message = validate_uploaded_file(file_content)
+        if error_message:
+            return web.json_response({"error": error_message}, status=400)
+
+    try:
+        agent = await asyncio.to_thread(get_chat_agent, user_id, chat_id)
+        response = await agent.arun(
+            message=prompt,
+            file_content=file_content,
+            file_mime_type=file_mime_type,
+            user_id=user_id,
+            chat_id=int(chat_id),
+            turn_id=turn_id + 1,
+        )
+        return web.json_response(response)
+    except Exception as e:
+        logger.error(f"Unexpected error: {str(e)}")
+        return web.json_response({"error": str(e)}, status=500)
+
+
+""" Step 3: Define the application """
+async def on_startup(app: web.Application) -> None:
+    # Blocking work (MongoDB, embeddings, enrichment) runs in the default executor;
+    # size it for the number of conversations a worker should hold at once
+    threads = int(os.getenv("ASYNC_APP_THREADS", "64"))
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=threads, thread_name_prefix="async-app"))
+
+
+async def on_cleanup(app: web.Application) -> None:
+    await AsyncHttpClient.close()
+
+
+def create_app() -> web.Application:
+    app = web.Application(client_max_size=MAX_FILE_SIZE + 1024 * 1024)
+    app.router.add_get("/", root)
+    app.router.add_post("/ai_mentor/{user_id}/{chat_id}", run_mental_health_agent)
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+
+app = create_app()
+
+""" Step 4: Start the server """
+if __name__ == '__main__':
+    HOST = os.getenv("FLASK_RUN_HOST") or "0.0.0.0"
+    PORT = int(os.getenv("ASYNC_APP_PORT") or 8001)
+    web.run_app(app, host=HOST, port=PORT)
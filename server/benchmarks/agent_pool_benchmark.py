@@ -0,0 +1,97 @@
+"""
+Compares requests/sec of the ai_mentor conversation route under gunicorn with and
+without the agent pool (AGENT_POOL_ENABLED=true/false).
+
+The server needs the usual .env configuration (Azure OpenAI, MongoDB, ...) and an
+existing chat for the given user, e.g. one created through /ai_mentor/welcome/<user_id>.
+
+Usage (from the server directory):
+    python benchmarks/agent_pool_benchmark.py --user-id <user_id> --chat-id <chat_id>
+"""
+
+"""Step 1: Import necessary modules"""
+import os
+import sys
+import time
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+"""Step 2: Define the benchmark helpers"""
+def start_server(port: int, workers: int, pool_enabled: bool) -> subprocess.Popen:
+    env = dict(os.environ, AGENT_POOL_ENABLED="true" if pool_enabled else "false")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-b", f"127.0.0.1:{port}", "-w", str(workers), "--timeout", "300", "app:app"],
+        cwd=SERVER_DIR,
+        env=env,
+    )
+
+    # Wait for the health probe to answer
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/", timeout=1).ok:
+                return process
+        except requests.exceptions.RequestException:
+            time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError("Server did not start in time.")
+
+
+def run_load(base_url: str, user_id: str, chat_id: str, total_requests: int, concurrency: int) -> dict:
+    url = f"{base_url}/ai_mentor/{user_id}/{chat_id}"
+
+    def send(i):
+        start = time.perf_counter()
+        response = requests.post(url, data={"prompt": "Give me one quick study tip.", "turn_id": i}, timeout=300)
+        return response.status_code, time.perf_counter() - start
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(send, range(total_requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for _, latency in results)
+    return {
+        "ok": sum(1 for status, _ in results if status == 200),
+        "requests_per_sec": total_requests / elapsed,
+        "p50_latency": latencies[len(latencies) // 2],
+        "p95_latency": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+    }
+
+
+"""Step 3: Run the benchmark"""
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-id", required=True)
+    parser.add_argument("--chat-id", required=True)
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    for pool_enabled in (False, True):
+        process = start_server(args.port, args.workers, pool_enabled)
+        try:
+            # One request per worker so the pooled run is measured warm
+            run_load(f"http://127.0.0.1:{args.port}", args.user_id, args.chat_id, args.workers, args.workers)
+            stats = run_load(f"http://127.0.0.1:{args.port}", args.user_id, args.chat_id, args.requests, args.concurrency)
+        finally:
+            process.terminate()
+            process.wait()
+
+        label = "with pool" if pool_enabled else "without pool"
+        print(
+            f"{label:>13}: {stats['requests_per_sec']:.2f} req/s, "
+            f"p50 {stats['p50_latency']:.2f}s, p95 {stats['p95_latency']:.2f}s, "
+            f"{stats['ok']}/{args.requests} OK"
+        )
+
+
+if __name__ == '__main__':
+    main()
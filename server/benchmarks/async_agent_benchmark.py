@@ -0,0 +1,97 @@
+"""
+Compares how the main conversation route scales with concurrency when served by the
+gunicorn sync workers (app.py) and by a single async worker (async_app.py).
+
+The server needs the usual .env configuration (Azure OpenAI, MongoDB, ...) and an
+existing chat for the given user, e.g. one created through /ai_mentor/welcome/<user_id>.
+
+Usage (from the server directory):
+    python benchmarks/async_agent_benchmark.py --user-id <user_id> --chat-id <chat_id> --concurrency 1 4 16 32
+"""
+
+"""Step 1: Import necessary modules"""
+import os
+import sys
+import time
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+"""Step 2: Define the benchmark helpers"""
+def start_server(port: int, mode: str, workers: int) -> subprocess.Popen:
+    command = [sys.executable, "-m", "gunicorn", "-b", f"127.0.0.1:{port}", "--timeout", "300"]
+    if mode == "async":
+        command += ["-w", "1", "--worker-class", "aiohttp.GunicornWebWorker", "async_app:app"]
+    else:
+        command += ["-w", str(workers), "app:app"]
+    process = subprocess.Popen(command, cwd=SERVER_DIR, env=dict(os.environ, FINALIZATION_WORKERS="0"))
+
+    # Wait for the health probe to answer
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/", timeout=1).ok:
+                return process
+        except requests.exceptions.RequestException:
+            time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError("Server did not start in time.")
+
+
+def run_load(base_url: str, user_id: str, chat_id: str, total_requests: int, concurrency: int) -> dict:
+    url = f"{base_url}/ai_mentor/{user_id}/{chat_id}"
+
+    def send(i):
+        start = time.perf_counter()
+        response = requests.post(url, data={"prompt": "Give me one quick study tip.", "turn_id": i}, timeout=300)
+        return response.status_code, time.perf_counter() - start
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(send, range(total_requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for _, latency in results)
+    return {
+        "ok": sum(1 for status, _ in results if status == 200),
+        "requests_per_sec": total_requests / elapsed,
+        "p50_latency": latencies[len(latencies) // 2],
+        "p95_latency": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+    }
+
+
+"""Step 3: Run the benchmark"""
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-id", required=True)
+    parser.add_argument("--chat-id", required=True)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 32])
+    parser.add_argument("--requests-per-client", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=4, help="sync workers; the async server uses one")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    for mode in ("sync", "async"):
+        process = start_server(args.port, mode, args.workers)
+        try:
+            # Warm up the pooled agents before measuring
+            run_load(f"http://127.0.0.1:{args.port}", args.user_id, args.chat_id, args.workers, args.workers)
+            for concurrency in args.concurrency:
+                total_requests = concurrency * args.requests_per_client
+                stats = run_load(f"http://127.0.0.1:{args.port}", args.user_id, args.chat_id, total_requests, concurrency)
+                print(
+                    f"{mode:>5} x{concurrency:<3}: {stats['requests_per_sec']:.2f} req/s, "
+                    f"p50 {stats['p50_latency']:.2f}s, p95 {stats['p95_latency']:.2f}s, "
+                    f"{stats['ok']}/{total_requests} OK"
+                )
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+Compares the chat history used by the agent before and after it moved to the shared
+MongoDB connection pool: connections opened and per-turn latency (read the session's
+history, then append a human/AI message pair, as RunnableWithMessageHistory does).
+
+Needs DB_CONNECTION_STRING in the environment or .env. The benchmark writes to its
+own sessions in the chat_turns collection and deletes them afterwards.
+
+Usage (from the server directory):
+    python benchmarks/chat_history_benchmark.py --sessions 10 --turns 20
+"""
+
+"""Step 1: Import necessary modules"""
+import os
+import sys
+import time
+import uuid
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pymongo import monitoring
+from langchain_core.messages import HumanMessage, AIMessage
+from langchain_mongodb.chat_message_histories import MongoDBChatMessageHistory
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.azure_mongodb import MongoDBClient
+from services.db.chat_history import PooledMongoDBChatMessageHistory, get_chat_turns_collection
+
+
+"""Step 2: Define the benchmark helpers"""
+class ConnectionCounter(monitoring.ConnectionPoolListener):
+    """Counts the connection pools and connections opened by every MongoClient."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pools = 0
+        self.connections = 0
+
+    def reset(self):
+        with self.lock:
+            self.pools = 0
+            self.connections = 0
+
+    def pool_created(self, event):
+        with self.lock:
+            self.pools += 1
+
+    def connection_created(self, event):
+        with self.lock:
+            self.connections += 1
+
+    # The remaining pool events are not needed
+    def pool_ready(self, event): pass
+    def pool_cleared(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_ready(self, event): pass
+    def connection_closed(self, event): pass
+    def connection_check_out_started(self, event): pass
+    def connection_check_out_failed(self, event): pass
+    def connection_checked_out(self, event): pass
+    def connection_checked_in(self, event): pass
+
+
+def langchain_history(session_id):
+    return MongoDBChatMessageHistory(
+        MongoDBClient.get_mongodb_variables(),
+        session_id,
+        MongoDBClient.get_db_name(),
+        collection_name="chat_turns"
+    )
+
+
+def pooled_history(session_id):
+    return PooledMongoDBChatMessageHistory(session_id)
+
+
+def run_turns(make_history, sessions: int, turns: int) -> list[float]:
+    session_ids = [f"benchmark-{uuid.uuid4()}" for _ in range(sessions)]
+
+    def run_session(session_id):
+        latencies = []
+        for turn in range(turns):
+            start = time.perf_counter()
+            history = make_history(session_id)
+            history.messages
+            history.add_messages([HumanMessage(content=f"question {turn}"), AIMessage(content=f"answer {turn}")])
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    try:
+        with ThreadPoolExecutor(max_workers=sessions) as executor:
+            return [latency for latencies in executor.map(run_session, session_ids) for latency in latencies]
+    finally:
+        get_chat_turns_collection().delete_many({"SessionId": {"$in": session_ids}})
+
+
+"""Step 3: Run the benchmark"""
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=10, help="Concurrent chat sessions")
+    parser.add_argument("--turns", type=int, default=20, help="Turns per session")
+    args = parser.parse_args()
+
+    counter = ConnectionCounter()
+    # Listeners registered globally apply to every client created afterwards
+    monitoring.register(counter)
+    # Open the shared pool up front, as a running server would have
+    get_chat_turns_collection()
+
+    for label, make_history in (("per-call client", langchain_history), ("shared pool", pooled_history)):
+        counter.reset()
+        latencies = sorted(run_turns(make_history, args.sessions, args.turns))
+        print(
+            f"{label:>15}: {counter.pools} pools, {counter.connections} connections opened, "
+            f"p50 {latencies[len(latencies) // 2] * 1000:.1f}ms, "
+            f"p95 {latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000:.1f}ms per turn"
+        )
+
+
+if __name__ == '__main__':
+    main()
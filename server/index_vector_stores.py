@@ -0,0 +1,32 @@
+"""
+Builds the vector stores of the retriever tools ahead of time, so agents never embed
+documents while serving a request. Only new or changed documents are embedded.
+
+Usage (from the server directory):
+    python index_vector_stores.py
+"""
+
+from dotenv import load_dotenv
+from services.db.agent_facts import load_agent_facts_to_db
+from services.db.vector_index import build_vector_store
+from services.local_vector_search import export_local_vector_index
+from services.azure_open_ai import get_azure_openai_embeddings
+from agents.tools import toolbox
+
+load_dotenv()
+
+
+def index_vector_stores():
+    load_agent_facts_to_db()
+    embeddings_model = get_azure_openai_embeddings()
+
+    for collection_name, tool_dict in toolbox.get("custom", {}).items():
+        if tool_dict.get("retriever", False):
+            stats = build_vector_store(collection_name, embeddings_model)
+            print(f"{collection_name}: {stats['embedded']} embedded, {stats['removed']} removed, {stats['unchanged']} unchanged.")
+            # Refresh the copy used by RETRIEVER_BACKEND=local
+            export_local_vector_index(collection_name)
+
+
+if __name__ == "__main__":
+    index_vector_stores()
@@ -2,15 +2,19 @@
 
 """Step 1: Import necessary modules"""
 import logging
-from flask import jsonify, Blueprint, request, send_file, send_from_directory
+from flask import jsonify, Blueprint, request, send_file, send_from_directory, Response
 import json
 from services.speech_service import speech_to_text
-from agents.meme_mingle_agent import MemeMingleAIAgent
+from agents.agent_pool import AgentPool
+from agents.finalization_worker import FinalizationWorkerPool
+from services.db.finalization_jobs import enqueue_finalization_job, get_finalization_job
 from services.azure_mongodb import MongoDBClient
 import io
 from services.text_to_speech_service import text_to_speech
 import filetype
 from services.azure_form_recognizer import ALLOWED_MIME_TYPES
+from utils.consts import MENTOR_TOOL_NAMES
+from utils.sse import format_sse
 import os
 
 """Step 2: Create a Blueprint object"""
@@ -20,6 +24,8 @@ logger = logging.getLogger(__name__)
 
 ai_routes = Blueprint("ai", __name__)
 
+MAX_FILE_SIZE = 10 * 1024 * 1024  # 10 MB
+
 
 
 """Step 3: Define the routes"""
@@ -33,21 +39,9 @@ def get_mental_health_agent_welcome(user_id):
     
     desired_role = body.get("role", "MemeMingle")  # Default to 'educational mentor' if not specified
 
-    agent = MemeMingleAIAgent(
-        tool_names=[
-            "gutendex_textbook_search",
-            "generate_suggestions",
-            "web_search_tavily",
-            "location_search_gplaces",
-            "textbook_search",
-            "user_profile_retrieval",
-            "agent_facts",
-            "generate_document",
-            "job_search",
-            "web_search_bing",
-            "fetch_meme",
-        ],
-        desired_role=desired_role  # Pass the desired role to the agent
+    agent = AgentPool.get_agent(
+        desired_role=desired_role,  # Pass the desired role to the agent
+        tool_names=MENTOR_TOOL_NAMES,
     )
 
     response = agent.get_initial_greeting(user_id=user_id)
@@ -60,17 +54,34 @@ def get_mental_health_agent_welcome(user_id):
 
 
 
-# Define the route for the main conversation
-@ai_routes.post("/ai_mentor/<user_id>/<chat_id>")
-def run_mental_health_agent(user_id, chat_id):
-    body = request.form.to_dict()
-    if not body:
-        return jsonify({"error": "No data provided"}), 400
+# Define a helper to validate the file attached to a conversation turn
+def validate_uploaded_file(file_content: bytes) -> tuple:
+    """
+    Returns (file_mime_type, error_message) for the content of an uploaded file.
+    """
+    # Detect the file type using 'filetype'
+    kind = filetype.guess(file_content)
+    if kind is None:
+        return None, 'Cannot guess the file type'
 
-    prompt = body.get("prompt")
-    turn_id = int(body.get("turn_id", 0))
+    file_mime_type = kind.mime
 
-    # Check for file in the request
+    print(f"allowed mime types: {ALLOWED_MIME_TYPES}")
+    if file_mime_type not in ALLOWED_MIME_TYPES:
+        return None, f'Unsupported file type: {file_mime_type}'
+
+    # Implement file size check
+    if len(file_content) > MAX_FILE_SIZE:
+        return None, 'File size exceeds the maximum limit of 10 MB'
+
+    return file_mime_type, None
+
+
+# Define a helper to read and validate the file attached to a conversation turn
+def read_uploaded_file():
+    """
+    Returns (file_content, file_mime_type, error_response) for the request's 'file' part.
+    """
     uploaded_file = request.files.get('file')
 
     # Handle the uploaded file
@@ -80,23 +91,15 @@ def run_mental_health_agent(user_id, chat_id):
         # Read the file content
         file_content = uploaded_file.read()
 
-        # Detect the file type using 'filetype'
-        kind = filetype.guess(file_content)
-        if kind is None:
-            return jsonify({'error': 'Cannot guess the file type'}), 400
-
-        file_extension = kind.extension
-        file_mime_type = kind.mime
+        file_mime_type, error_message = validate_uploaded_file(file_content)
+        if error_message:
+            return None, None, (jsonify({'error': error_message}), 400)
 
-        print(f"allowed mime types: {ALLOWED_MIME_TYPES}")
-        if file_mime_type not in ALLOWED_MIME_TYPES:
-            return jsonify({'error': f'Unsupported file type: {file_mime_type}'}), 400
+    return file_content, file_mime_type, None
 
-        # Implement file size check
-        MAX_FILE_SIZE = 10 * 1024 * 1024  # 10 MB
-        if len(file_content) > MAX_FILE_SIZE:
-            return jsonify({'error': 'File size exceeds the maximum limit of 10 MB'}), 400
 
+# Define a helper to get the pooled agent for the role chosen when the chat started
+def get_chat_agent(user_id, chat_id):
     # Retrieve desired_role from the database
     db_client = MongoDBClient.get_client()
     db_name = MongoDBClient.get_db_name()
@@ -105,23 +108,29 @@ def run_mental_health_agent(user_id, chat_id):
     chat_summary = chat_summary_collection.find_one({"user_id": user_id, "chat_id": int(chat_id)})
     desired_role = chat_summary.get("desired_role", "educational mentor")
     print(f"Desired role: {desired_role}")
-    agent = MemeMingleAIAgent(
-        tool_names=[
-            "gutendex_textbook_search",
-            "generate_suggestions",
-            "web_search_tavily",
-            "location_search_gplaces",
-            "textbook_search",
-            "user_profile_retrieval",
-            "agent_facts",
-            "generate_document",
-            "job_search",
-            "web_search_bing",
-            "fetch_meme",
-        ],
-        desired_role=desired_role  
+    return AgentPool.get_agent(
+        desired_role=desired_role,
+        tool_names=MENTOR_TOOL_NAMES,
     )
 
+
+# Define the route for the main conversation
+@ai_routes.post("/ai_mentor/<user_id>/<chat_id>")
+def run_mental_health_agent(user_id, chat_id):
+    body = request.form.to_dict()
+    if not body:
+        return jsonify({"error": "No data provided"}), 400
+
+    prompt = body.get("prompt")
+    turn_id = int(body.get("turn_id", 0))
+
+    # Check for file in the request
+    file_content, file_mime_type, error_response = read_uploaded_file()
+    if error_response:
+        return error_response
+
+    agent = get_chat_agent(user_id, chat_id)
+
     try:
             
         response = agent.run(
@@ -144,12 +153,67 @@ def run_mental_health_agent(user_id, chat_id):
 
 
 
+# Define the streaming variant of the main conversation route
+@ai_routes.post("/ai_mentor/<user_id>/<chat_id>/stream")
+def stream_mental_health_agent(user_id, chat_id):
+    """
+    Same input as the main conversation route, but answers with server-sent events:
+    'token' events while the reply is generated, then 'message', 'meme_url',
+    'audio_url', 'expression', 'avatar_audio' and 'lip_sync_data' as each becomes
+    ready, and finally 'done' (or 'error').
+    """
+    body = request.form.to_dict()
+    if not body:
+        return jsonify({"error": "No data provided"}), 400
+
+    prompt = body.get("prompt")
+    turn_id = int(body.get("turn_id", 0))
+
+    file_content, file_mime_type, error_response = read_uploaded_file()
+    if error_response:
+        return error_response
+
+    agent = get_chat_agent(user_id, chat_id)
+
+    def generate():
+        try:
+            for event, data in agent.stream(
+                message=prompt,
+                file_content=file_content,
+                file_mime_type=file_mime_type,
+                user_id=user_id,
+                chat_id=int(chat_id),
+                turn_id=turn_id + 1,
+            ):
+                yield format_sse(event, data)
+        except Exception as e:
+            logger.error(f"Unexpected error while streaming: {str(e)}")
+            yield format_sse("error", {"error": str(e)})
+
+    return Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+
 # Define the route for finalizing the conversation
 @ai_routes.patch("/ai_mentor/finalize/<user_id>/<chat_id>")
 def set_mental_health_end_state(user_id, chat_id):
     try:
         logger.info(f"Finalizing chat {chat_id} for user {user_id}")
-        agent = MemeMingleAIAgent(tool_names=["gutendex_textbook_search","generate_suggestions","web_search_youtube","web_search_tavily","textbook_search","location_search_gplaces", "web_search_google", "user_profile_retrieval", "agent_facts"])
+
+        if FinalizationWorkerPool.is_enabled():
+            # Mood detection and summarization run in the background workers
+            job_id = enqueue_finalization_job(user_id, chat_id)
+            # Takes the workers over if the process running them exited
+            FinalizationWorkerPool.start()
+            FinalizationWorkerPool.notify()
+            return jsonify({"message": "Chat session finalization queued", "job_id": job_id}), 202
+
+        # Finalization only needs the LLM, so reuse the default pooled agent
+        agent = AgentPool.get_agent(tool_names=MENTOR_TOOL_NAMES)
 
         agent.perform_final_processes(user_id, chat_id)
 
@@ -160,6 +224,15 @@ def set_mental_health_end_state(user_id, chat_id):
     except Exception as e:
         logger.error(f"Error during finalizing chat: {e}", exc_info=True)
         return jsonify({"error": "Failed to finalize chat"}), 500
+
+
+# Define the route for checking the finalization of a conversation
+@ai_routes.get("/ai_mentor/finalize/<user_id>/<chat_id>")
+def get_mental_health_end_state(user_id, chat_id):
+    job = get_finalization_job(user_id, chat_id)
+    if job is None:
+        return jsonify({"error": "No finalization requested for this chat"}), 404
+    return jsonify(job), 200
     
 
 # Define the route for handling voice input
@@ -6,7 +6,7 @@ from models.user_response import UserResponse, Answer
 from models.feedback import Feedback
 from services.azure_mongodb import MongoDBClient
 from bson import ObjectId
-from utils.similar_answer import is_similar
+from utils.quiz_feedback import grade_answer, build_feedback_prompt, generate_feedbacks
 import datetime
 from services.azure_open_ai import get_azure_openai_llm
 from services.azure_form_recognizer import ALLOWED_MIME_TYPES
@@ -117,8 +117,6 @@ def submit_answers(quiz_id):
         if ans['question_id'] not in valid_question_ids:
             return jsonify({"error": f"Invalid question_id: {ans['question_id']}" }), 400
 
-    total_points = 0  # Initialize total points
-    feedback_list = []
     llm = get_azure_openai_llm()  # Initialize LLM for generating feedback
 
     # Fetch user's preferred language
@@ -129,6 +127,33 @@ def submit_answers(quiz_id):
     user_profile = json.loads(user_profile_json)
     preferred_language = user_profile.get('preferredLanguage', 'en')
     language_name = language_mapping.get(preferred_language, 'English')  # Default to English if code not found
+
+    # Grade the answers and generate the feedback before the transaction, so no locks
+    # are held during the LLM calls
+    questions_by_id = {q['question_id']: q for q in quiz['questions']}
+    graded_answers = []  # (answer, question, is_correct, points_awarded)
+    feedback_prompts = {}  # by answer index, as a question may be answered twice
+    for index, ans in enumerate(answers):
+        question = questions_by_id[ans['question_id']]
+        is_correct, points_awarded = grade_answer(question, ans.get('user_answer'))
+        graded_answers.append((ans, question, is_correct, points_awarded))
+        if not is_correct:
+            feedback_prompts[index] = build_feedback_prompt(question, ans['user_answer'], language_name)
+
+    # The wrong answers get their feedback from concurrent LLM calls
+    feedbacks = generate_feedbacks(llm, feedback_prompts)
+
+    feedback_list = [
+        Feedback(
+            question_id=ans['question_id'],
+            correct=is_correct,
+            correct_answer=question['correct_answer'],
+            user_answer=ans['user_answer'],
+            feedback="Correct answer! Well done." if is_correct else feedbacks[index]
+        )
+        for index, (ans, question, is_correct, _) in enumerate(graded_answers)
+    ]
+
     # Start a session for transaction
     with db_client.start_session() as session:
         try:
@@ -141,95 +166,10 @@ def submit_answers(quiz_id):
 
                 is_first_submission = existing_submission is None
 
-                # Process each answer
-                for ans in answers:
-                    question_id = ans.get('question_id')
-                    user_answer = ans.get('user_answer').strip().lower()
-
-                    # Find the corresponding question
-                    question = next((q for q in quiz['questions'] if q['question_id'] == question_id), None)
-                    if question:
-                        correct_answer = question.get('correct_answer', '').strip().lower()
-                        is_correct = False
-                        points_awarded = 0  # To track points per question
-
-                        if question.get('question_type') == 'MC':
-                            # For MCQs, exact match of the option
-                            if user_answer == correct_answer.lower():
-                                is_correct = True
-                                points_awarded = 10
-                            else:
-                                points_awarded = -5
-                        elif question.get('question_type') == 'SA':
-                            # New SA logic with similarity check
-                            # Handle numerical answers separately
-                            try:
-                                user_num = float(user_answer)
-                                correct_num = float(correct_answer)
-                                if user_num == correct_num:
-                                    is_correct = True
-                                    points_awarded = 10
-                                else:
-                                    is_correct = False
-                                    points_awarded = -5
-                            except ValueError:
-                                # Non-numeric answers: use similarity check
-                                if is_similar(user_answer, correct_answer):
-                                    is_correct = True
-                                    points_awarded = 10
-                                else:
-                                    is_correct = False
-                                    points_awarded = -5
-
-                        # Calculate total points based on first submission
-                        if is_first_submission:
-                            total_points += points_awarded
-                        else:
-                            # Do not modify total_points for subsequent submissions
-                            pass
-
-                        # Generate feedback
-                        if not is_correct:
-                            # Prepare prompt for feedback generation
-                            prompt = (
-                                f"You are an educational assistant helping users (5-15 years old) understand their mistakes in quizzes.\n\n"
-                                f"Question: {question['question']} ({language_name})\n"
-                                f"User's Answer: {ans['user_answer']} ({language_name})\n"
-                                f"Correct Answer: {question['correct_answer']} ({language_name})\n\n"
-                                f"Provide constructive and detailed feedback in {language_name} that explains why the user's answer is incorrect and how to arrive at the correct answer. "
-                                f"Ensure the feedback is clear, educational, and encourages the user to understand the concept better.\n\n"
-                                f"Feedback:"
-                            )
-
-                            try:
-                                feedback_response = llm(prompt)
-                                feedback_text = feedback_response.content.strip()
-                                logger.info(f"Generated feedback: {feedback_text}")
-                            except Exception as e:
-                                logger.error(f"Failed to generate feedback: {e}")
-                                feedback_text = "No feedback available."
-
-                            feedback_item = Feedback(
-                                question_id=question_id,
-                                correct=False,
-                                correct_answer=question['correct_answer'],
-                                user_answer=ans['user_answer'],
-                                feedback=feedback_text
-                            )
-                        else:
-                            feedback_item = Feedback(
-                                question_id=question_id,
-                                correct=True,
-                                correct_answer=question['correct_answer'],
-                                user_answer=ans['user_answer'],
-                                feedback="Correct answer! Well done."
-                            )
-
-                        feedback_list.append(feedback_item)
-
-                # Ensure that total_points does not go below zero
-                if total_points < 0:
-                    total_points = 0
+                # Only the first submission is scored, and never below zero
+                total_points = 0
+                if is_first_submission:
+                    total_points = max(0, sum(points_awarded for _, _, _, points_awarded in graded_answers))
 
                 # Save the user response with feedback
                 user_response = UserResponse(
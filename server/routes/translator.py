@@ -1,9 +1,13 @@
 """ Translator route module. """
 """ Step 1: Import required libraries """
-import os
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, make_response
 import requests
 import logging
+from flask_jwt_extended import jwt_required
+from services.translator import TranslationCache
+from services.azure_translator import translate_texts, get_azure_translator_config
+from services.ui_bundles import UIBundles
+from utils.consts import language_mapping, UI_BUNDLE_MAX_AGE_SECONDS
 
 """ Step 2: Create a Blueprint object """
 translator_routes = Blueprint('translator', __name__)
@@ -14,9 +18,7 @@ def translate():
     data = request.get_json()
     texts = data.get('texts')
     target_language = data.get('target_language')
-    api_key = os.getenv('AZURE_TRANSLATOR_KEY')
-    endpoint = os.getenv('AZURE_TRANSLATOR_ENDPOINT')
-    region = os.getenv('AZURE_TRANSLATOR_REGION')
+    api_key, endpoint, region = get_azure_translator_config()
 
     if not texts or not target_language:
         return jsonify({'error': 'Missing texts or target_language'}), 400
@@ -25,27 +27,45 @@ def translate():
         logging.error("API key or endpoint not found. Please set the AZURE_TRANSLATOR_KEY and AZURE_TRANSLATOR_ENDPOINT environment variables.")
         return jsonify({'error': 'Server configuration error'}), 500
 
-    path = '/translate?api-version=3.0'
-    constructed_url = endpoint + path
-
-    headers = {
-        'Ocp-Apim-Subscription-Key': api_key,
-        'Content-type': 'application/json',
-        'Ocp-Apim-Subscription-Region': region,  # e.g., 'eastus'
-    }
-
-    body = [{'text': text} for text in texts]
-
-    params = {
-        'to': target_language
-    }
-
     try:
-        response = requests.post(constructed_url, params=params, headers=headers, json=body)
-        response.raise_for_status()
-        response_data = response.json()
-        translations = [item['translations'][0]['text'] for item in response_data]
+        # Duplicates and cached texts are not sent; large lists are split into batches
+        translations = translate_texts(texts, target_language)
         return jsonify({'translations': translations})
     except requests.exceptions.RequestException as e:
         logging.error(f"Translation API Error: {e}")
         return jsonify({'error': 'Translation API error'}), 500
+
+
+@translator_routes.get('/translate/bundle/<language>')
+def get_ui_bundle(language):
+    """
+    Returns the translations of the frontend's static texts for a language. The response
+    is cacheable and carries an ETag, so revalidations are answered with 304.
+    """
+    if language not in language_mapping:
+        return jsonify({'error': 'Unsupported language'}), 404
+
+    etag = f"{language}-{UIBundles.get_version()}"
+    if request.if_none_match.contains(etag):
+        # The client has the current bundle, no need to load it in this worker
+        response = make_response('', 304)
+    else:
+        try:
+            response = jsonify(UIBundles.get_bundle(language))
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Translation API Error: {e}")
+            return jsonify({'error': 'Translation API error'}), 500
+
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = UI_BUNDLE_MAX_AGE_SECONDS
+    return response
+
+
+@translator_routes.get('/translate/cache_stats')
+@jwt_required()
+def translation_cache_stats():
+    """
+    Returns this worker's translation cache hits and misses per target language.
+    """
+    return jsonify(TranslationCache.get_stats())
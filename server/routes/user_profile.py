@@ -8,6 +8,7 @@ from flask import current_app
 from werkzeug.utils import secure_filename
 import os
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from utils.translate_decorator import forget_user_language
 
 """Step 2: Define the user_routes blueprint"""
 user_routes = Blueprint('user_routes', __name__)
@@ -79,6 +80,8 @@ def update_profile_fields():
         # Update other fields
         if update_fields:
             db["users"].update_one({"_id": ObjectId(user_id)}, {"$set": update_fields})
+            if 'preferredLanguage' in update_fields:
+                forget_user_language(user_id)
             return jsonify({
                 "message": "User has been updated successfully.",
                 "profile_picture": update_fields.get('profile_picture', user.get('profile_picture'))
@@ -2,7 +2,10 @@
 
 """Step 1: Import necessary modules"""
 import os
+import hashlib
 import logging
+import threading
+from cachetools import LRUCache
 from azure.ai.formrecognizer import DocumentAnalysisClient
 from azure.core.credentials import AzureKeyCredential
 from io import BytesIO
@@ -11,6 +14,8 @@ from io import BytesIO
 from docx import Document as DocxDocument
 import openpyxl
 from pptx import Presentation
+from services.db.extracted_text_cache import find_cached_extracted_text, store_extracted_text
+from utils.consts import EXTRACTED_TEXT_MEMORY_CACHE_CHARS
 
 """Step 2: Define the helper functions"""
 # Define a function to get the Form Recognizer client
@@ -20,8 +25,100 @@ def get_form_recognizer_client():
     return DocumentAnalysisClient(endpoint, AzureKeyCredential(key))
 
 
-# Define a function to extract text from a file
+# Define the cache of extracted text
+class ExtractedTextCache:
+    """
+    Two-tier cache of extracted text keyed by the SHA-256 of the file content and its
+    MIME type: a per-worker LRU bounded by characters, in front of a shared MongoDB
+    collection bounded by bytes (see services/db/extracted_text_cache.py).
+    """
+    _memory = LRUCache(maxsize=EXTRACTED_TEXT_MEMORY_CACHE_CHARS, getsizeof=len)
+    _stats = {"memory_hits": 0, "store_hits": 0, "misses": 0}
+    _labels = {"memory_hits": "memory hit", "store_hits": "store hit", "misses": "miss"}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def get_cache_key(file_content, file_mime_type):
+        return f"{hashlib.sha256(file_content).hexdigest()}:{file_mime_type}"
+
+    @classmethod
+    def record(cls, outcome):
+        with cls._lock:
+            cls._stats[outcome] += 1
+            stats = dict(cls._stats)
+        lookups = sum(stats.values())
+        hit_rate = (stats["memory_hits"] + stats["store_hits"]) / lookups
+        logging.info(f"Extracted text cache {cls._labels[outcome]}; hit rate {hit_rate:.0%} over {lookups} lookups.")
+
+    @classmethod
+    def get(cls, cache_key):
+        with cls._lock:
+            text = cls._memory.get(cache_key)
+        if text is not None:
+            cls.record("memory_hits")
+            return text
+
+        try:
+            text = find_cached_extracted_text(cache_key)
+        except Exception as e:
+            logging.error(f"Error reading the extracted text cache: {e}")
+            text = None
+
+        if text is None:
+            cls.record("misses")
+            return None
+
+        cls.put_in_memory(cache_key, text)
+        cls.record("store_hits")
+        return text
+
+    @classmethod
+    def put_in_memory(cls, cache_key, text):
+        if len(text) > EXTRACTED_TEXT_MEMORY_CACHE_CHARS:
+            return
+        with cls._lock:
+            cls._memory[cache_key] = text
+
+    @classmethod
+    def put(cls, cache_key, text):
+        cls.put_in_memory(cache_key, text)
+        try:
+            store_extracted_text(cache_key, text)
+        except Exception as e:
+            logging.error(f"Error writing the extracted text cache: {e}")
+
+    @classmethod
+    def get_stats(cls):
+        with cls._lock:
+            return dict(cls._stats)
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._memory.clear()
+            for outcome in cls._stats:
+                cls._stats[outcome] = 0
+
+
+# Define a function to extract text from a file, reusing earlier results for the same file
 def extract_text_from_file(file_content, file_mime_type):
+    if not file_content:
+        return ""
+
+    cache_key = ExtractedTextCache.get_cache_key(file_content, file_mime_type)
+    cached_text = ExtractedTextCache.get(cache_key)
+    if cached_text is not None:
+        return cached_text
+
+    extracted_text = extract_text_from_file_uncached(file_content, file_mime_type)
+    # Failed extractions return an empty string and are retried next time
+    if extracted_text:
+        ExtractedTextCache.put(cache_key, extracted_text)
+    return extracted_text
+
+
+# Define a function to extract text from a file
+def extract_text_from_file_uncached(file_content, file_mime_type):
     try:
         # Handle .docx files
         if file_mime_type == 'application/vnd.openxmlformats-officedocument.wordprocessingml.document':
@@ -7,6 +7,7 @@ Methods:
     get_client(): Returns a MongoDB client instance, using a mock client if in a test environment.
     get_mongodb_loader(collection_name, db_filter): Returns a MongodbLoader instance for loading documents from a specified collection with given filter criteria.
     get_db_name(): Returns the database name based on the current environment.
+    get_collection(name, create_indexes): Returns a collection of the app's database, creating its indexes on first use in the process.
     clear_collections(db, collection_names): Clears the specified collections in the given database.
     load_products(db, dataset, Model, coll_name): Loads products into the specified collection from a dataset URL, using the provided model for validation.
     execute_with_retries(operation, max_retries=5): Executes a given operation with retries, handling specific MongoDB write errors and retrying with exponential backoff.
@@ -34,6 +35,7 @@ load_dotenv()
 class MongoDBClient:
     _client = None
     _db_name = None
+    _indexed_collections = set()
 
     @staticmethod
     def get_mongodb_variables():
@@ -78,6 +80,21 @@ class MongoDBClient:
 
         return cls._db_name
 
+    @classmethod
+    def get_collection(cls, name, create_indexes=None):
+        """
+        Returns a collection of the app's database. `create_indexes(collection)` is called
+        the first time the collection is used in the process; creating an index that
+        exists is a no-op, so concurrent first uses are harmless.
+        """
+        collection = cls.get_client()[cls.get_db_name()][name]
+
+        if create_indexes is not None and name not in cls._indexed_collections:
+            create_indexes(collection)
+            cls._indexed_collections.add(name)
+
+        return collection
+
     @staticmethod
     def clear_collections(db, collection_names):
         try:
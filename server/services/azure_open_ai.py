@@ -4,7 +4,8 @@
 import os
 from dotenv import load_dotenv
 from langchain_openai import AzureChatOpenAI, AzureOpenAIEmbeddings
-from utils.consts import CONTEXT_LENGTH_LIMIT
+from utils.consts import CONTEXT_LENGTH_LIMIT, EMBEDDING_BATCH_SIZE
+from services.cached_embeddings import CachedEmbeddings
 
 """Step 2: Define the Azure OpenAI services"""
 # Define the function to get the Azure OpenAI variables
@@ -20,7 +21,7 @@ def get_azure_openai_variables():
 
 
 # Define the function to get the Azure OpenAI language model
-def get_azure_openai_llm():
+def get_azure_openai_llm(streaming: bool = False):
     AOAI_ENDPOINT, AOAI_KEY, AOAI_API_VERSION, _, AOAI_COMPLETIONS = get_azure_openai_variables()
 
     llm = AzureChatOpenAI(
@@ -31,14 +32,27 @@ def get_azure_openai_llm():
         deployment_name=AOAI_COMPLETIONS,
         model_name="gpt-4o",  
         openai_api_type="azure",
-        max_tokens=(CONTEXT_LENGTH_LIMIT // 2)
+        max_tokens=(CONTEXT_LENGTH_LIMIT // 2),
+        streaming=streaming
     )
 
     return llm
 
 
+# One cached embeddings model per process, shared by every agent
+_cached_embedding_model = None
+
+
 # Define the function to get the Azure OpenAI embeddings model
-def get_azure_openai_embeddings():
+def get_azure_openai_embeddings(cached: bool = None):
+    global _cached_embedding_model
+
+    # Set EMBEDDING_CACHE_ENABLED=false to call the API for every text
+    if cached is None:
+        cached = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+    if cached and _cached_embedding_model is not None:
+        return _cached_embedding_model
+
     AOAI_ENDPOINT, AOAI_KEY, AOAI_API_VERSION, AOAI_EMBEDDINGS, _ = get_azure_openai_variables()
 
     embedding_model = AzureOpenAIEmbeddings(
@@ -48,9 +62,11 @@ def get_azure_openai_embeddings():
         deployment=AOAI_EMBEDDINGS,
         model="text-embedding-3-small",  
         openai_api_type="azure",
-        chunk_size=10
+        chunk_size=EMBEDDING_BATCH_SIZE
     )
 
-    return embedding_model
-
+    if not cached:
+        return embedding_model
 
+    _cached_embedding_model = CachedEmbeddings(embedding_model, model_name="text-embedding-3-small")
+    return _cached_embedding_model
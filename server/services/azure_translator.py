@@ -0,0 +1,98 @@
+"""
+This module translates lists of texts with Azure Translator. Inputs are deduplicated,
+served from the translation cache when possible, and the rest is split into requests
+within the service limits (elements and characters per request) that are sent
+concurrently over the shared HTTP session.
+"""
+
+"""Step 1: Import necessary modules"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from services.http_client import HttpClient
+from services.translator import TranslationCache
+from utils.consts import AZURE_TRANSLATOR_MAX_ELEMENTS, AZURE_TRANSLATOR_MAX_CHARS, AZURE_TRANSLATOR_CONCURRENCY
+
+_batch_executor = ThreadPoolExecutor(max_workers=AZURE_TRANSLATOR_CONCURRENCY, thread_name_prefix="azure-translator")
+
+
+"""Step 2: Define the helper functions"""
+def get_azure_translator_config() -> tuple:
+    """
+    Returns (api_key, endpoint, region) from the environment.
+    """
+    return os.getenv('AZURE_TRANSLATOR_KEY'), os.getenv('AZURE_TRANSLATOR_ENDPOINT'), os.getenv('AZURE_TRANSLATOR_REGION')
+
+
+def split_into_batches(texts: list[str], max_elements: int = AZURE_TRANSLATOR_MAX_ELEMENTS, max_chars: int = AZURE_TRANSLATOR_MAX_CHARS) -> list[list[str]]:
+    """
+    Splits texts into consecutive batches of at most `max_elements` texts and
+    `max_chars` characters. A text longer than `max_chars` gets a batch of its own.
+    """
+    batches = []
+    batch, batch_chars = [], 0
+    for text in texts:
+        if batch and (len(batch) >= max_elements or batch_chars + len(text) > max_chars):
+            batches.append(batch)
+            batch, batch_chars = [], 0
+        batch.append(text)
+        batch_chars += len(text)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def translate_batch(texts: list[str], target_language: str) -> list[str]:
+    """
+    Translates one batch with a single Azure Translator request.
+
+    Raises:
+        requests.exceptions.RequestException: If the request fails.
+    """
+    api_key, endpoint, region = get_azure_translator_config()
+    headers = {
+        'Ocp-Apim-Subscription-Key': api_key,
+        'Content-type': 'application/json',
+        'Ocp-Apim-Subscription-Region': region,  # e.g., 'eastus'
+    }
+    response = HttpClient.get_session().post(
+        endpoint + '/translate?api-version=3.0',
+        params={'to': target_language},
+        headers=headers,
+        json=[{'text': text} for text in texts],
+    )
+    response.raise_for_status()
+    return [item['translations'][0]['text'] for item in response.json()]
+
+
+"""Step 3: Define the translate_texts function"""
+def translate_texts(texts: list[str], target_language: str) -> list[str]:
+    """
+    Translates texts, calling Azure Translator only for the distinct texts missing from
+    the translation cache.
+
+    Returns:
+        list[str]: The translations, in the order of `texts`.
+
+    Raises:
+        requests.exceptions.RequestException: If a batch fails. Batches that succeeded
+            are cached nonetheless.
+    """
+    translations = TranslationCache.get_many(texts, target_language)
+    missing = [text for text in dict.fromkeys(texts) if text not in translations]
+
+    batches = split_into_batches(missing)
+    futures = [_batch_executor.submit(translate_batch, batch, target_language) for batch in batches]
+
+    error = None
+    for batch, future in zip(batches, futures):
+        try:
+            translated = dict(zip(batch, future.result()))
+        except Exception as e:
+            error = error or e
+            continue
+        TranslationCache.put_many(translated, target_language)
+        translations.update(translated)
+
+    if error:
+        raise error
+    return [translations[text] for text in texts]
@@ -0,0 +1,151 @@
+"""
+This module wraps an embeddings model with a two-tier cache (per-worker LRU in front of
+the shared embedding_cache collection) and batches concurrent embedding requests into
+larger API calls.
+"""
+
+"""Step 1: Import necessary modules"""
+import time
+import hashlib
+import logging
+import threading
+import unicodedata
+from concurrent.futures import Future
+import numpy as np
+from cachetools import LRUCache
+from langchain_core.embeddings import Embeddings
+from services.db.embedding_cache import find_cached_embeddings, store_embeddings
+from utils.consts import EMBEDDING_CACHE_MEMORY_SIZE, EMBEDDING_BATCH_SIZE, EMBEDDING_BATCH_WINDOW_SECONDS
+
+
+"""Step 2: Define the helper functions"""
+def normalize_text(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+"""Step 3: Define the CachedEmbeddings class"""
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings that are computed once per model and normalized text.
+
+    Texts missing from both cache tiers are queued for a short window
+    (EMBEDDING_BATCH_WINDOW_SECONDS), so concurrent requests from different threads
+    share one API call; identical texts in flight are only embedded once.
+
+    Args:
+        embeddings (Embeddings): The model computing the embeddings.
+        model_name (str): Part of the cache key, so models never share vectors.
+        persistent (bool): Whether to use the shared MongoDB tier.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str, persistent: bool = True):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.persistent = persistent
+        self._memory = LRUCache(maxsize=EMBEDDING_CACHE_MEMORY_SIZE)
+        self._lock = threading.Lock()
+        self._pending = {}  # cache key -> (text, Future) waiting for the next API call
+        self._in_flight = {}  # cache key -> Future, until its vector is cached
+        self._flush_scheduled = False
+        self.stats = {"memory_hits": 0, "store_hits": 0, "misses": 0, "api_calls": 0}
+
+    def get_cache_key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\n{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        keys = [self.get_cache_key(text) for text in texts]
+        vectors = {}
+
+        with self._lock:
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    vectors[key] = vector
+                    self.stats["memory_hits"] += 1
+
+        missing = list(dict.fromkeys(key for key in keys if key not in vectors))
+        if missing and self.persistent:
+            try:
+                stored = find_cached_embeddings(missing)
+            except Exception as e:
+                logging.error(f"Error reading the embedding cache: {e}")
+                stored = {}
+            with self._lock:
+                for key, vector in stored.items():
+                    self._memory[key] = vector
+                self.stats["store_hits"] += len(stored)
+            vectors.update(stored)
+
+        texts_by_key = dict(zip(keys, texts))
+        futures = self.embed_in_batch({key: texts_by_key[key] for key in keys if key not in vectors})
+        for key, future in futures.items():
+            vectors[key] = future.result()
+
+        return [vectors[key] for key in keys]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+    def embed_in_batch(self, texts_by_key: dict[str, str]) -> dict[str, Future]:
+        """
+        Queues texts for the next API call, joining requests already in flight.
+        The first caller of a window sends the batch for everyone.
+        """
+        if not texts_by_key:
+            return {}
+
+        futures = {}
+        with self._lock:
+            for key, text in texts_by_key.items():
+                future = self._in_flight.get(key)
+                if future is None:
+                    future = Future()
+                    self._in_flight[key] = future
+                    self._pending[key] = (text, future)
+                    self.stats["misses"] += 1
+                futures[key] = future
+            is_leader = bool(self._pending) and not self._flush_scheduled
+            if is_leader:
+                self._flush_scheduled = True
+
+        if is_leader:
+            time.sleep(EMBEDDING_BATCH_WINDOW_SECONDS)
+            self.flush()
+        return futures
+
+    def flush(self) -> None:
+        with self._lock:
+            batch = self._pending
+            self._pending = {}
+            self._flush_scheduled = False
+
+        items = list(batch.items())
+        for start in range(0, len(items), EMBEDDING_BATCH_SIZE):
+            chunk = items[start:start + EMBEDDING_BATCH_SIZE]
+            try:
+                with self._lock:
+                    self.stats["api_calls"] += 1
+                results = self.embeddings.embed_documents([text for _, (text, _) in chunk])
+                # Round to float32 so fresh and cached vectors are identical
+                results = [np.asarray(vector, dtype=np.float32).tolist() for vector in results]
+            except Exception as e:
+                with self._lock:
+                    for key, (_, future) in chunk:
+                        self._in_flight.pop(key, None)
+                for _, (_, future) in chunk:
+                    future.set_exception(e)
+                continue
+
+            embeddings_by_key = {key: vector for (key, _), vector in zip(chunk, results)}
+            with self._lock:
+                for key, vector in embeddings_by_key.items():
+                    self._memory[key] = vector
+                    self._in_flight.pop(key, None)
+            for (_, (_, future)), vector in zip(chunk, results):
+                future.set_result(vector)
+
+            if self.persistent:
+                try:
+                    store_embeddings(embeddings_by_key, self.model_name)
+                except Exception as e:
+                    logging.error(f"Error writing the embedding cache: {e}")
@@ -1,20 +1,38 @@
 """This module is responsible for loading agent facts to the database."""
 """STEP 1: Import required libraries"""
+from pymongo import UpdateOne
 from services.azure_mongodb import MongoDBClient
+from services.db.vector_index import get_content_hash
 from models.agent_fact import AgentFact
 from utils.consts import AGENT_FACTS
 
 """STEP 2: Define the load_agent_facts_to_db function"""
 def load_agent_facts_to_db():
+    """
+    Syncs the agent_facts collection with AGENT_FACTS. Facts are keyed by a hash of
+    their content, so only added, changed or removed facts touch the database.
+    """
     db = MongoDBClient.get_client()[MongoDBClient.get_db_name()]
     collection = db["agent_facts"]
 
-    if collection.count_documents({}) == 0:
-        print("There are no documents in Agent Facts. writing documents...")
-        validated_models: list[AgentFact] = [
-            AgentFact.model_validate(fact_dict) for fact_dict in AGENT_FACTS]
-        facts_to_load = [AgentFact.model_dump(
-            fact_model) for fact_model in validated_models]
-        collection.insert_many(facts_to_load)
-    else:
-        print("Agent facts are already populated. Skipping step.")
\ No newline at end of file
+    validated_models: list[AgentFact] = [
+        AgentFact.model_validate(fact_dict) for fact_dict in AGENT_FACTS]
+    facts_to_load = {}
+    for fact_model in validated_models:
+        fact = AgentFact.model_dump(fact_model)
+        facts_to_load[get_content_hash(fact)] = fact
+
+    existing_hashes = set(collection.distinct("content_hash"))
+    new_hashes = [content_hash for content_hash in facts_to_load if content_hash not in existing_hashes]
+
+    if new_hashes:
+        print(f"Writing {len(new_hashes)} new or changed agent facts...")
+        collection.bulk_write([
+            UpdateOne({"content_hash": content_hash}, {"$set": {**facts_to_load[content_hash], "content_hash": content_hash}}, upsert=True)
+            for content_hash in new_hashes
+        ])
+
+    # Remove facts that are no longer defined (and ones written before hashes were tracked)
+    removed = collection.delete_many({"content_hash": {"$nin": list(facts_to_load)}})
+    if not new_hashes and removed.deleted_count == 0:
+        print("Agent facts are already up to date. Skipping step.")
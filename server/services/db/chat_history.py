@@ -0,0 +1,97 @@
+"""
+This module contains the chat history stored in the chat_turns collection. It keeps
+the document format of langchain's MongoDBChatMessageHistory, but goes through the
+shared MongoDBClient connection pool instead of opening a new client per session.
+"""
+"""Step 1: Import necessary modules"""
+import json
+import asyncio
+import logging
+import threading
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+from pymongo import ASCENDING
+from services.azure_mongodb import MongoDBClient
+
+logger = logging.getLogger(__name__)
+
+CHAT_TURNS_COLLECTION = "chat_turns"
+SESSION_ID_KEY = "SessionId"
+HISTORY_KEY = "History"
+
+"""Step 2: Define the helper functions"""
+def create_chat_turns_indexes(collection) -> None:
+    collection.create_index([(SESSION_ID_KEY, ASCENDING)])
+
+
+def get_chat_turns_collection():
+    return MongoDBClient.get_collection(CHAT_TURNS_COLLECTION, create_indexes=create_chat_turns_indexes)
+
+
+"""Step 3: Define the PooledMongoDBChatMessageHistory class"""
+class PooledMongoDBChatMessageHistory(BaseChatMessageHistory):
+    """
+    Chat message history of a session, read with one projected query and appended
+    with one batched insert per turn.
+    """
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.collection = get_chat_turns_collection()
+
+    @property
+    def messages(self) -> list[BaseMessage]:
+        cursor = self.collection.find(
+            {SESSION_ID_KEY: self.session_id},
+            {HISTORY_KEY: 1, "_id": 0}
+        ).sort("_id", ASCENDING)
+        return messages_from_dict([json.loads(doc[HISTORY_KEY]) for doc in cursor])
+
+    def add_messages(self, messages: list[BaseMessage]) -> None:
+        # RunnableWithMessageHistory saves the human and AI messages of a turn together
+        if not messages:
+            return
+        self.collection.insert_many(
+            [{SESSION_ID_KEY: self.session_id, HISTORY_KEY: json.dumps(message_to_dict(message))} for message in messages],
+            ordered=True
+        )
+
+    def clear(self) -> None:
+        self.collection.delete_many({SESSION_ID_KEY: self.session_id})
+
+
+"""Step 4: Define the ChatSessionSnapshot class"""
+class ChatSessionSnapshot(BaseChatMessageHistory):
+    """
+    A per-request view of a session's history. The messages are loaded once, on first
+    use, and shared by every consumer of the request (agent, mood, summary, suggestions);
+    new messages are written through to the database and appended to the snapshot.
+    """
+
+    def __init__(self, session_id: str, history: BaseChatMessageHistory = None):
+        self.session_id = session_id
+        self.history = history or PooledMongoDBChatMessageHistory(session_id)
+        self._messages = None
+        self._lock = threading.Lock()
+
+    @property
+    def messages(self) -> list[BaseMessage]:
+        with self._lock:
+            if self._messages is None:
+                self._messages = self.history.messages
+            return list(self._messages)
+
+    async def aget_messages(self) -> list[BaseMessage]:
+        # The first read queries MongoDB, which must not block the event loop
+        return await asyncio.to_thread(lambda: self.messages)
+
+    def add_messages(self, messages: list[BaseMessage]) -> None:
+        self.history.add_messages(messages)
+        with self._lock:
+            if self._messages is not None:
+                self._messages.extend(messages)
+
+    def clear(self) -> None:
+        self.history.clear()
+        with self._lock:
+            self._messages = []
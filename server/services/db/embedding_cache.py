@@ -0,0 +1,58 @@
+"""
+This module contains functions for the embedding_cache collection, the shared tier of
+the cache of text embeddings.
+"""
+"""Step 1: Import necessary modules"""
+from datetime import datetime, timezone
+import numpy as np
+from bson.binary import Binary
+from pymongo import ASCENDING, InsertOne
+from pymongo.errors import BulkWriteError
+from services.azure_mongodb import MongoDBClient
+from utils.consts import EMBEDDING_CACHE_TTL_DAYS
+import logging
+
+logger = logging.getLogger(__name__)
+
+"""Step 2: Define the helper functions"""
+def create_embedding_cache_indexes(collection) -> None:
+    collection.create_index([("created_at", ASCENDING)], expireAfterSeconds=EMBEDDING_CACHE_TTL_DAYS * 86400)
+
+
+def get_embedding_cache_collection():
+    return MongoDBClient.get_collection("embedding_cache", create_indexes=create_embedding_cache_indexes)
+
+
+"""Step 3: Define the functions"""
+def find_cached_embeddings(cache_keys: list[str]) -> dict[str, list[float]]:
+    """
+    Returns the cached embeddings among the given keys, in a single query.
+    """
+    if not cache_keys:
+        return {}
+    cursor = get_embedding_cache_collection().find({"_id": {"$in": list(cache_keys)}}, {"vector": 1})
+    # Vectors are stored as packed float32 to keep documents small
+    return {doc["_id"]: np.frombuffer(doc["vector"], dtype=np.float32).tolist() for doc in cursor}
+
+
+def store_embeddings(embeddings_by_key: dict[str, list[float]], model: str) -> None:
+    if not embeddings_by_key:
+        return
+    now = datetime.now(timezone.utc)
+    try:
+        get_embedding_cache_collection().bulk_write(
+            [
+                InsertOne({
+                    "_id": cache_key,
+                    "model": model,
+                    "vector": Binary(np.asarray(vector, dtype=np.float32).tobytes()),
+                    "created_at": now,
+                })
+                for cache_key, vector in embeddings_by_key.items()
+            ],
+            ordered=False
+        )
+    except BulkWriteError as e:
+        # Another worker cached some of the same texts first
+        if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+            raise
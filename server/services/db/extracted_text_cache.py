@@ -0,0 +1,71 @@
+"""
+This module contains functions for the extracted_text_cache collection, the shared tier
+of the cache of text extracted from uploaded files.
+"""
+"""Step 1: Import necessary modules"""
+from datetime import datetime, timezone
+from services.azure_mongodb import MongoDBClient
+from utils.consts import EXTRACTED_TEXT_STORE_MAX_BYTES, EXTRACTED_TEXT_STORE_MAX_ENTRY_BYTES
+from pymongo import ASCENDING
+import logging
+
+logger = logging.getLogger(__name__)
+
+"""Step 2: Define the helper functions"""
+def create_extracted_text_cache_indexes(collection) -> None:
+    collection.create_index([("last_accessed", ASCENDING)])
+
+
+def get_extracted_text_cache_collection():
+    return MongoDBClient.get_collection("extracted_text_cache", create_indexes=create_extracted_text_cache_indexes)
+
+
+"""Step 3: Define the functions"""
+def find_cached_extracted_text(cache_key: str) -> str | None:
+    """
+    Returns the cached text for a content key and marks it as recently used.
+    """
+    doc = get_extracted_text_cache_collection().find_one_and_update(
+        {"_id": cache_key},
+        {"$set": {"last_accessed": datetime.now(timezone.utc)}},
+        projection={"text": 1, "_id": 0},
+    )
+    return doc["text"] if doc else None
+
+
+def store_extracted_text(cache_key: str, text: str) -> None:
+    """
+    Stores extracted text, then evicts the least recently used entries until the
+    collection is back under EXTRACTED_TEXT_STORE_MAX_BYTES.
+    """
+    size = len(text.encode("utf-8"))
+    if size > EXTRACTED_TEXT_STORE_MAX_ENTRY_BYTES:
+        logger.info(f"Extracted text of {size} bytes is too large for the shared cache.")
+        return
+
+    collection = get_extracted_text_cache_collection()
+    now = datetime.now(timezone.utc)
+    collection.update_one(
+        {"_id": cache_key},
+        {"$set": {"text": text, "size": size, "last_accessed": now}, "$setOnInsert": {"created_at": now}},
+        upsert=True
+    )
+    evict_extracted_text(collection)
+
+
+def evict_extracted_text(collection, max_bytes: int = EXTRACTED_TEXT_STORE_MAX_BYTES) -> int:
+    totals = list(collection.aggregate([{"$group": {"_id": None, "total": {"$sum": "$size"}}}]))
+    total_size = totals[0]["total"] if totals else 0
+    if total_size <= max_bytes:
+        return 0
+
+    evicted_keys = []
+    for doc in collection.find({}, {"size": 1}).sort("last_accessed", ASCENDING):
+        if total_size <= max_bytes:
+            break
+        evicted_keys.append(doc["_id"])
+        total_size -= doc.get("size", 0)
+
+    collection.delete_many({"_id": {"$in": evicted_keys}})
+    logger.info(f"Evicted {len(evicted_keys)} entries from the extracted text cache.")
+    return len(evicted_keys)
@@ -0,0 +1,160 @@
+"""
+This module contains functions for the finalization_jobs collection, a durable queue of
+chat sessions waiting for their final processes (mood detection and summarization).
+
+There is at most one job per chat. Finalizing a chat that already has a pending job
+leaves it as it is (including a retry waiting out its backoff), finalizing a chat whose
+job is running queues one more run after it, and finalizing a finished chat runs its
+job again.
+"""
+"""Step 1: Import necessary modules"""
+from datetime import datetime, timedelta, timezone
+from services.azure_mongodb import MongoDBClient
+from utils.consts import FINALIZATION_MAX_ATTEMPTS, FINALIZATION_RETRY_BASE_SECONDS, FINALIZATION_LEASE_SECONDS, FINALIZATION_JOB_RETENTION_DAYS
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+import logging
+
+logger = logging.getLogger(__name__)
+
+"""Step 2: Define the helper functions"""
+def create_finalization_jobs_indexes(collection) -> None:
+    collection.create_index([("status", ASCENDING), ("available_at", ASCENDING)])
+    # Finished jobs are removed after a while; pending and running ones have no finished_at
+    collection.create_index([("finished_at", ASCENDING)], expireAfterSeconds=FINALIZATION_JOB_RETENTION_DAYS * 86400)
+
+
+def get_finalization_jobs_collection():
+    return MongoDBClient.get_collection("finalization_jobs", create_indexes=create_finalization_jobs_indexes)
+
+
+def get_job_id(user_id: str, chat_id) -> str:
+    return f"{user_id}-{int(chat_id)}"
+
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+"""Step 3: Define the functions"""
+def enqueue_finalization_job(user_id: str, chat_id) -> str:
+    """
+    Queues the finalization of a chat, deduplicating repeated requests.
+
+    Returns:
+        str: The id of the chat's job.
+    """
+    collection = get_finalization_jobs_collection()
+    job_id = get_job_id(user_id, chat_id)
+    now = utc_now()
+
+    try:
+        # A pending job keeps its attempts and backoff, only the request time moves
+        collection.update_one(
+            {"_id": job_id, "status": "pending"},
+            {
+                "$set": {"requested_at": now},
+                "$setOnInsert": {"user_id": user_id, "chat_id": int(chat_id), "created_at": now, "available_at": now, "attempts": 0, "last_error": None},
+            },
+            upsert=True
+        )
+        return job_id
+    except DuplicateKeyError:
+        pass
+
+    # The job is finished: run it again from scratch
+    reset = collection.update_one(
+        {"_id": job_id, "status": {"$in": ["done", "failed"]}},
+        {
+            "$set": {"status": "pending", "available_at": now, "attempts": 0, "last_error": None, "requested_at": now},
+            "$unset": {"finished_at": ""},
+        }
+    )
+    if reset.matched_count == 0:
+        # The job is running: new turns may have arrived since it started, so run it again afterwards
+        collection.update_one({"_id": job_id, "status": "running"}, {"$set": {"rerun": True, "requested_at": now}})
+
+    return job_id
+
+
+def fail_abandoned_finalization_jobs(now: datetime) -> None:
+    """
+    Marks as failed the running jobs whose lease expired on their last attempt, e.g. jobs
+    that crash or hang their worker every time.
+    """
+    failed = get_finalization_jobs_collection().update_many(
+        {"status": "running", "lease_expires_at": {"$lte": now}, "attempts": {"$gte": FINALIZATION_MAX_ATTEMPTS}},
+        {"$set": {"status": "failed", "finished_at": now, "last_error": "The job's lease expired on its last attempt"}}
+    )
+    if failed.modified_count:
+        logger.error(f"Marked {failed.modified_count} abandoned finalization jobs as failed.")
+
+
+def claim_next_finalization_job(worker_id: str) -> dict | None:
+    """
+    Atomically claims the oldest due job, including running jobs whose lease expired
+    because their worker died, as long as they have attempts left.
+    """
+    collection = get_finalization_jobs_collection()
+    now = utc_now()
+    fail_abandoned_finalization_jobs(now)
+    return collection.find_one_and_update(
+        {"$or": [
+            {"status": "pending", "available_at": {"$lte": now}},
+            {"status": "running", "lease_expires_at": {"$lte": now}, "attempts": {"$lt": FINALIZATION_MAX_ATTEMPTS}},
+        ]},
+        {
+            "$set": {
+                "status": "running",
+                "worker_id": worker_id,
+                "started_at": now,
+                "lease_expires_at": now + timedelta(seconds=FINALIZATION_LEASE_SECONDS),
+                "rerun": False,
+            },
+            "$inc": {"attempts": 1},
+        },
+        sort=[("available_at", ASCENDING)],
+        return_document=ReturnDocument.AFTER
+    )
+
+
+def complete_finalization_job(job: dict) -> None:
+    collection = get_finalization_jobs_collection()
+    now = utc_now()
+    # Another finalize request arrived while the job was running
+    rerun = collection.find_one_and_update(
+        {"_id": job["_id"], "worker_id": job["worker_id"], "rerun": True},
+        {"$set": {"status": "pending", "available_at": now, "attempts": 0, "rerun": False}}
+    )
+    if rerun is None:
+        collection.update_one(
+            {"_id": job["_id"], "worker_id": job["worker_id"]},
+            {"$set": {"status": "done", "finished_at": now, "last_error": None}}
+        )
+
+
+def fail_finalization_job(job: dict, error: str) -> None:
+    """
+    Schedules a retry with exponential backoff, or marks the job as failed once it
+    used all its attempts.
+    """
+    collection = get_finalization_jobs_collection()
+    now = utc_now()
+    attempts = job.get("attempts", 1)
+
+    if attempts >= FINALIZATION_MAX_ATTEMPTS:
+        logger.error(f"Finalization job {job['_id']} failed after {attempts} attempts: {error}")
+        update = {"status": "failed", "finished_at": now, "last_error": error}
+    else:
+        delay = FINALIZATION_RETRY_BASE_SECONDS * (2 ** (attempts - 1))
+        logger.warning(f"Finalization job {job['_id']} failed, retrying in {delay}s: {error}")
+        update = {"status": "pending", "available_at": now + timedelta(seconds=delay), "last_error": error}
+
+    collection.update_one({"_id": job["_id"], "worker_id": job["worker_id"]}, {"$set": update})
+
+
+def get_finalization_job(user_id: str, chat_id) -> dict | None:
+    return get_finalization_jobs_collection().find_one(
+        {"_id": get_job_id(user_id, chat_id)},
+        {"_id": 0, "status": 1, "attempts": 1, "last_error": 1, "requested_at": 1, "finished_at": 1}
+    )
@@ -0,0 +1,55 @@
+"""
+This module contains functions for the semantic_response_cache collection, which stores
+agent answers to common, non-personalized questions with the embedding of the question.
+"""
+"""Step 1: Import necessary modules"""
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from bson.binary import Binary
+from pymongo import ASCENDING, DESCENDING
+from services.azure_mongodb import MongoDBClient
+from utils.consts import SEMANTIC_CACHE_TTL_SECONDS, SEMANTIC_CACHE_MAX_ENTRIES
+import logging
+
+logger = logging.getLogger(__name__)
+
+"""Step 2: Define the helper functions"""
+def create_semantic_cache_indexes(collection) -> None:
+    collection.create_index([("created_at", ASCENDING)], expireAfterSeconds=SEMANTIC_CACHE_TTL_SECONDS)
+    collection.create_index([("role", ASCENDING), ("language", ASCENDING), ("created_at", DESCENDING)])
+
+
+def get_semantic_cache_collection():
+    return MongoDBClient.get_collection("semantic_response_cache", create_indexes=create_semantic_cache_indexes)
+
+
+"""Step 3: Define the functions"""
+def find_semantic_cache_entries(role: str, language: str) -> list[dict]:
+    """
+    Returns the newest unexpired entries for a role and language, with their
+    embeddings unpacked.
+    """
+    since = datetime.now(timezone.utc) - timedelta(seconds=SEMANTIC_CACHE_TTL_SECONDS)
+    cursor = (
+        get_semantic_cache_collection()
+        .find({"role": role, "language": language, "created_at": {"$gte": since}}, {"embedding": 1, "response": 1, "created_at": 1, "_id": 0})
+        .sort("created_at", DESCENDING)
+        .limit(SEMANTIC_CACHE_MAX_ENTRIES)
+    )
+    return [
+        {"embedding": np.frombuffer(doc["embedding"], dtype=np.float32), "response": doc["response"], "created_at": doc["created_at"]}
+        for doc in cursor
+    ]
+
+
+def insert_semantic_cache_entry(role: str, language: str, prompt: str, embedding, response: str) -> datetime:
+    created_at = datetime.now(timezone.utc)
+    get_semantic_cache_collection().insert_one({
+        "role": role,
+        "language": language,
+        "prompt": prompt,
+        "embedding": Binary(np.asarray(embedding, dtype=np.float32).tobytes()),
+        "response": response,
+        "created_at": created_at,
+    })
+    return created_at
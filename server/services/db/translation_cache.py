@@ -0,0 +1,50 @@
+"""
+This module contains functions for the translation_cache collection, the shared tier of
+the cache of translations.
+"""
+"""Step 1: Import necessary modules"""
+from datetime import datetime, timezone
+from pymongo import ASCENDING, InsertOne
+from pymongo.errors import BulkWriteError
+from services.azure_mongodb import MongoDBClient
+from utils.consts import TRANSLATION_CACHE_TTL_DAYS
+import logging
+
+logger = logging.getLogger(__name__)
+
+"""Step 2: Define the helper functions"""
+def create_translation_cache_indexes(collection) -> None:
+    collection.create_index([("created_at", ASCENDING)], expireAfterSeconds=TRANSLATION_CACHE_TTL_DAYS * 86400)
+
+
+def get_translation_cache_collection():
+    return MongoDBClient.get_collection("translation_cache", create_indexes=create_translation_cache_indexes)
+
+
+"""Step 3: Define the functions"""
+def find_cached_translations(cache_keys: list[str]) -> dict[str, str]:
+    """
+    Returns the cached translations among the given keys, in a single query.
+    """
+    if not cache_keys:
+        return {}
+    cursor = get_translation_cache_collection().find({"_id": {"$in": list(cache_keys)}}, {"translation": 1})
+    return {doc["_id"]: doc["translation"] for doc in cursor}
+
+
+def store_translations(translations_by_key: dict[str, str], language: str) -> None:
+    if not translations_by_key:
+        return
+    now = datetime.now(timezone.utc)
+    try:
+        get_translation_cache_collection().bulk_write(
+            [
+                InsertOne({"_id": cache_key, "language": language, "translation": translation, "created_at": now})
+                for cache_key, translation in translations_by_key.items()
+            ],
+            ordered=False
+        )
+    except BulkWriteError as e:
+        # Another worker cached some of the same texts first
+        if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+            raise
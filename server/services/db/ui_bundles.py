@@ -0,0 +1,46 @@
+"""
+This module contains functions for the ui_bundles collection, which stores the
+translated UI string bundles by language and catalog version.
+"""
+"""Step 1: Import necessary modules"""
+from datetime import datetime, timezone
+from pymongo import ASCENDING
+from pymongo.errors import DuplicateKeyError
+from services.azure_mongodb import MongoDBClient
+import logging
+
+logger = logging.getLogger(__name__)
+
+"""Step 2: Define the helper functions"""
+def create_ui_bundles_indexes(collection) -> None:
+    collection.create_index([("language", ASCENDING), ("version", ASCENDING)], unique=True)
+
+
+def get_ui_bundles_collection():
+    return MongoDBClient.get_collection("ui_bundles", create_indexes=create_ui_bundles_indexes)
+
+
+"""Step 3: Define the functions"""
+def find_ui_bundle(language: str, version: str) -> dict | None:
+    """
+    Returns the stored translations of a catalog version as {text: translation}, or None.
+    """
+    doc = get_ui_bundles_collection().find_one({"language": language, "version": version}, {"entries": 1})
+    if not doc:
+        return None
+    # Texts are stored as values since they may contain dots
+    return {entry["text"]: entry["translation"] for entry in doc["entries"]}
+
+
+def store_ui_bundle(language: str, version: str, translations: dict[str, str]) -> None:
+    try:
+        get_ui_bundles_collection().insert_one({
+            "language": language,
+            "version": version,
+            "entries": [{"text": text, "translation": translation} for text, translation in translations.items()],
+            "created_at": datetime.now(timezone.utc),
+        })
+    except DuplicateKeyError:
+        # Another worker built the same bundle first
+        logger.info(f"UI bundle {version} for {language} already stored.")
+
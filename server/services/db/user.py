@@ -41,4 +41,16 @@ def get_user_profile_by_user_id(user_id: str) -> str:
     doc = db["users"].find_one({"_id": user_objectid}, {"password": 0, "email": 0})
     if "contentVector" in doc:
         del doc["contentVector"]
-    return json.dumps(doc, default=str)
\ No newline at end of file
+    return json.dumps(doc, default=str)
+
+def get_user_preferred_language(user_id: str) -> str:
+    """
+    Returns the user's preferred language code, or "en" when it is not set.
+    """
+    try:
+        user_objectid = ObjectId(user_id)
+    except (InvalidId, TypeError):
+        return "en"
+
+    doc = db["users"].find_one({"_id": user_objectid}, {"preferredLanguage": 1, "_id": 0})
+    return (doc or {}).get("preferredLanguage") or "en"
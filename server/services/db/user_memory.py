@@ -0,0 +1,117 @@
+"""
+This module contains functions for the user_memory_digests collection, which keeps a
+rolling, token-bounded digest of a user's past chat summaries.
+"""
+"""Step 1: Import necessary modules"""
+from services.azure_mongodb import MongoDBClient
+from utils.consts import USER_MEMORY_TOKEN_BUDGET, USER_MEMORY_BACKFILL_LIMIT
+from utils.tokens import count_tokens, truncate_to_tokens
+from pymongo import ASCENDING
+import logging
+
+logger = logging.getLogger(__name__)
+
+"""Step 2: Define the helper functions"""
+def create_user_memory_indexes(collection) -> None:
+    collection.create_index([("user_id", ASCENDING)], unique=True)
+
+
+def get_user_memory_collection():
+    return MongoDBClient.get_collection("user_memory_digests", create_indexes=create_user_memory_indexes)
+
+
+def build_digest(entries: list[dict], token_budget: int = USER_MEMORY_TOKEN_BUDGET) -> tuple[list[dict], str]:
+    """
+    Keeps the newest summaries that fit in the token budget.
+
+    Args:
+        entries (list[dict]): Summaries as {"chat_id", "summary_text"}, newest first.
+
+    Returns:
+        tuple: (kept entries, digest text)
+    """
+    kept = []
+    used_tokens = 0
+    for entry in entries:
+        summary_text = (entry.get("summary_text") or "").strip()
+        if not summary_text:
+            continue
+
+        remaining = token_budget - used_tokens
+        if remaining <= 0:
+            break
+
+        tokens = count_tokens(summary_text)
+        if tokens > remaining:
+            if kept:
+                break
+            # A single summary larger than the whole budget is cut down to size
+            summary_text = truncate_to_tokens(summary_text, remaining)
+            tokens = count_tokens(summary_text)
+
+        kept.append({"chat_id": entry.get("chat_id"), "summary_text": summary_text})
+        used_tokens += tokens
+
+    digest_text = "\n".join(entry["summary_text"] for entry in kept)
+    return kept, digest_text
+
+
+"""Step 3: Define the functions"""
+def get_user_memory_digest(user_id: str) -> str:
+    """
+    Returns the digest of the user's past conversations with a single point lookup.
+    Users without a digest yet get one built from their most recent chat summaries.
+    """
+    collection = get_user_memory_collection()
+    doc = collection.find_one({"user_id": user_id}, {"digest_text": 1, "_id": 0})
+    if doc is not None:
+        return doc.get("digest_text", "")
+
+    return backfill_user_memory_digest(user_id)
+
+
+def backfill_user_memory_digest(user_id: str) -> str:
+    """
+    Builds the digest for a user from a bounded number of recent chat summaries.
+    """
+    db = MongoDBClient.get_client()[MongoDBClient.get_db_name()]
+    recent_summaries = list(
+        db["chat_summaries"]
+        .find({"user_id": user_id, "summary_text": {"$nin": ["", None]}}, {"chat_id": 1, "summary_text": 1, "_id": 0})
+        .sort("chat_id", -1)
+        .limit(USER_MEMORY_BACKFILL_LIMIT)
+    )
+
+    entries, digest_text = build_digest(recent_summaries)
+    get_user_memory_collection().update_one(
+        {"user_id": user_id},
+        {"$setOnInsert": {"entries": entries, "digest_text": digest_text}},
+        upsert=True
+    )
+    logger.info(f"Backfilled memory digest for user {user_id} from {len(recent_summaries)} summaries.")
+    return digest_text
+
+
+def update_user_memory_digest(user_id: str, chat_id: int, summary_text: str) -> str:
+    """
+    Adds (or replaces) the summary of a chat in the user's digest and trims the digest
+    back to the token budget, dropping the oldest summaries first.
+    """
+    collection = get_user_memory_collection()
+    doc = collection.find_one({"user_id": user_id}, {"entries": 1, "_id": 0})
+    if doc is None:
+        # Seed from existing summaries so older chats are not forgotten
+        backfill_user_memory_digest(user_id)
+        doc = collection.find_one({"user_id": user_id}, {"entries": 1, "_id": 0}) or {}
+
+    previous_entries = [entry for entry in doc.get("entries", []) if entry.get("chat_id") != int(chat_id)]
+    entries = [{"chat_id": int(chat_id), "summary_text": summary_text or ""}] + previous_entries
+    entries.sort(key=lambda entry: entry.get("chat_id") or 0, reverse=True)
+
+    entries, digest_text = build_digest(entries)
+    collection.update_one(
+        {"user_id": user_id},
+        {"$set": {"entries": entries, "digest_text": digest_text}},
+        upsert=True
+    )
+    return digest_text
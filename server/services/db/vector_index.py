@@ -0,0 +1,243 @@
+"""
+This module builds the vector stores behind the retriever tools (e.g. agent_facts) ahead
+of time. Only source documents whose content changed are embedded again, and the vector
+index parameters follow the size of the corpus.
+
+When the index needs new parameters, the vectors are copied into a new collection which
+is indexed and then made active in the vector_indexes collection, so retrieval keeps
+using the current index during the rebuild. The previous collection is kept until the
+next rebuild, for the workers that have not looked up the active one again yet.
+
+Run it at deploy time with `python index_vector_stores.py`.
+"""
+"""Step 1: Import necessary modules"""
+import math
+import json
+import time
+import uuid
+import hashlib
+import logging
+from datetime import datetime, timezone
+from pydantic import ConfigDict
+from pymongo import ReplaceOne
+from langchain_core.retrievers import BaseRetriever
+from langchain_community.vectorstores.azure_cosmos_db import (
+    AzureCosmosDBVectorSearch,
+    CosmosDBSimilarityType,
+    CosmosDBVectorSearchType,
+)
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from services.azure_mongodb import MongoDBClient
+from utils.consts import VECTOR_INDEX_NAME, VECTOR_DIMENSIONS, VECTOR_STORE_REFRESH_SECONDS, VECTOR_STORE_COPY_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+"""Step 2: Define the helper functions"""
+def get_vector_store_name(collection_name: str) -> str:
+    # Also the id of the vector store's entry in the vector_indexes collection
+    return f"{collection_name}_vector_store"
+
+
+def get_active_vector_collection(collection_name: str):
+    """
+    Returns the collection currently holding the vectors of a vector store.
+    """
+    db = MongoDBClient.get_client()[MongoDBClient.get_db_name()]
+    name = get_vector_store_name(collection_name)
+    state = db["vector_indexes"].find_one({"_id": name}, {"collection": 1}) or {}
+    return db[state.get("collection") or name]
+
+
+def get_content_hash(content: dict) -> str:
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def get_index_parameters(document_count: int) -> dict:
+    """
+    Picks the IVF index parameters for a corpus size, following the Azure Cosmos DB
+    guidance: numLists = documentCount / 1000 up to a million documents, and
+    sqrt(documentCount) beyond. Small corpora get a single list (exact search).
+    """
+    if document_count <= 1_000_000:
+        num_lists = max(1, document_count // 1000)
+    else:
+        num_lists = int(math.sqrt(document_count))
+    return {
+        "num_lists": num_lists,
+        "dimensions": VECTOR_DIMENSIONS,
+        "similarity": CosmosDBSimilarityType.COS,
+        "kind": CosmosDBVectorSearchType.VECTOR_IVF,
+    }
+
+
+def get_vector_store(collection_name: str, embeddings_model) -> AzureCosmosDBVectorSearch:
+    """
+    Returns the active vector store of a collection on the shared MongoDB client.
+    """
+    return AzureCosmosDBVectorSearch(
+        collection=get_active_vector_collection(collection_name),
+        embedding=embeddings_model,
+        index_name=VECTOR_INDEX_NAME,
+    )
+
+
+class ActiveVectorStoreRetriever(BaseRetriever):
+    """
+    A retriever over the active vector store of a collection, looked up again every
+    VECTOR_STORE_REFRESH_SECONDS so a rebuilt index is picked up.
+    """
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    collection_name: str
+    embeddings: object
+    k: int = 3
+    vector_store: object = None
+    loaded_at: float = 0.0
+
+    def get_vector_store(self) -> AzureCosmosDBVectorSearch:
+        if self.vector_store is None or time.monotonic() - self.loaded_at >= VECTOR_STORE_REFRESH_SECONDS:
+            self.vector_store = get_vector_store(self.collection_name, self.embeddings)
+            self.loaded_at = time.monotonic()
+        return self.vector_store
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> list:
+        return self.get_vector_store().similarity_search(query, k=self.k)
+
+
+"""Step 3: Define the functions"""
+def copy_vector_collection(source, target) -> None:
+    batch = []
+    for doc in source.find({}):
+        batch.append(doc)
+        if len(batch) >= VECTOR_STORE_COPY_BATCH_SIZE:
+            target.insert_many(batch)
+            batch = []
+    if batch:
+        target.insert_many(batch)
+
+
+def ensure_vector_index(collection_name: str, embeddings_model, document_count: int) -> bool:
+    """
+    Creates the vector index, or rebuilds it in a new collection when the corpus grew or
+    shrank enough to need different parameters.
+
+    Returns:
+        bool: Whether an index was created.
+    """
+    vector_store = get_vector_store(collection_name, embeddings_model)
+    collection = vector_store.get_collection()
+    db = collection.database
+    state_id = get_vector_store_name(collection_name)
+    parameters = get_index_parameters(document_count)
+
+    index_names = [index["name"] for index in collection.list_indexes()]
+    state = db["vector_indexes"].find_one({"_id": state_id}) or {}
+    if VECTOR_INDEX_NAME in index_names and state.get("num_lists") == parameters["num_lists"]:
+        return False
+
+    if VECTOR_INDEX_NAME in index_names:
+        # Retrieval keeps using the current index while the new one is built
+        target = db[f"{state_id}_{uuid.uuid4().hex[:8]}"]
+        copy_vector_collection(collection, target)
+        vector_store = AzureCosmosDBVectorSearch(collection=target, embedding=embeddings_model, index_name=VECTOR_INDEX_NAME)
+    else:
+        # Nothing can be retrieved without an index, so it is created in place
+        target = collection
+
+    vector_store.create_index(
+        num_lists=parameters["num_lists"],
+        dimensions=parameters["dimensions"],
+        similarity=parameters["similarity"],
+        kind=parameters["kind"],
+    )
+    previous = collection.name if target.name != collection.name else state.get("previous_collection")
+    db["vector_indexes"].replace_one(
+        {"_id": state_id},
+        {
+            "collection": target.name,
+            "previous_collection": previous,
+            "num_lists": parameters["num_lists"],
+            "dimensions": parameters["dimensions"],
+            "document_count": document_count,
+            "created_at": datetime.now(timezone.utc),
+        },
+        upsert=True
+    )
+
+    # The collection before the previous one is no longer read by any worker
+    retired = state.get("previous_collection")
+    if retired and retired not in (previous, target.name):
+        db.drop_collection(retired)
+
+    logger.info(f"Created vector index on '{target.name}' with numLists={parameters['num_lists']} for {document_count} vectors.")
+    return True
+
+
+def build_vector_store(collection_name: str, embeddings_model, text_field: str = "fact", metadata_fields: tuple = ("sample_query",)) -> dict:
+    """
+    Brings the vector store of a collection in line with its documents: embeds the
+    documents that are new or changed, removes the vectors of deleted or changed ones,
+    and makes sure the vector index fits the corpus.
+
+    Args:
+        collection_name (str): The source collection, e.g. 'agent_facts'.
+        embeddings_model: The embeddings model (an AzureOpenAIEmbeddings instance).
+        text_field (str): The field holding the text to embed.
+        metadata_fields (tuple): Fields copied into the metadata of each vector.
+
+    Returns:
+        dict: The number of 'embedded', 'removed' and 'unchanged' source documents.
+    """
+    db = MongoDBClient.get_client()[MongoDBClient.get_db_name()]
+    vector_store = get_vector_store(collection_name, embeddings_model)
+    vector_collection = vector_store.get_collection()
+
+    # Hash the content of every source document
+    wanted = {}
+    projection = {field: 1 for field in (text_field, *metadata_fields)}
+    for doc in db[collection_name].find({}, projection):
+        text = (doc.get(text_field) or "").strip()
+        if not text:
+            continue
+        metadata = {field: doc.get(field, "") for field in metadata_fields}
+        wanted[get_content_hash({"text": text, "metadata": metadata})] = (text, metadata)
+
+    # Vectors written before content hashes were tracked are rebuilt
+    vector_collection.delete_many({"content_hash": {"$exists": False}})
+
+    existing_hashes = set(vector_collection.distinct("content_hash"))
+    stale_hashes = existing_hashes - set(wanted)
+    new_hashes = [content_hash for content_hash in wanted if content_hash not in existing_hashes]
+
+    if stale_hashes:
+        vector_collection.delete_many({"content_hash": {"$in": list(stale_hashes)}})
+
+    if new_hashes:
+        text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=1000,
+            chunk_overlap=20,
+            length_function=len,
+            is_separator_regex=False,
+        )
+        chunks = []
+        for content_hash in new_hashes:
+            text, metadata = wanted[content_hash]
+            for i, chunk in enumerate(text_splitter.split_text(text)):
+                chunks.append((f"{content_hash}-{i}", content_hash, chunk, metadata))
+
+        vectors = embeddings_model.embed_documents([chunk for _, _, chunk, _ in chunks])
+        # Ids derived from the content make concurrent builds idempotent
+        vector_collection.bulk_write([
+            ReplaceOne(
+                {"_id": chunk_id},
+                {"textContent": chunk, "vectorContent": vector, "metadata": metadata, "content_hash": content_hash},
+                upsert=True
+            )
+            for (chunk_id, content_hash, chunk, metadata), vector in zip(chunks, vectors)
+        ])
+
+    ensure_vector_index(collection_name, embeddings_model, vector_collection.count_documents({}))
+
+    stats = {"embedded": len(new_hashes), "removed": len(stale_hashes), "unchanged": len(wanted) - len(new_hashes)}
+    logger.info(f"Vector store '{vector_collection.name}' is up to date: {stats}")
+    return stats
@@ -0,0 +1,295 @@
+"""
+This module contains the shared HTTP sessions used for outbound API calls (Giphy, Open
+Library, Gutendex, Adzuna, Azure Translator): a requests session for synchronous code and
+an aiohttp session for the async agent path. Connections are kept alive and pooled per
+host, every request gets default connect/read timeouts, and connection errors and 429/5xx
+responses are retried with exponential backoff (honoring Retry-After, up to
+HTTP_MAX_RETRY_AFTER_SECONDS).
+"""
+
+"""Step 1: Import necessary modules"""
+import os
+import time
+import asyncio
+import logging
+import threading
+import weakref
+from urllib.parse import urlsplit
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from utils.consts import (
+    HTTP_CONNECT_TIMEOUT_SECONDS,
+    HTTP_READ_TIMEOUT_SECONDS,
+    HTTP_MAX_RETRIES,
+    HTTP_RETRY_BACKOFF_SECONDS,
+    HTTP_POOL_CONNECTIONS,
+    HTTP_POOL_MAXSIZE,
+    HTTP_MAX_RETRY_AFTER_SECONDS,
+)
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+"""Step 2: Define the helper functions"""
+def get_empty_host_metrics() -> dict:
+    return {"requests": 0, "errors": 0, "retries": 0, "total_seconds": 0.0, "connections": 0}
+
+
+def get_retry_after_delay(retry_after: float) -> float:
+    # An upstream asking to wait longer must not hold a worker for that long
+    return min(retry_after, HTTP_MAX_RETRY_AFTER_SECONDS)
+
+
+class BoundedRetry(Retry):
+    """
+    A urllib3 Retry that waits at most HTTP_MAX_RETRY_AFTER_SECONDS for a Retry-After.
+    """
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        return None if retry_after is None else get_retry_after_delay(retry_after)
+
+
+"""Step 3: Define the PooledHTTPAdapter class"""
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    An HTTPAdapter that applies a default timeout and records metrics per host.
+    """
+
+    def __init__(self, timeout: tuple, metrics: dict, metrics_lock: threading.Lock, **kwargs):
+        self.timeout = timeout
+        self.metrics = metrics
+        self.metrics_lock = metrics_lock
+        super().__init__(**kwargs)
+
+    def get_host_metrics(self, host: str) -> dict:
+        return self.metrics.setdefault(host, get_empty_host_metrics())
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+
+        host = urlsplit(request.url).netloc
+        started_at = time.perf_counter()
+        try:
+            response = super().send(request, **kwargs)
+        except Exception:
+            with self.metrics_lock:
+                host_metrics = self.get_host_metrics(host)
+                host_metrics["requests"] += 1
+                host_metrics["errors"] += 1
+                host_metrics["total_seconds"] += time.perf_counter() - started_at
+            raise
+
+        retries = getattr(response.raw, "retries", None)
+        with self.metrics_lock:
+            host_metrics = self.get_host_metrics(host)
+            host_metrics["requests"] += 1
+            host_metrics["errors"] += response.status_code >= 400
+            host_metrics["retries"] += len(retries.history) if retries else 0
+            host_metrics["total_seconds"] += time.perf_counter() - started_at
+        return response
+
+
+"""Step 4: Define the HttpClient class"""
+class HttpClient:
+    """
+    The process-wide HTTP session. It is created lazily, and again after a fork, since
+    pooled sockets must not be shared between processes. Calls bounded by a deadline
+    use a second session that makes a single attempt.
+    """
+    _session = None
+    _single_attempt_session = None
+    _pid = None
+    _metrics: dict = {}
+    _metrics_lock = threading.Lock()
+    _lock = threading.Lock()
+
+    @classmethod
+    def create_session(
+        cls,
+        timeout: tuple = (HTTP_CONNECT_TIMEOUT_SECONDS, HTTP_READ_TIMEOUT_SECONDS),
+        max_retries: int = HTTP_MAX_RETRIES,
+        backoff: float = HTTP_RETRY_BACKOFF_SECONDS,
+    ) -> requests.Session:
+        retry = BoundedRetry(
+            total=max_retries,
+            # A read timeout is not retried: the request may have been processed, and
+            # retrying would multiply the wait
+            read=False,
+            backoff_factor=backoff,
+            status_forcelist=RETRY_STATUS_CODES,
+            # Translation requests are idempotent, so POSTs are retried too
+            allowed_methods=frozenset({"GET", "HEAD", "POST"}),
+            respect_retry_after_header=True,
+            # Return the last response instead of raising, so callers handle it as usual
+            raise_on_status=False,
+        )
+        adapter = PooledHTTPAdapter(
+            timeout=timeout,
+            metrics=cls._metrics,
+            metrics_lock=cls._metrics_lock,
+            pool_connections=HTTP_POOL_CONNECTIONS,
+            pool_maxsize=HTTP_POOL_MAXSIZE,
+            max_retries=retry,
+        )
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    @classmethod
+    def get_session(cls, retries: bool = True) -> requests.Session:
+        """
+        Returns the shared session, or with retries=False the one that does not retry,
+        for calls whose total time must stay within their timeout.
+        """
+        with cls._lock:
+            if cls._pid != os.getpid():
+                cls._session = cls._single_attempt_session = None
+                cls._pid = os.getpid()
+            if retries:
+                if cls._session is None:
+                    cls._session = cls.create_session()
+                    logging.info("Created the shared HTTP session.")
+                return cls._session
+            if cls._single_attempt_session is None:
+                cls._single_attempt_session = cls.create_session(max_retries=0)
+            return cls._single_attempt_session
+
+    @classmethod
+    def get_metrics(cls) -> dict:
+        """
+        Returns the metrics per host, for both sessions: requests, errors (4xx/5xx or
+        exceptions), retries, total_seconds and connections (TCP/TLS connections opened
+        in this process).
+        """
+        with cls._metrics_lock:
+            metrics = {host: dict(values) for host, values in cls._metrics.items()}
+
+        for session in (cls._session, cls._single_attempt_session):
+            if session is None:
+                continue
+            for adapter in {id(a): a for a in session.adapters.values()}.values():
+                pools = adapter.poolmanager.pools
+                for pool_key in pools.keys():
+                    pool = pools.get(pool_key)
+                    if pool is None:
+                        continue
+                    port = pool.port
+                    default_port = 443 if pool.scheme == "https" else 80
+                    host = pool.host if port in (None, default_port) else f"{pool.host}:{port}"
+                    metrics.setdefault(host, get_empty_host_metrics())
+                    metrics[host]["connections"] += pool.num_connections
+        return metrics
+
+    @classmethod
+    def reset(cls) -> None:
+        with cls._lock:
+            for session in (cls._session, cls._single_attempt_session):
+                if session is not None:
+                    session.close()
+            cls._session = cls._single_attempt_session = None
+            cls._pid = None
+        with cls._metrics_lock:
+            cls._metrics.clear()
+
+
+"""Step 5: Define the AsyncHttpClient class"""
+class AsyncHttpClient:
+    """
+    The aiohttp counterpart of HttpClient, with the same timeouts, retries and metrics.
+    aiohttp sessions are bound to an event loop, so there is one session per loop.
+    """
+    _sessions = weakref.WeakKeyDictionary()
+    _lock = threading.Lock()
+
+    @classmethod
+    def create_session(cls, timeout: tuple = (HTTP_CONNECT_TIMEOUT_SECONDS, HTTP_READ_TIMEOUT_SECONDS)) -> aiohttp.ClientSession:
+        async def on_connection_create_end(session, context, params):
+            # The request passes its host along, see request_json()
+            host = context.trace_request_ctx["host"]
+            with HttpClient._metrics_lock:
+                HttpClient._metrics.setdefault(host, get_empty_host_metrics())["connections"] += 1
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        connect_timeout, read_timeout = timeout
+        return aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit_per_host=HTTP_POOL_MAXSIZE),
+            timeout=aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout),
+            trace_configs=[trace_config],
+        )
+
+    @classmethod
+    def get_session(cls) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        with cls._lock:
+            session = cls._sessions.get(loop)
+            if session is None or session.closed:
+                session = cls._sessions[loop] = cls.create_session()
+            return session
+
+    @classmethod
+    async def request_json(
+        cls,
+        method: str,
+        url: str,
+        params: dict = None,
+        json: dict | list = None,
+        headers: dict = None,
+        max_retries: int = HTTP_MAX_RETRIES,
+        backoff: float = HTTP_RETRY_BACKOFF_SECONDS,
+    ):
+        """
+        Sends a request and returns its JSON body, retrying connection errors and
+        429/5xx responses. Raises aiohttp.ClientResponseError for error responses.
+        """
+        session = cls.get_session()
+        host = urlsplit(url).netloc
+        started_at = time.perf_counter()
+        retries = 0
+        try:
+            while True:
+                try:
+                    async with session.request(method, url, params=params, json=json, headers=headers, trace_request_ctx={"host": host}) as response:
+                        if response.status in RETRY_STATUS_CODES and retries < max_retries:
+                            retry_after = response.headers.get("Retry-After", "")
+                            delay = get_retry_after_delay(float(retry_after)) if retry_after.isdigit() else backoff * (2 ** retries)
+                        else:
+                            response.raise_for_status()
+                            return await response.json(content_type=None)
+                except aiohttp.ClientConnectionError as e:
+                    # As in HttpClient, read timeouts are not retried
+                    if isinstance(e, aiohttp.SocketTimeoutError) or retries >= max_retries:
+                        raise
+                    delay = backoff * (2 ** retries)
+                retries += 1
+                await asyncio.sleep(delay)
+        except Exception:
+            with HttpClient._metrics_lock:
+                HttpClient._metrics.setdefault(host, get_empty_host_metrics())["errors"] += 1
+            raise
+        finally:
+            with HttpClient._metrics_lock:
+                host_metrics = HttpClient._metrics.setdefault(host, get_empty_host_metrics())
+                host_metrics["requests"] += 1
+                host_metrics["retries"] += retries
+                host_metrics["total_seconds"] += time.perf_counter() - started_at
+
+    @classmethod
+    async def get_json(cls, url: str, params: dict = None, headers: dict = None):
+        return await cls.request_json("GET", url, params=params, headers=headers)
+
+    @classmethod
+    async def close(cls) -> None:
+        """
+        Closes the session of the running event loop, e.g. on server shutdown.
+        """
+        loop = asyncio.get_running_loop()
+        with cls._lock:
+            session = cls._sessions.pop(loop, None)
+        if session is not None:
+            await session.close()
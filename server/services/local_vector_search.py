@@ -0,0 +1,229 @@
+"""
+This module contains an in-process vector search engine, an alternative to Azure Cosmos DB
+vector search for small corpora such as agent_facts. Vectors are exported once from the
+MongoDB vector store (no embedding calls) into a float32 matrix that is memory-mapped by
+every worker, and searched by brute-force cosine similarity or, when hnswlib is installed,
+an HNSW index.
+
+Select it with RETRIEVER_BACKEND=local (and LOCAL_VECTOR_INDEX=hnsw for HNSW).
+"""
+
+"""Step 1: Import necessary modules"""
+import os
+import json
+import time
+import shutil
+import logging
+import numpy as np
+from pydantic import ConfigDict
+from langchain.schema import Document
+from langchain_core.retrievers import BaseRetriever
+from services.db.vector_index import get_active_vector_collection
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+LOCAL_VECTOR_INDEX_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'vector_indexes'))
+
+
+"""Step 2: Define the helper functions"""
+def get_retriever_backend() -> str:
+    """
+    Returns the backend of the retriever tools: 'cosmos' (default) or 'local'.
+    """
+    return os.getenv("RETRIEVER_BACKEND", "cosmos").lower()
+
+
+def normalize(vectors) -> np.ndarray:
+    """
+    Returns the vectors as float32 rows of unit length (zero vectors are left as they are).
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+"""Step 3: Define the LocalVectorIndex class"""
+class LocalVectorIndex:
+    """
+    A read-only vector index stored as `<name>/<version>/vectors.npy` (normalized float32
+    vectors) and `<name>/<version>/documents.json` (the text and metadata of each vector).
+    `<name>/CURRENT` holds the version to read, so an export replaces both files at once.
+    """
+
+    def __init__(self, vectors: np.ndarray, texts: list[str], metadatas: list[dict], use_hnsw: bool = False):
+        self.vectors = vectors
+        self.texts = texts
+        self.metadatas = metadatas
+        self.hnsw = None
+
+        if use_hnsw and len(texts) > 0:
+            if hnswlib is None:
+                logging.warning("hnswlib is not installed; using brute-force vector search.")
+            else:
+                self.hnsw = hnswlib.Index(space="ip", dim=vectors.shape[1])
+                self.hnsw.init_index(max_elements=len(texts), ef_construction=200, M=16)
+                self.hnsw.add_items(np.asarray(vectors), np.arange(len(texts)))
+                self.hnsw.set_ef(64)
+
+    @staticmethod
+    def get_pointer_path(directory: str, name: str) -> str:
+        return os.path.join(directory, name, "CURRENT")
+
+    @staticmethod
+    def get_paths(directory: str, name: str, version: str) -> tuple[str, str]:
+        version_dir = os.path.join(directory, name, version)
+        return os.path.join(version_dir, "vectors.npy"), os.path.join(version_dir, "documents.json")
+
+    @classmethod
+    def get_version(cls, directory: str, name: str) -> str | None:
+        """
+        Returns the current version of an index, or None if it was never written.
+        """
+        try:
+            with open(cls.get_pointer_path(directory, name), encoding="utf-8") as file:
+                return file.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    @classmethod
+    def write(cls, directory: str, name: str, vectors, texts: list[str], metadatas: list[dict]) -> str:
+        """
+        Writes a new version of an index and makes it the current one.
+
+        Returns:
+            str: The new version.
+        """
+        # Versions sort by creation time
+        version = f"{time.time_ns()}-{os.getpid()}"
+        vectors_path, documents_path = cls.get_paths(directory, name, version)
+        os.makedirs(os.path.dirname(vectors_path))
+        np.save(vectors_path, normalize(vectors) if len(texts) else np.zeros((0, 0), dtype=np.float32))
+        with open(documents_path, "w", encoding="utf-8") as file:
+            json.dump({"texts": texts, "metadatas": metadatas}, file, default=str)
+
+        # Readers follow the pointer, so they see the old or the new files, never a mix
+        previous_version = cls.get_version(directory, name)
+        pointer_path = cls.get_pointer_path(directory, name)
+        with open(f"{pointer_path}.{version}.tmp", "w", encoding="utf-8") as file:
+            file.write(version)
+        os.replace(f"{pointer_path}.{version}.tmp", pointer_path)
+
+        # The previous version is kept for the workers still loading it
+        oldest_kept = min(filter(None, [previous_version, version]))
+        for entry in os.listdir(os.path.join(directory, name)):
+            entry_path = os.path.join(directory, name, entry)
+            if os.path.isdir(entry_path) and entry < oldest_kept:
+                shutil.rmtree(entry_path, ignore_errors=True)
+        return version
+
+    @classmethod
+    def exists(cls, directory: str, name: str) -> bool:
+        return cls.get_version(directory, name) is not None
+
+    @classmethod
+    def load(cls, directory: str, name: str, use_hnsw: bool = False, version: str = None) -> "LocalVectorIndex":
+        vectors_path, documents_path = cls.get_paths(directory, name, version or cls.get_version(directory, name))
+        vectors = np.load(vectors_path, mmap_mode="r")
+        with open(documents_path, encoding="utf-8") as file:
+            documents = json.load(file)
+        return cls(vectors, documents["texts"], documents["metadatas"], use_hnsw=use_hnsw)
+
+    def search(self, query_vector, k: int) -> list[tuple[int, float]]:
+        """
+        Returns the (position, cosine similarity) of the k nearest vectors, best first.
+        """
+        if not self.texts or k <= 0:
+            return []
+        k = min(k, len(self.texts))
+        query = normalize(query_vector)
+
+        if self.hnsw is not None:
+            labels, distances = self.hnsw.knn_query(query, k=k)
+            return [(int(label), 1.0 - float(distance)) for label, distance in zip(labels[0], distances[0])]
+
+        scores = self.vectors @ query[0]
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top]
+
+    def similarity_search(self, query_vector, k: int) -> list[Document]:
+        return [
+            Document(page_content=self.texts[i], metadata=dict(self.metadatas[i]))
+            for i, _ in self.search(query_vector, k)
+        ]
+
+
+"""Step 4: Define the LocalVectorStoreRetriever class"""
+class LocalVectorStoreRetriever(BaseRetriever):
+    """
+    A LangChain retriever over a LocalVectorIndex, which is reloaded when a new version
+    of the index is exported.
+    """
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    directory: str
+    name: str
+    index: LocalVectorIndex
+    version: str
+    embeddings: object
+    k: int = 3
+    use_hnsw: bool = False
+
+    def get_index(self) -> LocalVectorIndex:
+        version = LocalVectorIndex.get_version(self.directory, self.name)
+        if version is not None and version != self.version:
+            logging.info(f"Reloading the local vector index of '{self.name}' (version {version}).")
+            self.index = LocalVectorIndex.load(self.directory, self.name, use_hnsw=self.use_hnsw, version=version)
+            self.version = version
+        return self.index
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> list[Document]:
+        return self.get_index().similarity_search(self.embeddings.embed_query(query), self.k)
+
+
+"""Step 5: Define the export functions"""
+def export_local_vector_index(collection_name: str, directory: str = LOCAL_VECTOR_INDEX_DIR) -> int:
+    """
+    Copies the vectors of a collection's MongoDB vector store (built by
+    services/db/vector_index.py) into a local index.
+
+    Returns:
+        int: The number of exported vectors.
+    """
+    cursor = get_active_vector_collection(collection_name).find({}, {"textContent": 1, "vectorContent": 1, "metadata": 1}).sort("_id", 1)
+
+    vectors, texts, metadatas = [], [], []
+    for doc in cursor:
+        vectors.append(doc["vectorContent"])
+        texts.append(doc.get("textContent", ""))
+        metadatas.append(doc.get("metadata", {}))
+
+    LocalVectorIndex.write(directory, collection_name, vectors, texts, metadatas)
+    logging.info(f"Exported {len(texts)} vectors of '{collection_name}' to the local vector index.")
+    return len(texts)
+
+
+def get_local_retriever(collection_name: str, embeddings, top_k: int = 3, directory: str = LOCAL_VECTOR_INDEX_DIR) -> LocalVectorStoreRetriever:
+    """
+    Returns a retriever over the local index of a collection, exporting it first if needed.
+    """
+    if not LocalVectorIndex.exists(directory, collection_name):
+        export_local_vector_index(collection_name, directory)
+    use_hnsw = os.getenv("LOCAL_VECTOR_INDEX", "flat").lower() == "hnsw"
+    version = LocalVectorIndex.get_version(directory, collection_name)
+    index = LocalVectorIndex.load(directory, collection_name, use_hnsw=use_hnsw, version=version)
+    return LocalVectorStoreRetriever(
+        directory=directory,
+        name=collection_name,
+        index=index,
+        version=version,
+        embeddings=embeddings,
+        k=top_k,
+        use_hnsw=use_hnsw,
+    )
@@ -4,7 +4,12 @@ import os
 from google.cloud import translate_v2 as translate
 from dotenv import load_dotenv
 import logging
-from cachetools import TTLCache, cached
+import hashlib
+import threading
+import unicodedata
+from cachetools import LRUCache
+from services.db.translation_cache import find_cached_translations, store_translations
+from utils.consts import TRANSLATION_BATCH_SIZE, TRANSLATION_CACHE_MEMORY_SIZE
 
 # Load environment variables
 load_dotenv()
@@ -38,10 +43,107 @@ class Translator:
             logging.error(f"Translation error: {e}")
             return text  # Fallback to original text if translation fails
 
-# Initialize cache with a maximum of 1000 items and a TTL of 1 hour (3600 seconds)
-cache = TTLCache(maxsize=1000, ttl=3600)
+    @staticmethod
+    def translate_texts(texts, target_language):
+        """
+        Translates a list of texts with one request per TRANSLATION_BATCH_SIZE texts.
+        Unlike translate_text, errors are raised to the caller.
+        """
+        client = Translator.get_client()
+        translations = []
+        for start in range(0, len(texts), TRANSLATION_BATCH_SIZE):
+            results = client.translate(texts[start:start + TRANSLATION_BATCH_SIZE], target_language=target_language)
+            translations.extend(result['translatedText'] for result in results)
+        return translations
+
+
+""" Step 3: Define the TranslationCache class """
+class TranslationCache:
+    """
+    Two-tier cache of translations keyed by the SHA-256 of the target language and the
+    normalized text: a per-worker LRU in front of a shared MongoDB collection with a TTL
+    index (see services/db/translation_cache.py). Hits and misses are counted per language.
+    """
+    _memory = LRUCache(maxsize=TRANSLATION_CACHE_MEMORY_SIZE)
+    _stats: dict = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def normalize_text(text):
+        return unicodedata.normalize("NFC", text).strip()
+
+    @classmethod
+    def get_cache_key(cls, text, target_language):
+        return hashlib.sha256(f"{target_language}\n{cls.normalize_text(text)}".encode("utf-8")).hexdigest()
+
+    @classmethod
+    def record(cls, target_language, outcome, count):
+        if not count:
+            return
+        with cls._lock:
+            language_stats = cls._stats.setdefault(target_language, {"memory_hits": 0, "store_hits": 0, "misses": 0})
+            language_stats[outcome] += count
+
+    @classmethod
+    def get_many(cls, texts, target_language):
+        """
+        Returns the cached translations among the given texts, as {text: translation}.
+        """
+        keys = {text: cls.get_cache_key(text, target_language) for text in dict.fromkeys(texts)}
+        translations = {}
+        with cls._lock:
+            for text, key in keys.items():
+                translation = cls._memory.get(key)
+                if translation is not None:
+                    translations[text] = translation
+        cls.record(target_language, "memory_hits", len(translations))
+
+        missing = {key: text for text, key in keys.items() if text not in translations}
+        stored = {}
+        if missing:
+            try:
+                stored = find_cached_translations(list(missing))
+            except Exception as e:
+                logging.error(f"Error reading the translation cache: {e}")
+            with cls._lock:
+                for key, translation in stored.items():
+                    cls._memory[key] = translation
+            translations.update({missing[key]: translation for key, translation in stored.items()})
+
+        cls.record(target_language, "store_hits", len(stored))
+        cls.record(target_language, "misses", len(missing) - len(stored))
+        return translations
+
+    @classmethod
+    def put_many(cls, translations, target_language):
+        translations_by_key = {cls.get_cache_key(text, target_language): translation for text, translation in translations.items()}
+        with cls._lock:
+            cls._memory.update(translations_by_key)
+        try:
+            store_translations(translations_by_key, target_language)
+        except Exception as e:
+            logging.error(f"Error writing the translation cache: {e}")
 
-@cached(cache)
+    @classmethod
+    def get_stats(cls):
+        """
+        Returns the hit and miss counters of this worker per target language.
+        """
+        with cls._lock:
+            stats = {language: dict(counters) for language, counters in cls._stats.items()}
+        for counters in stats.values():
+            lookups = sum(counters.values())
+            counters["hit_rate"] = (counters["memory_hits"] + counters["store_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._memory.clear()
+            cls._stats.clear()
+
+
+""" Step 4: Define the cached translation functions """
 def translate_text_cached(text, target_language):
     """
     Translate text using the Translator service with caching.
@@ -53,4 +155,34 @@ def translate_text_cached(text, target_language):
     Returns:
         str: Translated text.
     """
-    return Translator.translate_text(text, target_language)
\ No newline at end of file
+    return translate_texts_cached([text], target_language)[0]
+
+
+def translate_texts_cached(texts, target_language):
+    """
+    Translate a list of texts, sending only the distinct texts missing from the cache
+    to the Translator service, in a single batch.
+
+    Args:
+        texts (list[str]): The texts to translate.
+        target_language (str): The target language code (ISO 639-1).
+
+    Returns:
+        list[str]: The translated texts, in order. Texts that could not be translated
+            are returned as is.
+    """
+    translations = TranslationCache.get_many(texts, target_language)
+
+    missing = list(dict.fromkeys(text for text in texts if text not in translations))
+    if missing:
+        try:
+            translated = dict(zip(missing, Translator.translate_texts(missing, target_language)))
+        except Exception as e:
+            logging.error(f"Translation error: {e}")
+            translated = {}
+
+        # Failed translations are not cached, so they are retried next time
+        TranslationCache.put_many(translated, target_language)
+        translations.update(translated)
+
+    return [translations.get(text, text) for text in texts]
@@ -0,0 +1,91 @@
+"""
+This module builds the translated bundles of the frontend's static texts. Each bundle
+covers the whole registered catalog for one language and is translated once: it is
+stored in MongoDB under the catalog version and kept in memory by every worker.
+"""
+
+"""Step 1: Import necessary modules"""
+import hashlib
+import threading
+from services.azure_translator import translate_texts
+from services.db.ui_bundles import find_ui_bundle, store_ui_bundle
+from utils.ui_strings import UI_STRINGS
+
+
+"""Step 2: Define the UIBundles class"""
+class UIBundles:
+    """
+    Registry of the UI strings and cache of their bundles by language. The catalog
+    version is a hash of the strings, so registering new strings leads to new bundles
+    (and new ETags) while unchanged catalogs reuse the stored ones.
+    """
+    _strings: dict = {}  # text -> None, an ordered set
+    _version = None
+    _bundles: dict = {}  # language -> {"version": ..., "translations": {...}}
+    _build_locks: dict = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def register(cls, texts):
+        with cls._lock:
+            for text in texts:
+                text = text.strip()
+                if text and text not in cls._strings:
+                    cls._strings[text] = None
+                    cls._version = None
+
+    @classmethod
+    def get_strings(cls) -> list[str]:
+        with cls._lock:
+            return list(cls._strings)
+
+    @classmethod
+    def get_version(cls) -> str:
+        with cls._lock:
+            if cls._version is None:
+                catalog = "\n".join(cls._strings)
+                cls._version = hashlib.sha256(catalog.encode("utf-8")).hexdigest()[:16]
+            return cls._version
+
+    @classmethod
+    def get_bundle(cls, language: str) -> dict:
+        """
+        Returns the bundle of a language as {"language", "version", "translations"}, building
+        it on first use.
+
+        Raises:
+            requests.exceptions.RequestException: If the bundle had to be translated and
+                Azure Translator failed.
+        """
+        version = cls.get_version()
+        bundle = cls._bundles.get(language)
+        if bundle is None or bundle["version"] != version:
+            with cls._lock:
+                build_lock = cls._build_locks.setdefault(language, threading.Lock())
+            # Concurrent requests for a new language wait for a single build
+            with build_lock:
+                bundle = cls._bundles.get(language)
+                if bundle is None or bundle["version"] != version:
+                    bundle = {"version": version, "translations": cls.build(language, version)}
+                    cls._bundles[language] = bundle
+        return {"language": language, "version": bundle["version"], "translations": bundle["translations"]}
+
+    @classmethod
+    def build(cls, language: str, version: str) -> dict[str, str]:
+        strings = cls.get_strings()
+        if language == "en":
+            return {text: text for text in strings}
+
+        translations = find_ui_bundle(language, version)
+        if translations is None:
+            translations = dict(zip(strings, translate_texts(strings, language)))
+            store_ui_bundle(language, version, translations)
+        return translations
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._bundles.clear()
+
+
+UIBundles.register(UI_STRINGS)
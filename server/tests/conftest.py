@@ -1,7 +1,24 @@
 import sys
 import os
 
+import mongomock
+import pytest
+
 # Add the project root to sys.path
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 if project_root not in sys.path:
-    sys.path.insert(0, project_root)
\ No newline at end of file
+    sys.path.insert(0, project_root)
+
+from services.azure_mongodb import MongoDBClient
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """
+    A fresh mongomock database used through MongoDBClient, with the indexes of every
+    collection created again on first use.
+    """
+    client = mongomock.MongoClient()
+    monkeypatch.setattr(MongoDBClient, "_client", client)
+    monkeypatch.setattr(MongoDBClient, "_indexed_collections", set())
+    return client[MongoDBClient.get_db_name()]
@@ -0,0 +1,91 @@
+import threading
+
+import pytest
+import requests
+
+from services import azure_translator
+from services.http_client import HttpClient
+from services.translator import TranslationCache
+from services.azure_translator import split_into_batches, translate_texts
+
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200):
+        self.payload = payload
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} error")
+
+    def json(self):
+        return self.payload
+
+
+class FakeSession:
+    def __init__(self, fail_on=None):
+        self.batches = []
+        self.fail_on = fail_on
+        self.lock = threading.Lock()
+
+    def post(self, url, params, headers, json):
+        texts = [item["text"] for item in json]
+        with self.lock:
+            self.batches.append(texts)
+        if self.fail_on in texts:
+            return FakeResponse({"error": "bad request"}, status_code=400)
+        return FakeResponse([{"translations": [{"text": f"[{params['to']}] {text}"}]} for text in texts])
+
+
+@pytest.fixture
+def session(db, monkeypatch):
+    monkeypatch.setenv("AZURE_TRANSLATOR_KEY", "key")
+    monkeypatch.setenv("AZURE_TRANSLATOR_ENDPOINT", "https://translator.test")
+    TranslationCache.clear()
+    session = FakeSession()
+    monkeypatch.setattr(HttpClient, "get_session", classmethod(lambda cls: session))
+    yield session
+    TranslationCache.clear()
+
+
+def test_batches_respect_element_and_character_limits():
+    texts = ["a" * 4, "b" * 4, "c" * 4, "d", "e" * 20, "f"]
+    assert split_into_batches(texts, max_elements=3, max_chars=10) == [
+        ["aaaa", "bbbb"], ["cccc", "d"], ["e" * 20], ["f"],
+    ]
+    assert split_into_batches([], max_elements=3, max_chars=10) == []
+
+
+def test_duplicates_are_sent_once_and_order_is_kept(session, monkeypatch):
+    monkeypatch.setattr(azure_translator, "split_into_batches", lambda texts: [texts[i:i + 2] for i in range(0, len(texts), 2)])
+
+    texts = ["one", "two", "one", "three", "four", "five", "two"]
+    assert translate_texts(texts, "es") == [f"[es] {text}" for text in texts]
+    assert sorted(text for batch in session.batches for text in batch) == ["five", "four", "one", "three", "two"]
+    assert all(len(batch) <= 2 for batch in session.batches)
+
+
+def test_cached_translations_skip_the_api(session):
+    translate_texts(["Hello", "Bye"], "fr")
+    session.batches.clear()
+
+    assert translate_texts(["Bye", "Thanks", "Hello"], "fr") == ["[fr] Bye", "[fr] Thanks", "[fr] Hello"]
+    assert session.batches == [["Thanks"]]
+
+    session.batches.clear()
+    translate_texts(["Hello", "Thanks"], "fr")
+    assert session.batches == []
+
+
+def test_successful_batches_are_cached_when_another_fails(session, monkeypatch):
+    monkeypatch.setattr(azure_translator, "split_into_batches", lambda texts: [[text] for text in texts])
+    session.fail_on = "broken"
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        translate_texts(["fine", "broken"], "de")
+
+    session.batches.clear()
+    session.fail_on = None
+    assert translate_texts(["fine", "broken"], "de") == ["[de] fine", "[de] broken"]
+    assert session.batches == [["broken"]]
+
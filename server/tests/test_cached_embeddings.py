@@ -0,0 +1,81 @@
+import threading
+
+import pytest
+
+from services.cached_embeddings import CachedEmbeddings
+
+
+class CountingEmbeddings:
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text)), 0.5] for text in texts]
+
+
+def test_repeated_and_normalized_texts_are_embedded_once(db):
+    model = CountingEmbeddings()
+    embeddings = CachedEmbeddings(model, "test-model")
+
+    first = embeddings.embed_query("Who built you?")
+    again = embeddings.embed_query("  Who   built you? ")
+    documents = embeddings.embed_documents(["Who built you?", "What can you do?", "What can you do?"])
+
+    assert first == again == documents[0] == [14.0, 0.5]
+    assert model.calls == [["Who built you?"], ["What can you do?"]]
+    assert embeddings.stats["memory_hits"] == 2
+
+
+def test_shared_store_serves_a_cold_worker(db):
+    CachedEmbeddings(CountingEmbeddings(), "test-model").embed_query("hello")
+    model = CountingEmbeddings()
+
+    assert CachedEmbeddings(model, "test-model").embed_query("hello") == [5.0, 0.5]
+    assert model.calls == []
+
+
+def test_models_do_not_share_vectors(db):
+    CachedEmbeddings(CountingEmbeddings(), "model-a").embed_query("hello")
+    model = CountingEmbeddings()
+
+    CachedEmbeddings(model, "model-b").embed_query("hello")
+
+    assert model.calls == [["hello"]]
+
+
+def test_concurrent_requests_share_one_api_call(db, monkeypatch):
+    import services.cached_embeddings as cached_embeddings
+    monkeypatch.setattr(cached_embeddings, "EMBEDDING_BATCH_WINDOW_SECONDS", 0.2)
+    model = CountingEmbeddings()
+    embeddings = CachedEmbeddings(model, "test-model", persistent=False)
+    texts = ["a", "bb", "ccc", "bb"]
+    results = {}
+
+    def embed(text):
+        results[text] = embeddings.embed_query(text)
+
+    threads = [threading.Thread(target=embed, args=(text,)) for text in texts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(model.calls) == 1
+    assert sorted(model.calls[0]) == ["a", "bb", "ccc"]
+    assert results["ccc"] == [3.0, 0.5]
+
+
+def test_failed_api_call_is_not_cached(db):
+    class FailingOnce(CountingEmbeddings):
+        def embed_documents(self, texts):
+            if not self.calls:
+                self.calls.append(texts)
+                raise RuntimeError("rate limited")
+            return super().embed_documents(texts)
+
+    embeddings = CachedEmbeddings(FailingOnce(), "test-model")
+
+    with pytest.raises(RuntimeError):
+        embeddings.embed_query("hello")
+    assert embeddings.embed_query("hello") == [5.0, 0.5]
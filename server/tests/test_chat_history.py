@@ -0,0 +1,88 @@
+import asyncio
+import json
+import threading
+
+import mongomock
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, message_to_dict
+
+from services.db.chat_history import ChatSessionSnapshot, PooledMongoDBChatMessageHistory
+
+
+def test_messages_are_appended_and_read_in_order(db):
+    history = PooledMongoDBChatMessageHistory("u1-1")
+    history.add_messages([HumanMessage(content="hi"), AIMessage(content="hello")])
+    history.add_messages([HumanMessage(content="how are you?"), AIMessage(content="great")])
+    PooledMongoDBChatMessageHistory("u1-2").add_messages([HumanMessage(content="other chat")])
+
+    messages = PooledMongoDBChatMessageHistory("u1-1").messages
+
+    assert [message.content for message in messages] == ["hi", "hello", "how are you?", "great"]
+    assert isinstance(messages[0], HumanMessage) and isinstance(messages[1], AIMessage)
+
+
+def test_reads_turns_stored_by_langchain_history(db):
+    # Same document format as langchain's MongoDBChatMessageHistory
+    db["chat_turns"].insert_one({"SessionId": "u1-1", "History": json.dumps(message_to_dict(HumanMessage(content="old turn")))})
+
+    assert PooledMongoDBChatMessageHistory("u1-1").messages[0].content == "old turn"
+
+
+def test_uses_the_shared_client(db, monkeypatch):
+    created = []
+    monkeypatch.setattr(mongomock, "MongoClient", lambda *args, **kwargs: created.append(args))
+
+    PooledMongoDBChatMessageHistory("u1-1").add_messages([HumanMessage(content="hi")])
+    PooledMongoDBChatMessageHistory("u1-1").messages
+
+    assert created == []
+
+
+def test_clear_removes_only_the_session(db):
+    PooledMongoDBChatMessageHistory("u1-1").add_messages([HumanMessage(content="a")])
+    PooledMongoDBChatMessageHistory("u1-2").add_messages([HumanMessage(content="b")])
+
+    PooledMongoDBChatMessageHistory("u1-1").clear()
+
+    assert PooledMongoDBChatMessageHistory("u1-1").messages == []
+    assert len(PooledMongoDBChatMessageHistory("u1-2").messages) == 1
+
+
+class CountingHistory(PooledMongoDBChatMessageHistory):
+    reads = 0
+
+    @property
+    def messages(self):
+        CountingHistory.reads += 1
+        return super().messages
+
+
+def test_snapshot_reads_the_history_once_and_writes_through(db):
+    PooledMongoDBChatMessageHistory("u1-1").add_messages([HumanMessage(content="hi"), AIMessage(content="hello")])
+    CountingHistory.reads = 0
+    snapshot = ChatSessionSnapshot("u1-1", CountingHistory("u1-1"))
+
+    assert len(snapshot.messages) == 2
+    snapshot.add_messages([HumanMessage(content="again"), AIMessage(content="sure")])
+    assert [message.content for message in snapshot.messages] == ["hi", "hello", "again", "sure"]
+
+    assert CountingHistory.reads == 1
+    assert len(PooledMongoDBChatMessageHistory("u1-1").messages) == 4
+
+
+def test_snapshot_async_read_runs_off_the_event_loop(db):
+    PooledMongoDBChatMessageHistory("u1-1").add_messages([HumanMessage(content="hi")])
+    loop_thread = threading.get_ident()
+    read_threads = []
+
+    class ThreadRecordingHistory(PooledMongoDBChatMessageHistory):
+        @property
+        def messages(self):
+            read_threads.append(threading.get_ident())
+            return super().messages
+
+    snapshot = ChatSessionSnapshot("u1-1", ThreadRecordingHistory("u1-1"))
+    messages = asyncio.run(snapshot.aget_messages())
+
+    assert [message.content for message in messages] == ["hi"]
+    assert read_threads and loop_thread not in read_threads
@@ -0,0 +1,97 @@
+import os
+
+import pytest
+
+from agents import document_index
+from agents.document_index import DocumentIndex, DocumentIndexStore
+
+
+class KeywordEmbeddings:
+    """Deterministic embeddings: one dimension per keyword."""
+    keywords = ["plants", "light", "cats", "dogs", "water"]
+
+    def __init__(self):
+        self.embedded_documents = 0
+
+    def embed(self, text):
+        words = text.lower().split()
+        return [float(words.count(keyword)) for keyword in self.keywords]
+
+    def embed_documents(self, texts):
+        self.embedded_documents += len(texts)
+        return [self.embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self.embed(text)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(DocumentIndexStore, "index_dir", str(tmp_path))
+    # Small chunks so a short text splits into several
+    monkeypatch.setattr(document_index, "split_document", lambda text: [line for line in text.split("\n") if line])
+    DocumentIndexStore.clear()
+    yield DocumentIndexStore
+    DocumentIndexStore.clear()
+
+
+DOCUMENT = "cats chase dogs\nplants need light\nplants need water\ndogs like water"
+
+
+def test_retrieve_returns_most_similar_chunks_first(store):
+    embeddings = KeywordEmbeddings()
+    store.add_document("u1-1", DOCUMENT, embeddings)
+
+    assert store.retrieve("u1-1", "do plants need light", embeddings, k=2) == ["plants need light", "plants need water"]
+
+
+def test_same_document_is_embedded_once_per_chat(store):
+    embeddings = KeywordEmbeddings()
+    store.add_document("u1-1", DOCUMENT, embeddings)
+    store.add_document("u1-1", DOCUMENT, embeddings)
+
+    assert embeddings.embedded_documents == 4
+
+
+def test_index_is_reloaded_from_disk(store):
+    embeddings = KeywordEmbeddings()
+    store.add_document("u1-1", DOCUMENT, embeddings)
+    store.clear()
+
+    index = store.get_index("u1-1")
+
+    assert isinstance(index, DocumentIndex)
+    assert index.chunks == DOCUMENT.split("\n")
+    assert store.retrieve("u1-1", "cats", embeddings, k=1) == ["cats chase dogs"]
+
+
+def test_chat_without_document_retrieves_nothing(store):
+    embeddings = KeywordEmbeddings()
+
+    assert store.retrieve("u1-2", "anything", embeddings, k=3) == []
+
+
+def test_documents_added_by_another_worker_are_kept(store):
+    embeddings = KeywordEmbeddings()
+    store.add_document("u1-1", DOCUMENT, embeddings)
+    stale = store.get_index("u1-1")
+
+    # Another worker adds a document to the saved index
+    path = store.get_index_path("u1-1")
+    DocumentIndex.load(path).with_document("other", ["dogs drink water"], embeddings.embed_documents(["dogs drink water"])).save(path)
+
+    assert store.get_index("u1-1").chunks[-1] == "dogs drink water"
+    index = store.add_document("u1-1", "cats need light", embeddings)
+
+    assert index.chunks == DOCUMENT.split("\n") + ["dogs drink water", "cats need light"]
+    # Indexes are replaced rather than modified, so searches on the old one stay consistent
+    assert stale.chunks == DOCUMENT.split("\n")
+    assert stale.vectors.shape[0] == len(stale.chunks)
+
+
+def test_removed_index_is_not_served_from_memory(store):
+    embeddings = KeywordEmbeddings()
+    store.add_document("u1-1", DOCUMENT, embeddings)
+    os.remove(store.get_index_path("u1-1"))
+
+    assert store.get_index("u1-1") is None
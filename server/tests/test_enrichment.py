@@ -0,0 +1,149 @@
+import time
+
+import pytest
+
+from agents.enrichment import (
+    EnrichmentStep,
+    run_enrichment_steps,
+    enrich_response,
+    build_response_enrichment_steps,
+    enrichment_result_to_events,
+    DEFAULT_LIP_SYNC_DATA,
+)
+
+
+class StubTool:
+    def __init__(self, func):
+        self.func = func
+
+
+class StubAgent:
+    """
+    Stands in for MemeMingleAIAgent with fixed-delay services.
+    """
+
+    def __init__(self, delay=0.2, fail=()):
+        self.delay = delay
+        self.fail = set(fail)
+        self.calls = []
+
+    def _work(self, name, result):
+        self.calls.append(name)
+        time.sleep(self.delay)
+        if name in self.fail:
+            raise RuntimeError(f"{name} failed")
+        return result
+
+    def determine_meme_topic(self, ai_response, is_initial=False):
+        return self._work("meme_topic", "welcome" if is_initial else "study")
+
+    def get_tool_by_name(self, tool_name):
+        return StubTool(lambda topic: self._work("fetch_meme", f"https://memes.example/{topic}.gif"))
+
+    def convert_text_to_speech(self, text, user_id, chat_id, turn_id):
+        return self._work("speech", (f"https://audio.example/{turn_id}.wav", f"{user_id}_{chat_id}_{turn_id}.wav"))
+
+    def determine_facial_expression_and_animation(self, ai_response):
+        return self._work("expression", {"facial_expression": "smile", "animation": "Laughing"})
+
+    def annotate_response(self, ai_response, is_initial=False):
+        return self._work("annotation", {
+            "meme_topic": "welcome" if is_initial else "study",
+            "facial_expression": "smile",
+            "animation": "Laughing",
+        })
+
+    def convert_and_encode_audio(self, filename):
+        return self._work("avatar_audio", "bXAz")
+
+    def generate_lipsync_data(self, filename):
+        return self._work("lip_sync_data", {"METADATA": {"soundFile": filename}, "MOUTH_CUES": []})
+
+
+@pytest.mark.parametrize("merged_annotation", [True, False])
+def test_enrichment_costs_longest_branch(merged_annotation):
+    agent = StubAgent(delay=0.2)
+
+    start = time.perf_counter()
+    response = enrich_response(agent, "Hello there!", user_id="u1", chat_id=1, turn_id=3, merged_annotation=merged_annotation)
+    elapsed = time.perf_counter() - start
+
+    # Five or six 0.2s service calls, but the longest branch is only two deep
+    assert elapsed < 0.8
+    assert response == {
+        "message": "Hello there!",
+        "meme_url": "https://memes.example/study.gif",
+        "audio_url": "https://audio.example/3.wav",
+        "facial_expression": "smile",
+        "animation": "Laughing",
+        "avatar_audio": "bXAz",
+        "lip_sync_data": {"METADATA": {"soundFile": "u1_1_3.wav"}, "MOUTH_CUES": []},
+    }
+
+
+def test_merged_annotation_makes_one_llm_call():
+    agent = StubAgent(delay=0.05)
+
+    enrich_response(agent, "Hi", user_id="u1", chat_id=1, turn_id=1, merged_annotation=True)
+
+    assert "annotation" in agent.calls
+    assert "meme_topic" not in agent.calls
+    assert "expression" not in agent.calls
+
+
+@pytest.mark.parametrize("merged_annotation, failing", [
+    (True, {"annotation"}),
+    (False, {"meme_topic", "expression"}),
+])
+def test_failed_step_uses_fallback_and_dependents_still_run(merged_annotation, failing):
+    agent = StubAgent(delay=0.05, fail=failing)
+
+    response = enrich_response(agent, "Hi", user_id="u1", chat_id=1, turn_id=1, merged_annotation=merged_annotation)
+
+    assert response["meme_url"] == "https://memes.example/funny.gif"
+    assert response["facial_expression"] == "default"
+    assert response["animation"] == "Idle"
+
+
+def test_failed_speech_skips_audio_processing():
+    agent = StubAgent(delay=0.05, fail={"speech"})
+
+    response = enrich_response(agent, "Hi", user_id="u1", chat_id=1, turn_id=1)
+
+    assert response["audio_url"] == ""
+    assert response["avatar_audio"] == ""
+    assert response["lip_sync_data"] == DEFAULT_LIP_SYNC_DATA
+    assert "avatar_audio" not in agent.calls
+    assert "lip_sync_data" not in agent.calls
+
+
+def test_step_timeout_uses_fallback():
+    steps = [
+        EnrichmentStep("fast", lambda: "fast", timeout=1),
+        EnrichmentStep("slow", lambda: time.sleep(5) or "slow", timeout=0.2, fallback="fallback"),
+        EnrichmentStep("after_slow", lambda value: f"{value}!", depends_on=("slow",), timeout=1),
+    ]
+
+    start = time.perf_counter()
+    results = run_enrichment_steps(steps)
+
+    assert time.perf_counter() - start < 1
+    assert results == {"fast": "fast", "slow": "fallback", "after_slow": "fallback!"}
+
+
+def test_unknown_dependency_is_rejected():
+    with pytest.raises(ValueError):
+        run_enrichment_steps([EnrichmentStep("a", lambda value: value, depends_on=("missing",))])
+
+
+def test_results_are_reported_as_they_settle():
+    agent = StubAgent(delay=0.05)
+    events = []
+
+    steps = build_response_enrichment_steps(agent, "Hi", user_id="u1", chat_id=1, turn_id=2, merged_annotation=True)
+    run_enrichment_steps(steps, on_result=lambda name, value: events.extend(enrichment_result_to_events(name, value)))
+
+    names = [event for event, _ in events]
+    assert sorted(names) == ["audio_url", "avatar_audio", "expression", "lip_sync_data", "meme_url"]
+    assert names.index("audio_url") < names.index("avatar_audio")
+    assert ("expression", {"facial_expression": "smile", "animation": "Laughing"}) in events
@@ -0,0 +1,70 @@
+import pytest
+
+import services.azure_form_recognizer as form_recognizer
+from services.azure_form_recognizer import ExtractedTextCache, extract_text_from_file
+from services.db.extracted_text_cache import evict_extracted_text, get_extracted_text_cache_collection
+
+PDF = "application/pdf"
+
+
+@pytest.fixture
+def db(db):
+    ExtractedTextCache.clear()
+    yield db
+    ExtractedTextCache.clear()
+
+
+@pytest.fixture
+def extractor(monkeypatch):
+    calls = []
+
+    def fake_extract(file_content, file_mime_type):
+        calls.append(file_content)
+        return f"text of {file_content.decode()}"
+
+    monkeypatch.setattr(form_recognizer, "extract_text_from_file_uncached", fake_extract)
+    return calls
+
+
+def test_repeat_upload_skips_extraction(db, extractor):
+    assert extract_text_from_file(b"a.pdf", PDF) == "text of a.pdf"
+    assert extract_text_from_file(b"a.pdf", PDF) == "text of a.pdf"
+
+    assert extractor == [b"a.pdf"]
+    assert ExtractedTextCache.get_stats() == {"memory_hits": 1, "store_hits": 0, "misses": 1}
+
+
+def test_shared_store_serves_other_workers(db, extractor):
+    extract_text_from_file(b"a.pdf", PDF)
+    # A worker with a cold in-memory tier
+    ExtractedTextCache._memory.clear()
+
+    assert extract_text_from_file(b"a.pdf", PDF) == "text of a.pdf"
+    assert extractor == [b"a.pdf"]
+    assert ExtractedTextCache.get_stats()["store_hits"] == 1
+
+
+def test_mime_type_is_part_of_the_key(db, extractor):
+    extract_text_from_file(b"a", PDF)
+    extract_text_from_file(b"a", "image/png")
+
+    assert len(extractor) == 2
+
+
+def test_failed_extractions_are_not_cached(db, monkeypatch):
+    monkeypatch.setattr(form_recognizer, "extract_text_from_file_uncached", lambda content, mime: "")
+
+    assert extract_text_from_file(b"broken", PDF) == ""
+    assert get_extracted_text_cache_collection().count_documents({}) == 0
+
+
+def test_store_evicts_least_recently_used_entries(db):
+    collection = get_extracted_text_cache_collection()
+    collection.insert_many([
+        {"_id": "old", "text": "x" * 40, "size": 40, "last_accessed": 1},
+        {"_id": "mid", "text": "x" * 40, "size": 40, "last_accessed": 2},
+        {"_id": "new", "text": "x" * 40, "size": 40, "last_accessed": 3},
+    ])
+
+    assert evict_extracted_text(collection, max_bytes=100) == 1
+    assert sorted(doc["_id"] for doc in collection.find()) == ["mid", "new"]
@@ -0,0 +1,110 @@
+from datetime import timedelta
+
+import pytest
+
+from services.db import finalization_jobs
+from services.db.finalization_jobs import (
+    claim_next_finalization_job,
+    complete_finalization_job,
+    enqueue_finalization_job,
+    fail_finalization_job,
+    get_finalization_job,
+    get_finalization_jobs_collection,
+)
+
+
+def test_repeated_requests_create_one_job(db):
+    enqueue_finalization_job("u1", "5")
+    enqueue_finalization_job("u1", 5)
+
+    assert get_finalization_jobs_collection().count_documents({}) == 1
+    job = claim_next_finalization_job("worker-1")
+    assert (job["user_id"], job["chat_id"], job["attempts"]) == ("u1", 5, 1)
+    assert claim_next_finalization_job("worker-2") is None
+
+
+def test_completed_job_is_done(db):
+    enqueue_finalization_job("u1", 5)
+    complete_finalization_job(claim_next_finalization_job("worker-1"))
+
+    assert get_finalization_job("u1", 5)["status"] == "done"
+
+
+def test_request_while_running_queues_one_more_run(db):
+    enqueue_finalization_job("u1", 5)
+    job = claim_next_finalization_job("worker-1")
+
+    enqueue_finalization_job("u1", 5)
+    enqueue_finalization_job("u1", 5)
+    assert claim_next_finalization_job("worker-2") is None
+
+    complete_finalization_job(job)
+    assert get_finalization_job("u1", 5)["status"] == "pending"
+    assert claim_next_finalization_job("worker-2")["worker_id"] == "worker-2"
+
+
+def test_failed_job_is_retried_with_backoff_then_marked_failed(db, monkeypatch):
+    monkeypatch.setattr(finalization_jobs, "FINALIZATION_MAX_ATTEMPTS", 2)
+    enqueue_finalization_job("u1", 5)
+
+    fail_finalization_job(claim_next_finalization_job("worker-1"), "LLM timeout")
+    job = get_finalization_job("u1", 5)
+    assert job["status"] == "pending"
+    assert job["last_error"] == "LLM timeout"
+    # Not due before the backoff delay
+    assert claim_next_finalization_job("worker-1") is None
+
+    collection = get_finalization_jobs_collection()
+    collection.update_one({}, {"$set": {"available_at": finalization_jobs.utc_now() - timedelta(seconds=1)}})
+    fail_finalization_job(claim_next_finalization_job("worker-1"), "LLM timeout")
+
+    assert get_finalization_job("u1", 5)["status"] == "failed"
+
+
+def test_requests_keep_the_backoff_of_a_pending_retry(db, monkeypatch):
+    monkeypatch.setattr(finalization_jobs, "FINALIZATION_MAX_ATTEMPTS", 2)
+    enqueue_finalization_job("u1", 5)
+    fail_finalization_job(claim_next_finalization_job("worker-1"), "LLM timeout")
+
+    # A client retrying its request neither makes the job due nor resets its attempts
+    enqueue_finalization_job("u1", 5)
+    assert claim_next_finalization_job("worker-1") is None
+    assert get_finalization_job("u1", 5)["attempts"] == 1
+
+    collection = get_finalization_jobs_collection()
+    collection.update_one({}, {"$set": {"available_at": finalization_jobs.utc_now() - timedelta(seconds=1)}})
+    fail_finalization_job(claim_next_finalization_job("worker-1"), "LLM timeout")
+    assert get_finalization_job("u1", 5)["status"] == "failed"
+
+    # A finished job starts over
+    enqueue_finalization_job("u1", 5)
+    job = claim_next_finalization_job("worker-1")
+    assert (job["status"], job["attempts"]) == ("running", 1)
+
+
+def test_expired_lease_is_taken_over(db):
+    enqueue_finalization_job("u1", 5)
+    claim_next_finalization_job("worker-1")
+    get_finalization_jobs_collection().update_one({}, {"$set": {"lease_expires_at": finalization_jobs.utc_now() - timedelta(seconds=1)}})
+
+    job = claim_next_finalization_job("worker-2")
+
+    assert job["worker_id"] == "worker-2"
+    assert job["attempts"] == 2
+
+
+def test_expired_lease_on_the_last_attempt_fails_the_job(db, monkeypatch):
+    monkeypatch.setattr(finalization_jobs, "FINALIZATION_MAX_ATTEMPTS", 2)
+    enqueue_finalization_job("u1", 5)
+    collection = get_finalization_jobs_collection()
+    expire_lease = {"$set": {"lease_expires_at": finalization_jobs.utc_now() - timedelta(seconds=1)}}
+
+    # The job hangs its worker on every attempt
+    claim_next_finalization_job("worker-1")
+    collection.update_one({}, expire_lease)
+    assert claim_next_finalization_job("worker-2")["attempts"] == 2
+    collection.update_one({}, expire_lease)
+
+    assert claim_next_finalization_job("worker-3") is None
+    job = get_finalization_job("u1", 5)
+    assert (job["status"], job["attempts"]) == ("failed", 2)
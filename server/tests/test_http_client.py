@@ -0,0 +1,146 @@
+import asyncio
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from services import http_client
+from services.http_client import AsyncHttpClient, HttpClient
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        server = self.server
+        server.client_ports.add(self.client_address[1])
+        server.request_count += 1
+        if self.path == "/slow":
+            time.sleep(0.5)
+        status = server.statuses.pop(0) if server.statuses else 200
+        body = b'{"ok": true}'
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if status == 429:
+            self.send_header("Retry-After", server.retry_after)
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except BrokenPipeError:
+            pass  # the client timed out
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.client_ports = set()
+    server.request_count = 0
+    server.statuses = []
+    server.retry_after = "0"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    HttpClient.reset()
+    yield server
+    HttpClient.reset()
+    server.shutdown()
+    server.server_close()
+
+
+def use_session(monkeypatch, **kwargs):
+    monkeypatch.setattr(HttpClient, "_session", HttpClient.create_session(**kwargs))
+    monkeypatch.setattr(HttpClient, "_pid", os.getpid())
+
+
+def get_url(server, path="/"):
+    return f"http://127.0.0.1:{server.server_address[1]}{path}"
+
+
+def test_requests_reuse_one_pooled_connection(stub_server):
+    for _ in range(5):
+        assert HttpClient.get_session().get(get_url(stub_server)).json() == {"ok": True}
+
+    host_metrics = HttpClient.get_metrics()[f"127.0.0.1:{stub_server.server_address[1]}"]
+    assert len(stub_server.client_ports) == 1
+    assert host_metrics["requests"] == 5
+    assert host_metrics["connections"] == 1
+    assert host_metrics["errors"] == 0
+
+
+def test_throttled_and_failed_responses_are_retried(stub_server, monkeypatch):
+    use_session(monkeypatch, backoff=0)
+    stub_server.statuses = [429, 503]
+
+    response = HttpClient.get_session().get(get_url(stub_server))
+
+    assert response.status_code == 200
+    assert stub_server.request_count == 3
+    assert HttpClient.get_metrics()[f"127.0.0.1:{stub_server.server_address[1]}"]["retries"] == 2
+
+
+def test_exhausted_retries_return_the_last_response(stub_server, monkeypatch):
+    use_session(monkeypatch, max_retries=1, backoff=0)
+    stub_server.statuses = [503, 503]
+
+    assert HttpClient.get_session().get(get_url(stub_server)).status_code == 503
+
+
+def test_long_retry_after_is_capped(stub_server, monkeypatch):
+    monkeypatch.setattr(http_client, "HTTP_MAX_RETRY_AFTER_SECONDS", 0.1)
+    use_session(monkeypatch, backoff=0)
+    stub_server.statuses = [429, 429]
+    stub_server.retry_after = "3600"
+
+    started_at = time.monotonic()
+    assert HttpClient.get_session().get(get_url(stub_server)).status_code == 200
+
+    async def fetch():
+        try:
+            stub_server.statuses = [429]
+            return await AsyncHttpClient.get_json(get_url(stub_server))
+        finally:
+            await AsyncHttpClient.close()
+
+    assert asyncio.run(fetch()) == {"ok": True}
+    assert time.monotonic() - started_at < 2
+
+
+def test_single_attempt_session_does_not_retry(stub_server):
+    stub_server.statuses = [503]
+
+    assert HttpClient.get_session(retries=False).get(get_url(stub_server)).status_code == 503
+    assert stub_server.request_count == 1
+    assert HttpClient.get_session(retries=False) is not HttpClient.get_session()
+
+
+def test_requests_get_a_default_timeout(stub_server, monkeypatch):
+    use_session(monkeypatch, timeout=(1, 0.1), backoff=0)
+
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        HttpClient.get_session().get(get_url(stub_server, "/slow"))
+    assert stub_server.request_count == 1
+    assert HttpClient.get_metrics()[f"127.0.0.1:{stub_server.server_address[1]}"]["errors"] == 1
+
+
+def test_async_client_pools_connections_and_retries(stub_server):
+    stub_server.statuses = [429]
+
+    async def fetch_all():
+        try:
+            return [await AsyncHttpClient.get_json(get_url(stub_server)) for _ in range(3)]
+        finally:
+            await AsyncHttpClient.close()
+
+    assert asyncio.run(fetch_all()) == [{"ok": True}] * 3
+
+    host_metrics = HttpClient.get_metrics()[f"127.0.0.1:{stub_server.server_address[1]}"]
+    assert stub_server.request_count == 4
+    assert host_metrics["requests"] == 3
+    assert host_metrics["retries"] == 1
+    assert host_metrics["connections"] == 1
@@ -0,0 +1,111 @@
+import hashlib
+
+import numpy as np
+import pytest
+
+from services.local_vector_search import LocalVectorIndex, export_local_vector_index, get_local_retriever
+
+
+class HashEmbeddings:
+    """Deterministic embeddings: a bag of hashed words."""
+    dimensions = 64
+
+    def embed(self, text):
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for word in text.lower().split():
+            vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dimensions] += 1.0
+        return vector.tolist()
+
+    def embed_documents(self, texts):
+        return [self.embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self.embed(text)
+
+
+FACTS = [
+    ("who built you", "You were built by a student team."),
+    ("when were you built", "You were built in 2024."),
+    ("what can you do", "You can fetch memes and search textbooks."),
+]
+
+
+@pytest.fixture
+def db(db):
+    embeddings = HashEmbeddings()
+    db["agent_facts_vector_store"].insert_many([
+        {"textContent": fact, "vectorContent": embeddings.embed(f"{query} {fact}"), "metadata": {"sample_query": query}}
+        for query, fact in FACTS
+    ])
+    return db
+
+
+def test_index_is_exported_and_memory_mapped(db, tmp_path):
+    assert export_local_vector_index("agent_facts", str(tmp_path)) == 3
+
+    index = LocalVectorIndex.load(str(tmp_path), "agent_facts")
+
+    assert isinstance(index.vectors, np.memmap)
+    assert index.vectors.dtype == np.float32
+    assert np.allclose(np.linalg.norm(index.vectors, axis=1), 1.0)
+
+
+def test_retriever_returns_nearest_documents_first(db, tmp_path):
+    retriever = get_local_retriever("agent_facts", HashEmbeddings(), top_k=2, directory=str(tmp_path))
+
+    docs = retriever.invoke("what can you do")
+
+    assert len(docs) == 2
+    assert docs[0].page_content == "You can fetch memes and search textbooks."
+    assert docs[0].metadata == {"sample_query": "what can you do"}
+
+
+def test_retriever_reloads_a_new_export(db, tmp_path):
+    retriever = get_local_retriever("agent_facts", HashEmbeddings(), top_k=1, directory=str(tmp_path))
+    assert retriever.invoke("what can you do")[0].page_content == "You can fetch memes and search textbooks."
+
+    LocalVectorIndex.write(str(tmp_path), "agent_facts", [HashEmbeddings().embed("what can you do now")], ["You can also quiz."], [{}])
+
+    assert retriever.invoke("what can you do")[0].page_content == "You can also quiz."
+
+
+def test_export_replaces_vectors_and_texts_together(tmp_path):
+    versions = [
+        LocalVectorIndex.write(str(tmp_path), "small", [[1.0, 0.0]] * size, ["x"] * size, [{}] * size)
+        for size in (1, 2, 3)
+    ]
+
+    index = LocalVectorIndex.load(str(tmp_path), "small")
+    assert index.vectors.shape[0] == len(index.texts) == 3
+    assert LocalVectorIndex.get_version(str(tmp_path), "small") == versions[-1]
+    # The previous version is kept for workers still loading it, older ones are removed
+    assert sorted(path.name for path in (tmp_path / "small").iterdir() if path.is_dir()) == versions[1:]
+
+
+def test_search_scores_are_cosine_similarities(tmp_path):
+    LocalVectorIndex.write(str(tmp_path), "small", [[1.0, 0.0], [0.0, 2.0], [1.0, 1.0]], ["x", "y", "xy"], [{}, {}, {}])
+    index = LocalVectorIndex.load(str(tmp_path), "small")
+
+    results = index.search([2.0, 0.0], k=3)
+
+    assert [i for i, _ in results] == [0, 2, 1]
+    assert [round(score, 4) for _, score in results] == [1.0, 0.7071, 0.0]
+
+
+def test_empty_index_returns_nothing(tmp_path):
+    LocalVectorIndex.write(str(tmp_path), "empty", [], [], [])
+
+    assert LocalVectorIndex.load(str(tmp_path), "empty").search([1.0, 0.0], k=3) == []
+
+
+def test_hnsw_matches_brute_force(tmp_path):
+    pytest.importorskip("hnswlib")
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(200, 16))
+    LocalVectorIndex.write(str(tmp_path), "random", vectors, [str(i) for i in range(200)], [{}] * 200)
+    query = rng.normal(size=16)
+
+    flat = LocalVectorIndex.load(str(tmp_path), "random").search(query, k=5)
+    hnsw = LocalVectorIndex.load(str(tmp_path), "random", use_hnsw=True).search(query, k=5)
+
+    assert [i for i, _ in hnsw] == [i for i, _ in flat]
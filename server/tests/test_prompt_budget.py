@@ -0,0 +1,90 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agents import prompt_budget
+from agents.prompt_budget import PromptBudget, rank_chunks_by_overlap
+
+
+@pytest.fixture(autouse=True)
+def word_tokens(monkeypatch):
+    # One token per word, and no per-message overhead, keeps the arithmetic readable
+    monkeypatch.setattr(prompt_budget, "count_tokens", lambda text: len(text.split()))
+    monkeypatch.setattr(prompt_budget, "truncate_to_tokens", lambda text, n: " ".join(text.split()[:max(n, 0)]))
+    monkeypatch.setattr(prompt_budget, "MESSAGE_OVERHEAD_TOKENS", 0)
+
+
+def make_turns(count):
+    turns = []
+    for i in range(count):
+        turns += [HumanMessage(content=f"question {i} a b"), AIMessage(content=f"answer {i} c d")]
+    return turns
+
+
+def make_budget(total_tokens=100):
+    return PromptBudget(
+        total_tokens=total_tokens,
+        shares={"past_summaries": 0.1, "history": 0.3, "document": 0.4},
+        reserved_tokens=0,
+    )
+
+
+def test_sections_within_budget_are_kept():
+    turns = make_turns(2)
+    sections, usage = make_budget().fit("system text", "hello", "past chat", turns, ["chunk one"])
+
+    assert sections["chat_turns"] == turns
+    assert sections["document_chunks"] == ["chunk one"]
+    assert sections["past_summaries"] == "past chat"
+    assert usage == {"system": 2, "input": 1, "past_summaries": 2, "history": 16, "document": 2, "total": 23}
+
+
+def test_history_is_trimmed_to_the_latest_turns_first():
+    turns = make_turns(10)  # 80 tokens
+    chunks = ["relevant " * 20, "other " * 20]  # 40 tokens, the document share
+
+    sections, usage = make_budget().fit("", "hi", "", turns, chunks)
+
+    # 99 tokens left after the input: the document keeps its 40, history gets the rest
+    assert usage["history"] <= 59
+    assert sections["chat_turns"] == turns[-len(sections["chat_turns"]):]
+    assert isinstance(sections["chat_turns"][0], HumanMessage)
+    assert sections["document_chunks"] == chunks
+
+
+def test_history_keeps_its_share_and_document_drops_least_relevant_chunks():
+    turns = make_turns(10)
+    chunks = ["first " * 10, "second " * 10, "third " * 10]
+
+    # 39 tokens left after the system text and input, less than history and document want
+    sections, usage = make_budget().fit("system " * 60, "hi", "", turns, chunks)
+
+    assert usage["history"] == 24
+    assert sections["document_chunks"] == chunks[:1]
+    assert usage["total"] <= 100
+
+
+def test_document_is_capped_at_its_share():
+    chunks = ["first " * 30, "second " * 30, "third " * 5]
+
+    # 99 tokens are left after the input, but the document share is 40
+    sections, usage = make_budget().fit("", "hi", "", [], chunks)
+
+    assert sections["document_chunks"] == [chunks[0], chunks[2]]
+    assert usage["document"] == 35
+
+
+def test_past_summaries_are_capped_at_their_share():
+    sections, usage = make_budget().fit("", "hi", "word " * 50)
+
+    assert usage["past_summaries"] == 10
+
+
+def test_rank_chunks_by_overlap_orders_by_shared_words():
+    chunks = ["cats and dogs", "photosynthesis in plants", "plants need light"]
+
+    assert rank_chunks_by_overlap(chunks, "How do plants use light?") == [
+        "plants need light",
+        "photosynthesis in plants",
+        "cats and dogs",
+    ]
+    assert rank_chunks_by_overlap(chunks, "") == chunks
@@ -0,0 +1,81 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from langchain_core.runnables import RunnableLambda
+
+from utils.quiz_feedback import NO_FEEDBACK, build_feedback_prompt, generate_feedbacks, grade_answer
+
+
+QUESTIONS = {
+    "q1": {"question_id": "q1", "question_type": "MC", "question": "2 + 2?", "correct_answer": "B"},
+    "q2": {"question_id": "q2", "question_type": "SA", "question": "Half of 3?", "correct_answer": "1.5"},
+    "q3": {"question_id": "q3", "question_type": "SA", "question": "Capital of France?", "correct_answer": "Paris"},
+}
+
+
+def make_llm():
+    """A fake LLM answering with the question of the prompt, which records its peak concurrency."""
+    lock = threading.Lock()
+    calls = {"active": 0, "max_active": 0}
+
+    def respond(prompt):
+        with lock:
+            calls["active"] += 1
+            calls["max_active"] = max(calls["max_active"], calls["active"])
+        try:
+            time.sleep(0.05)
+            question = prompt.split("Question: ")[1].split(" (")[0]
+            if question == "broken":
+                raise RuntimeError("LLM unavailable")
+            answer = prompt.split("User's Answer: ")[1].split(" (")[0]
+            return SimpleNamespace(content=f" About {answer} to {question} ")
+        finally:
+            with lock:
+                calls["active"] -= 1
+
+    return RunnableLambda(respond), calls
+
+
+def test_grade_answer():
+    assert grade_answer(QUESTIONS["q1"], " b ") == (True, 10)
+    assert grade_answer(QUESTIONS["q1"], "A") == (False, -5)
+    assert grade_answer(QUESTIONS["q2"], "1.50") == (True, 10)
+    assert grade_answer(QUESTIONS["q2"], "2") == (False, -5)
+    assert grade_answer(QUESTIONS["q3"], "paris") == (True, 10)
+    assert grade_answer(QUESTIONS["q3"], "Lyon") == (False, -5)
+    assert grade_answer({"question_type": "XX", "correct_answer": "a"}, "a") == (False, 0)
+
+
+def test_feedback_calls_run_concurrently_and_keep_their_question():
+    llm, calls = make_llm()
+    prompts = {
+        question_id: build_feedback_prompt(question, "wrong", "English")
+        for question_id, question in QUESTIONS.items()
+    }
+
+    feedbacks = generate_feedbacks(llm, prompts)
+
+    assert feedbacks == {question_id: f"About wrong to {question['question']}" for question_id, question in QUESTIONS.items()}
+    assert calls["max_active"] > 1
+
+
+def test_a_failed_call_only_affects_its_question():
+    llm, _ = make_llm()
+    feedbacks = generate_feedbacks(llm, {
+        "q1": build_feedback_prompt(QUESTIONS["q1"], "A", "English"),
+        "q3": build_feedback_prompt(dict(QUESTIONS["q3"], question="broken"), "Lyon", "English"),
+    })
+
+    assert feedbacks == {"q1": "About A to 2 + 2?", "q3": NO_FEEDBACK}
+    assert generate_feedbacks(llm, {}) == {}
+
+
+def test_answers_to_the_same_question_get_their_own_feedback():
+    llm, _ = make_llm()
+    feedbacks = generate_feedbacks(llm, {
+        0: build_feedback_prompt(QUESTIONS["q1"], "A", "English"),
+        1: build_feedback_prompt(QUESTIONS["q1"], "C", "English"),
+    })
+
+    assert feedbacks == {0: "About A to 2 + 2?", 1: "About C to 2 + 2?"}
@@ -0,0 +1,44 @@
+from agents.response_annotator import ResponseAnnotation, annotate_response, validate_annotation
+
+
+class StubStructuredLLM:
+    def __init__(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.prompts = []
+
+    def with_structured_output(self, schema):
+        assert schema is ResponseAnnotation
+        return self
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        if self.error:
+            raise self.error
+        return self.result
+
+
+def test_annotate_response_returns_all_fields_from_one_call():
+    llm = StubStructuredLLM(ResponseAnnotation(meme_topic=" Math Jokes ", facial_expression="smile", animation="Laughing"))
+
+    annotation = annotate_response(llm, "Fractions are fun!")
+
+    assert len(llm.prompts) == 1
+    assert annotation == {"meme_topic": "math jokes", "facial_expression": "smile", "animation": "Laughing"}
+
+
+def test_invalid_fields_fall_back_individually():
+    annotation = validate_annotation({"meme_topic": "cats", "facial_expression": "smirk", "animation": "Talking_1"})
+
+    assert annotation == {"meme_topic": "cats", "facial_expression": "default", "animation": "Talking_1"}
+
+
+def test_initial_meme_topic_must_be_a_welcome_topic():
+    assert validate_annotation({"meme_topic": "hello"}, is_initial=True)["meme_topic"] == "hello"
+    assert validate_annotation({"meme_topic": "cats"}, is_initial=True)["meme_topic"] == "welcome"
+
+
+def test_llm_failure_falls_back_to_defaults():
+    llm = StubStructuredLLM(error=RuntimeError("service unavailable"))
+
+    assert annotate_response(llm, "Hi") == {"meme_topic": "funny", "facial_expression": "default", "animation": "Idle"}
@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agents.semantic_cache import SemanticResponseCache, ToolUsageRecorder, CachedTurn
+from services.db import semantic_cache
+from services.db.chat_history import PooledMongoDBChatMessageHistory
+
+
+@pytest.fixture
+def db(db, monkeypatch):
+    monkeypatch.setenv("SEMANTIC_CACHE_ENABLED", "true")
+    SemanticResponseCache.clear()
+    yield db
+    SemanticResponseCache.clear()
+
+
+def test_similar_questions_reuse_the_answer(db):
+    SemanticResponseCache.store("mentor", "en", "What is a mentor?", [1.0, 0.0, 0.0], "A guide.")
+
+    assert SemanticResponseCache.lookup("mentor", "en", [0.99, 0.05, 0.0]) == "A guide."
+    assert SemanticResponseCache.lookup("mentor", "en", [0.5, 0.5, 0.5]) is None
+
+
+def test_answers_are_kept_apart_by_role_and_language(db):
+    SemanticResponseCache.store("mentor", "en", "What is a mentor?", [1.0, 0.0], "A guide.")
+
+    assert SemanticResponseCache.lookup("mentor", "es", [1.0, 0.0]) is None
+    assert SemanticResponseCache.lookup("coach", "en", [1.0, 0.0]) is None
+
+
+def test_answers_cached_by_other_workers_are_loaded(db):
+    semantic_cache.insert_semantic_cache_entry("mentor", "en", "Hi?", [0.0, 1.0], "Hello.")
+
+    assert SemanticResponseCache.lookup("mentor", "en", [0.0, 2.0]) == "Hello."
+
+
+def test_expired_answers_are_ignored(db):
+    db["semantic_response_cache"].insert_one({
+        "role": "mentor",
+        "language": "en",
+        "prompt": "Old?",
+        "embedding": semantic_cache.Binary(b"\x00\x00\x80?\x00\x00\x00\x00"),
+        "response": "Stale.",
+        "created_at": datetime.now(timezone.utc) - timedelta(days=2),
+    })
+
+    assert SemanticResponseCache.lookup("mentor", "en", [1.0, 0.0]) is None
+
+
+def test_only_standalone_turns_are_cacheable(db, monkeypatch):
+    assert SemanticResponseCache.is_cacheable_turn("What is a mentor?", "en", turn_id=3)
+    assert not SemanticResponseCache.is_cacheable_turn("Hi", "en", turn_id=0)
+    assert not SemanticResponseCache.is_cacheable_turn("Summarize the document", "en", file_content=b"pdf", turn_id=3)
+    assert not SemanticResponseCache.is_cacheable_turn("What is a mentor?", "en", turn_id=3, has_documents=True)
+    assert not SemanticResponseCache.is_cacheable_turn("Hi there friend", "en", turn_id=3, extra_system_message="Greet the user")
+    assert not SemanticResponseCache.is_cacheable_turn("x " * 200, "en", turn_id=3)
+    # Follow-ups are answered from the chat history
+    assert not SemanticResponseCache.is_cacheable_turn("Explain that again", "en", turn_id=3)
+    assert not SemanticResponseCache.is_cacheable_turn("Why?", "en", turn_id=3)
+    # The follow-up words are only known for some languages
+    assert not SemanticResponseCache.is_cacheable_turn("¿Qué es un mentor?", "es", turn_id=3)
+
+    monkeypatch.setenv("SEMANTIC_CACHE_ENABLED", "false")
+    assert not SemanticResponseCache.is_cacheable_turn("What is a mentor?", "en", turn_id=3)
+
+
+class FakeEmbeddings:
+    def embed_query(self, text):
+        return [text.lower().count(letter) + 1.0 for letter in "aeiostmn"]
+
+
+def test_common_question_after_welcome_is_answered_from_cache(db):
+    agent_runs = []
+
+    def run_turn(chat_id, message):
+        # Same steps as MemeMingleAIAgent.run() on /ai_mentor/<user_id>/<chat_id>
+        history = PooledMongoDBChatMessageHistory(f"user-1-{chat_id}")
+        assert history.messages
+        cacheable = SemanticResponseCache.is_cacheable_turn(message, "en", turn_id=1)
+        cached_turn = CachedTurn("mentor", "en", message, FakeEmbeddings(), cacheable)
+        answer = cached_turn.lookup()
+        if answer is None:
+            agent_runs.append(chat_id)
+            answer = f"Some tips: {message}"
+            cached_turn.store(answer)
+        history.add_messages([HumanMessage(content=message), AIMessage(content=answer)])
+        return answer
+
+    for chat_id in (1, 2):
+        # /ai_mentor/welcome/<user_id> saves the greeting as the first turn of each chat
+        PooledMongoDBChatMessageHistory(f"user-1-{chat_id}").add_messages([AIMessage(content="Welcome back!")])
+
+    first = run_turn(1, "How do I manage exam stress?")
+    second = run_turn(2, "How do I manage exam stress?")
+
+    assert second == first
+    assert agent_runs == [1]
+
+
+def test_personalized_answers_are_not_stored(db):
+    cached_turn = CachedTurn("mentor", "en", "Where can I study nearby?", FakeEmbeddings(), cacheable=True)
+    cached_turn.tool_usage.on_tool_start({"name": "location_search_gplaces"}, "study")
+    cached_turn.store("At the city library.")
+
+    assert CachedTurn("mentor", "en", "Where can I study nearby?", FakeEmbeddings(), cacheable=True).lookup() is None
+
+
+def test_tool_usage_recorder_flags_personalized_tools():
+    recorder = ToolUsageRecorder()
+    recorder.on_tool_start({"name": "agent_facts"}, "query")
+    assert not recorder.used_personalized_tool()
+
+    recorder.on_tool_start({"name": "user_profile_retrieval"}, "query")
+    assert recorder.used_personalized_tool()
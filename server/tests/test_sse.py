@@ -0,0 +1,62 @@
+import queue
+import uuid
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, LLMResult
+
+from utils import sse
+from utils.sse import TokenQueueCallbackHandler, format_sse
+
+
+def stream_llm_call(handler, tokens, tool_call=False):
+    run_id = uuid.uuid4()
+    for token in tokens:
+        handler.on_llm_new_token(token, chunk=ChatGenerationChunk(message=AIMessageChunk(content=token)), run_id=run_id)
+    tool_calls = []
+    if tool_call:
+        tool_call_chunk = {"name": "fetch_meme", "args": '{"topic": "cats"}', "id": "call_1", "index": 0}
+        handler.on_llm_new_token("", chunk=ChatGenerationChunk(message=AIMessageChunk(content="", tool_call_chunks=[tool_call_chunk])), run_id=run_id)
+        tool_calls = [{"name": "fetch_meme", "args": {"topic": "cats"}, "id": "call_1"}]
+    message = AIMessage(content="".join(tokens), tool_calls=tool_calls)
+    handler.on_llm_end(LLMResult(generations=[[ChatGeneration(message=message)]]), run_id=run_id)
+
+
+def drain(events):
+    tokens = []
+    while not events.empty():
+        event, data = events.get()
+        assert event == "token"
+        tokens.append(data["token"])
+    return tokens
+
+
+def test_only_the_final_answer_is_streamed(monkeypatch):
+    monkeypatch.setattr(sse, "STREAM_TOKEN_HOLD_CHARS", 20)
+    events = queue.Queue()
+    handler = TokenQueueCallbackHandler(events)
+
+    # A tool-calling step, with some text before its tool call
+    stream_llm_call(handler, ["Let me ", "check."], tool_call=True)
+    assert drain(events) == []
+
+    # The answer streams once it is past the held text
+    run_id = uuid.uuid4()
+    for token in ["Here ", "is a ", "funny ", "cat "]:
+        handler.on_llm_new_token(token, chunk=ChatGenerationChunk(message=AIMessageChunk(content=token)), run_id=run_id)
+    assert drain(events) == ["Here ", "is a ", "funny ", "cat "]
+    handler.on_llm_new_token("meme.", run_id=run_id)
+    assert drain(events) == ["meme."]
+
+
+def test_short_answers_are_sent_when_the_call_ends(monkeypatch):
+    monkeypatch.setattr(sse, "STREAM_TOKEN_HOLD_CHARS", 100)
+    events = queue.Queue()
+    handler = TokenQueueCallbackHandler(events)
+
+    stream_llm_call(handler, ["Hi", " there"])
+
+    assert drain(events) == ["Hi", " there"]
+
+
+def test_format_sse():
+    assert format_sse("token", {"token": "Hi"}) == 'event: token\ndata: {"token": "Hi"}\n\n'
@@ -0,0 +1,96 @@
+import os
+import threading
+import time
+
+os.environ.setdefault("AZURE_TEXT_ANALYTICS_KEY", "test-key")
+os.environ.setdefault("AZURE_TEXT_ANALYTICS_ENDPOINT", "https://example.cognitiveservices.azure.com/")
+
+import pytest
+
+from services.http_client import HttpClient
+from utils import agents
+from utils.tool_cache import IncompleteResult
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def json(self):
+        return self.data
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeOpenLibrary:
+    def __init__(self, delays):
+        self.delays = delays
+        self.edition_requests = []
+        self.search_retries = []
+        self.lock = threading.Lock()
+
+    def get(self, url, params=None, timeout=None):
+        if url.endswith("/search.json"):
+            self.search_retries.append(self.retries)
+            return FakeResponse({"docs": [
+                {"title": f"Book {key}", "author_name": ["Author"], "key": f"/works/W{key}", "edition_key": [key]}
+                for key in self.delays
+            ]})
+        key = url.rsplit("/", 1)[-1].removesuffix(".json")
+        with self.lock:
+            self.edition_requests.append(key)
+        time.sleep(self.delays[key])
+        return FakeResponse({"ocaid": f"archive{key}"})
+
+
+@pytest.fixture
+def open_library(monkeypatch):
+    agents._edition_cache.clear()
+
+    def install(delays):
+        fake = FakeOpenLibrary(delays)
+        def get_session(cls, retries=True):
+            fake.retries = retries
+            return fake
+        monkeypatch.setattr(HttpClient, "get_session", classmethod(get_session))
+        return fake
+    yield install
+    agents._edition_cache.clear()
+
+
+def test_editions_are_fetched_concurrently(open_library):
+    open_library({"A": 0.3, "B": 0.3, "C": 0.3})
+
+    started_at = time.monotonic()
+    results = agents.get_public_domain_textbooks("algebra")
+
+    assert time.monotonic() - started_at < 0.6
+    assert results.count("Download PDF") == 3
+    assert "https://archive.org/download/archiveB/archiveB.pdf" in results
+
+
+def test_slow_editions_fall_back_to_the_work_link(open_library, monkeypatch):
+    monkeypatch.setattr(agents, "TEXTBOOK_SEARCH_DEADLINE_SECONDS", 0.2)
+    fake = open_library({"A": 0.0, "B": 1.0})
+
+    started_at = time.monotonic()
+    results = agents.get_public_domain_textbooks("algebra")
+
+    assert time.monotonic() - started_at < 0.5
+    assert "Download PDF: https://archive.org/download/archiveA/archiveA.pdf" in results
+    assert "Read online: https://openlibrary.org/works/WB" in results
+    assert isinstance(results, IncompleteResult)
+    # Retries of the search could outlast the deadline
+    assert fake.search_retries == [False]
+
+
+def test_editions_are_cached(open_library):
+    fake = open_library({"A": 0.0, "B": 0.0})
+
+    first = agents.get_public_domain_textbooks("algebra")
+    second = agents.get_public_domain_textbooks("algebra")
+
+    assert first == second
+    assert not isinstance(first, IncompleteResult)
+    assert sorted(fake.edition_requests) == ["A", "B"]
@@ -0,0 +1,108 @@
+import asyncio
+import threading
+
+from utils import tool_cache
+from utils.tool_cache import cached_tool, IncompleteResult
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def make_tool(calls, results=None):
+    def search(query: str, location: str = None):
+        calls.append((query, location))
+        return results.pop(0) if results else f"results for {query}"
+    return search
+
+
+def test_normalized_repeated_arguments_hit_the_cache(monkeypatch):
+    monkeypatch.setattr(tool_cache.time, "monotonic", Clock().monotonic)
+    calls = []
+    search = cached_tool(ttl=60)(make_tool(calls))
+
+    assert search("Python  Developer") == "results for Python  Developer"
+    assert search(" python developer ", location=None) == "results for Python  Developer"
+    search("python developer", location="Austin")
+
+    assert calls == [("Python  Developer", None), ("python developer", "Austin")]
+    assert search.cache_stats["hits"] == 1
+
+
+def test_stale_results_are_served_while_refreshing(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(tool_cache.time, "monotonic", clock.monotonic)
+    refreshed = threading.Event()
+    submitted = []
+
+    def submit(fn, *args):
+        submitted.append(args)
+        fn(*args)
+        refreshed.set()
+    monkeypatch.setattr(tool_cache._refresh_executor, "submit", submit)
+
+    calls = []
+    search = cached_tool(ttl=60, stale_ttl=60)(make_tool(calls, ["old", "new", "newest"]))
+
+    assert search("memes") == "old"
+    clock.now += 90
+    assert search("memes") == "old"
+    assert refreshed.is_set() and len(submitted) == 1
+    assert search("memes") == "new"
+
+    clock.now += 500
+    assert search("memes") == "newest"
+    assert len(calls) == 3
+
+
+def test_failures_are_not_cached_and_size_is_bounded(monkeypatch):
+    monkeypatch.setattr(tool_cache.time, "monotonic", Clock().monotonic)
+    calls = []
+    search = cached_tool(ttl=60, maxsize=2)(make_tool(calls, ["Failed to fetch meme.", "ok", "a", "b", "ok again"]))
+
+    assert search("x") == "Failed to fetch meme."
+    assert search("x") == "ok"
+    search("y")
+    search("z")
+    assert search("x") == "ok again"
+    assert len(calls) == 5
+
+
+def test_incomplete_results_are_not_cached(monkeypatch):
+    monkeypatch.setattr(tool_cache.time, "monotonic", Clock().monotonic)
+    calls = []
+    search = cached_tool(ttl=60)(make_tool(calls, [IncompleteResult("partial"), "full", "unused"]))
+
+    assert search("x") == "partial"
+    assert search("x") == "full"
+    assert search("x") == "full"
+    assert len(calls) == 2
+
+
+def test_zero_ttl_disables_the_cache():
+    calls = []
+    search = cached_tool(ttl=0)(make_tool(calls))
+
+    search("memes")
+    search("memes")
+    assert len(calls) == 2
+
+
+def test_async_version_shares_the_cache(monkeypatch):
+    monkeypatch.setattr(tool_cache.time, "monotonic", Clock().monotonic)
+    calls = []
+
+    async def asearch(query: str, location: str = None):
+        calls.append(("async", query))
+        return f"async results for {query}"
+
+    search = cached_tool(ttl=60)(make_tool(calls), coroutine=asearch)
+
+    assert asyncio.run(search.coroutine("algebra")) == "async results for algebra"
+    assert search("Algebra") == "async results for algebra"
+    assert asyncio.run(search.coroutine("history")) == "async results for history"
+    assert calls == [("async", "algebra"), ("async", "history")]
@@ -0,0 +1,92 @@
+import pytest
+from flask import Flask
+
+from services import translator
+from utils import translate_decorator
+from utils.translate_decorator import translate_response, translate_payload
+
+
+class FakeTranslator:
+    def __init__(self):
+        self.requests = []
+
+    def translate_texts(self, texts, target_language):
+        self.requests.append(list(texts))
+        return [f"[{target_language}] {text}" for text in texts]
+
+
+@pytest.fixture(autouse=True)
+def db(db):
+    translator.TranslationCache.clear()
+    return db
+
+
+def use_fake_translator(monkeypatch):
+    fake = FakeTranslator()
+    monkeypatch.setattr(translator.Translator, "translate_texts", staticmethod(fake.translate_texts))
+    return fake
+
+
+def test_listed_fields_are_translated_in_one_batch(monkeypatch):
+    fake = use_fake_translator(monkeypatch)
+    payload = {
+        "message": "Well done",
+        "questions": [
+            {"question_id": "q1", "text": "What is 2 + 2?", "choices": ["Four", "Five"]},
+            {"question_id": "q2", "text": "Well done", "image": "https://example.com/a.png"},
+        ],
+        "facial_expression": "smile",
+        "score": 0.5,
+    }
+
+    translated = translate_payload(payload, "es", ["message", "questions.text", "questions.choices", "questions.image"])
+
+    assert fake.requests == [["Well done", "What is 2 + 2?", "Four", "Five"]]
+    assert translated["message"] == "[es] Well done"
+    assert translated["questions"][0] == {"question_id": "q1", "text": "[es] What is 2 + 2?", "choices": ["[es] Four", "[es] Five"]}
+    assert translated["questions"][1] == {"question_id": "q2", "text": "[es] Well done", "image": "https://example.com/a.png"}
+    # Ids and enum values the client switches on are not listed, so they stay as they are
+    assert translated["facial_expression"] == "smile" and translated["score"] == 0.5
+    assert payload["message"] == "Well done"
+
+    translate_payload({"title": "Four", "body": "Six"}, "es", ["title", "body", "missing.field"])
+    assert fake.requests[-1] == ["Six"]
+
+
+def test_failed_translations_fall_back_to_the_original_text(monkeypatch):
+    def fail(texts, target_language):
+        raise RuntimeError("quota exceeded")
+    monkeypatch.setattr(translator.Translator, "translate_texts", staticmethod(fail))
+
+    assert translate_payload({"message": "Hello"}, "fr", ["message"]) == {"message": "Hello"}
+
+
+def test_decorator_caches_the_language_by_identity(monkeypatch):
+    fake = use_fake_translator(monkeypatch)
+    lookups = []
+
+    def get_language(user_id):
+        lookups.append(user_id)
+        return "fr"
+    monkeypatch.setattr(translate_decorator, "get_user_preferred_language", get_language)
+    monkeypatch.setattr("flask_jwt_extended.get_jwt_identity", lambda: "user-1")
+    translate_decorator._user_languages.clear()
+
+    @translate_response("message", "items")
+    def view():
+        return {"message": "Hello", "items": ["Bye"], "animation": "Talking"}, 201
+
+    app = Flask(__name__)
+    with app.test_request_context():
+        for _ in range(2):
+            response, status = view()
+            assert status == 201
+            assert response.get_json() == {"message": "[fr] Hello", "items": ["[fr] Bye"], "animation": "Talking"}
+
+    assert lookups == ["user-1"]
+    assert fake.requests == [["Hello", "Bye"]]
+
+    translate_decorator.forget_user_language("user-1")
+    with app.test_request_context():
+        view()
+    assert lookups == ["user-1", "user-1"]
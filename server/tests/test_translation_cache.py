@@ -0,0 +1,51 @@
+import pytest
+
+from services import translator
+from services.translator import TranslationCache, translate_text_cached, translate_texts_cached
+
+
+class FakeTranslator:
+    def __init__(self):
+        self.requests = []
+
+    def translate_texts(self, texts, target_language):
+        self.requests.append((target_language, list(texts)))
+        return [f"[{target_language}] {text}" for text in texts]
+
+
+@pytest.fixture
+def fake(db, monkeypatch):
+    TranslationCache.clear()
+    fake = FakeTranslator()
+    monkeypatch.setattr(translator.Translator, "translate_texts", staticmethod(fake.translate_texts))
+    yield fake
+    TranslationCache.clear()
+
+
+def test_keys_depend_on_language_and_normalized_text():
+    assert TranslationCache.get_cache_key("Café ", "fr") == TranslationCache.get_cache_key("Café", "fr")
+    assert TranslationCache.get_cache_key("Hello", "fr") != TranslationCache.get_cache_key("Hello", "es")
+
+
+def test_translations_are_shared_through_the_store(fake):
+    assert translate_texts_cached(["Hello", "Bye", "Hello"], "es") == ["[es] Hello", "[es] Bye", "[es] Hello"]
+
+    # Another worker (or a restart) starts with an empty memory tier
+    TranslationCache._memory.clear()
+    assert translate_text_cached("Hello", "es") == "[es] Hello"
+    assert translate_text_cached(" Hello", "es") == "[es] Hello"
+    assert translate_text_cached("Hello", "fr") == "[fr] Hello"
+
+    assert fake.requests == [("es", ["Hello", "Bye"]), ("fr", ["Hello"])]
+
+
+def test_hits_and_misses_are_counted_per_language(fake):
+    translate_texts_cached(["Hello", "Bye"], "es")
+    translate_texts_cached(["Hello"], "es")
+    TranslationCache._memory.clear()
+    translate_texts_cached(["Bye"], "es")
+    translate_texts_cached(["Hello"], "de")
+
+    stats = TranslationCache.get_stats()
+    assert stats["es"] == {"memory_hits": 1, "store_hits": 1, "misses": 2, "hit_rate": 0.5}
+    assert stats["de"]["misses"] == 1
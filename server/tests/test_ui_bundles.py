@@ -0,0 +1,56 @@
+import pytest
+
+from services import ui_bundles
+from services.ui_bundles import UIBundles
+
+
+@pytest.fixture
+def requests_sent(db, monkeypatch):
+    monkeypatch.setattr(UIBundles, "_strings", dict.fromkeys(["Profile", "Log Out"]))
+    monkeypatch.setattr(UIBundles, "_version", None)
+    monkeypatch.setattr(UIBundles, "_bundles", {})
+
+    requests_sent = []
+
+    def fake_translate_texts(texts, target_language):
+        requests_sent.append((target_language, list(texts)))
+        return [f"[{target_language}] {text}" for text in texts]
+
+    monkeypatch.setattr(ui_bundles, "translate_texts", fake_translate_texts)
+    return requests_sent
+
+
+def test_the_default_catalog_is_registered():
+    strings = UIBundles.get_strings()
+    assert "Chat Wizard" in strings and "Generate Quiz" in strings
+    assert len(strings) == len(set(strings))
+
+
+def test_bundles_are_translated_once_per_language(requests_sent):
+    bundle = UIBundles.get_bundle("es")
+    assert bundle["language"] == "es"
+    assert bundle["translations"] == {"Profile": "[es] Profile", "Log Out": "[es] Log Out"}
+
+    UIBundles.get_bundle("es")
+    # Another worker loads the stored bundle
+    UIBundles.clear()
+    assert UIBundles.get_bundle("es") == bundle
+    assert requests_sent == [("es", ["Profile", "Log Out"])]
+
+
+def test_english_is_not_translated(requests_sent):
+    assert UIBundles.get_bundle("en")["translations"] == {"Profile": "Profile", "Log Out": "Log Out"}
+    assert requests_sent == []
+
+
+def test_registering_strings_creates_a_new_version(requests_sent):
+    first = UIBundles.get_bundle("fr")
+    UIBundles.register(["Profile", " Quiz "])
+    second = UIBundles.get_bundle("fr")
+
+    assert second["version"] != first["version"]
+    assert second["translations"]["Quiz"] == "[fr] Quiz"
+    assert len(requests_sent) == 2
+
+    UIBundles.register(["Quiz"])
+    assert UIBundles.get_version() == second["version"]
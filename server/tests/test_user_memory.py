@@ -0,0 +1,47 @@
+import pytest
+
+from services.db import user_memory
+from services.db.user_memory import build_digest, get_user_memory_digest, update_user_memory_digest
+
+
+@pytest.fixture
+def word_tokens(monkeypatch):
+    # One token per word keeps the budget arithmetic independent of the tokenizer
+    monkeypatch.setattr(user_memory, "count_tokens", lambda text: len(text.split()))
+    monkeypatch.setattr(user_memory, "truncate_to_tokens", lambda text, n: " ".join(text.split()[:n]))
+
+
+def test_build_digest_keeps_newest_summaries_within_budget(word_tokens):
+    entries = [{"chat_id": i, "summary_text": f"summary of chat {i} here"} for i in (3, 2, 1)]
+
+    kept, digest_text = build_digest(entries, token_budget=12)
+
+    assert [entry["chat_id"] for entry in kept] == [3, 2]
+    assert digest_text == "summary of chat 3 here\nsummary of chat 2 here"
+
+
+def test_build_digest_truncates_an_oversized_summary(word_tokens):
+    kept, digest_text = build_digest([{"chat_id": 1, "summary_text": "a very long summary text"}], token_budget=2)
+
+    assert kept == [{"chat_id": 1, "summary_text": "a very"}]
+    assert digest_text == "a very"
+
+
+def test_missing_digest_is_backfilled_from_recent_summaries(db):
+    db["chat_summaries"].insert_many([
+        {"user_id": "u1", "chat_id": 1, "summary_text": "Talked about fractions."},
+        {"user_id": "u1", "chat_id": 2, "summary_text": ""},
+        {"user_id": "u1", "chat_id": 3, "summary_text": "Practiced French verbs."},
+        {"user_id": "u2", "chat_id": 4, "summary_text": "Someone else."},
+    ])
+
+    assert get_user_memory_digest("u1") == "Practiced French verbs.\nTalked about fractions."
+    assert db["user_memory_digests"].count_documents({"user_id": "u1"}) == 1
+
+
+def test_update_adds_new_summary_and_replaces_refinalized_chat(db):
+    update_user_memory_digest("u1", 1, "Talked about fractions.")
+    update_user_memory_digest("u1", 2, "Started algebra.")
+    update_user_memory_digest("u1", 2, "Finished algebra basics.")
+
+    assert get_user_memory_digest("u1") == "Finished algebra basics.\nTalked about fractions."
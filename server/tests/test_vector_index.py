@@ -0,0 +1,123 @@
+import pytest
+
+from services.db import vector_index
+from services.db.vector_index import build_vector_store, get_index_parameters
+
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text):
+        return [float(len(text)), 1.0]
+
+
+@pytest.fixture
+def db(db, monkeypatch):
+    created = []
+
+    # mongomock has no Cosmos DB vector index command
+    def create_index(self, **kwargs):
+        created.append({"collection": self.get_collection().name, **kwargs})
+        self.get_collection().create_index("vectorContent", name=vector_index.VECTOR_INDEX_NAME)
+    monkeypatch.setattr(vector_index.AzureCosmosDBVectorSearch, "create_index", create_index)
+    db.created_indexes = created
+    return db
+
+
+def test_only_new_or_changed_facts_are_embedded(db):
+    db["agent_facts"].insert_many([
+        {"sample_query": "Who built you?", "fact": "A student team."},
+        {"sample_query": "When?", "fact": "In 2024."},
+    ])
+    embeddings = FakeEmbeddings()
+    assert build_vector_store("agent_facts", embeddings) == {"embedded": 2, "removed": 0, "unchanged": 0}
+
+    db["agent_facts"].update_one({"sample_query": "When?"}, {"$set": {"fact": "In 2025."}})
+    embeddings.embedded.clear()
+
+    assert build_vector_store("agent_facts", embeddings) == {"embedded": 1, "removed": 1, "unchanged": 1}
+    assert embeddings.embedded == ["In 2025."]
+    assert sorted(doc["textContent"] for doc in db["agent_facts_vector_store"].find()) == ["A student team.", "In 2025."]
+
+
+def test_index_is_created_once_for_an_unchanged_corpus_size(db):
+    db["agent_facts"].insert_one({"sample_query": "q", "fact": "f"})
+
+    build_vector_store("agent_facts", FakeEmbeddings())
+    build_vector_store("agent_facts", FakeEmbeddings())
+
+    assert len(db.created_indexes) == 1
+    assert db.created_indexes[0]["num_lists"] == 1
+    assert db.created_indexes[0]["collection"] == "agent_facts_vector_store"
+
+
+def test_index_is_rebuilt_in_a_new_collection(db, monkeypatch):
+    parameters = vector_index.get_index_parameters
+    # One list per vector, so every new fact needs a new index
+    monkeypatch.setattr(vector_index, "get_index_parameters", lambda count: {**parameters(count), "num_lists": count})
+    embeddings = FakeEmbeddings()
+    db["agent_facts"].insert_one({"sample_query": "q1", "fact": "f1"})
+    build_vector_store("agent_facts", embeddings)
+
+    db["agent_facts"].insert_one({"sample_query": "q2", "fact": "f2"})
+    build_vector_store("agent_facts", embeddings)
+
+    # The vectors are copied, not embedded again, and the old collection keeps serving meanwhile
+    active = vector_index.get_active_vector_collection("agent_facts")
+    assert active.name != "agent_facts_vector_store"
+    assert sorted(doc["textContent"] for doc in active.find()) == ["f1", "f2"]
+    assert embeddings.embedded == ["f1", "f2"]
+    assert db.created_indexes[-1] == {**db.created_indexes[-1], "collection": active.name, "num_lists": 2}
+    assert "agent_facts_vector_store" in db.list_collection_names()
+
+    db["agent_facts"].insert_one({"sample_query": "q3", "fact": "f3"})
+    build_vector_store("agent_facts", embeddings)
+
+    # Only the previous collection is kept
+    assert vector_index.get_active_vector_collection("agent_facts").count_documents({}) == 3
+    assert "agent_facts_vector_store" not in db.list_collection_names()
+    assert active.name in db.list_collection_names()
+
+
+def test_retriever_picks_up_the_rebuilt_collection(db, monkeypatch):
+    retriever = vector_index.ActiveVectorStoreRetriever(collection_name="agent_facts", embeddings=FakeEmbeddings())
+    assert retriever.get_vector_store().get_collection().name == "agent_facts_vector_store"
+
+    db["vector_indexes"].insert_one({"_id": "agent_facts_vector_store", "collection": "agent_facts_vector_store_new"})
+    assert retriever.get_vector_store().get_collection().name == "agent_facts_vector_store"
+
+    monkeypatch.setattr(vector_index, "VECTOR_STORE_REFRESH_SECONDS", 0)
+    assert retriever.get_vector_store().get_collection().name == "agent_facts_vector_store_new"
+
+
+def test_legacy_vectors_without_hashes_are_replaced(db):
+    db["agent_facts"].insert_one({"sample_query": "q", "fact": "f"})
+    db["agent_facts_vector_store"].insert_one({"textContent": "f", "vectorContent": [0.0, 0.0]})
+
+    build_vector_store("agent_facts", FakeEmbeddings())
+
+    assert db["agent_facts_vector_store"].count_documents({}) == 1
+    assert db["agent_facts_vector_store"].find_one()["content_hash"]
+
+
+@pytest.mark.parametrize("document_count, num_lists", [(0, 1), (900, 1), (25_000, 25), (4_000_000, 2000)])
+def test_index_parameters_follow_corpus_size(document_count, num_lists):
+    assert get_index_parameters(document_count)["num_lists"] == num_lists
+
+
+def test_agent_facts_sync_adds_changed_and_removes_stale_facts(db, monkeypatch):
+    from services.db import agent_facts
+
+    monkeypatch.setattr(agent_facts, "AGENT_FACTS", [{"sample_query": "q1", "fact": "f1"}])
+    agent_facts.load_agent_facts_to_db()
+    monkeypatch.setattr(agent_facts, "AGENT_FACTS", [{"sample_query": "q1", "fact": "f1"}, {"sample_query": "q2", "fact": "f2"}])
+    agent_facts.load_agent_facts_to_db()
+    monkeypatch.setattr(agent_facts, "AGENT_FACTS", [{"sample_query": "q2", "fact": "f2"}])
+    agent_facts.load_agent_facts_to_db()
+
+    assert [doc["fact"] for doc in db["agent_facts"].find()] == ["f2"]
@@ -1,8 +1,12 @@
 """ This module contains the agent functions that interact with the external APIs. """
 """STEP 1: Import necessary modules"""
 import os
+import time
 import random
-import requests
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from cachetools import TTLCache
 from langchain_google_community import GoogleSearchAPIWrapper
 from langchain_community.utilities import BingSearchAPIWrapper
 from langchain_community.tools import YouTubeSearchTool
@@ -15,6 +19,15 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib.units import inch
 from uuid import uuid4
+from services.http_client import HttpClient, AsyncHttpClient
+from utils.tool_cache import IncompleteResult
+from utils.consts import (
+    HTTP_CONNECT_TIMEOUT_SECONDS,
+    TEXTBOOK_SEARCH_DEADLINE_SECONDS,
+    OPENLIBRARY_EDITION_WORKERS,
+    OPENLIBRARY_EDITION_CACHE_SIZE,
+    OPENLIBRARY_EDITION_CACHE_TTL_SECONDS,
+)
 import os
 from PIL import Image, ImageDraw, ImageFont
 
@@ -23,6 +36,11 @@ text_analytics_key = os.getenv("AZURE_TEXT_ANALYTICS_KEY")
 text_analytics_endpoint = os.getenv("AZURE_TEXT_ANALYTICS_ENDPOINT")
 text_analytics_client = TextAnalyticsClient(endpoint=text_analytics_endpoint, credential=AzureKeyCredential(text_analytics_key))
 
+# Open Library edition lookups run concurrently, and their results are cached
+_edition_executor = ThreadPoolExecutor(max_workers=OPENLIBRARY_EDITION_WORKERS, thread_name_prefix="openlibrary")
+_edition_cache = TTLCache(maxsize=OPENLIBRARY_EDITION_CACHE_SIZE, ttl=OPENLIBRARY_EDITION_CACHE_TTL_SECONDS)
+_edition_cache_lock = threading.Lock()
+
 
 """Step 2: Define the agent functions"""
 
@@ -129,21 +147,97 @@ def generate_suggestions(mood: str, user_input: str):
     return suggestions
 
 
+def fetch_openlibrary_edition(edition_key: str, timeout: float = None) -> dict | None:
+    """
+    Fetches the metadata of an Open Library edition, caching it since editions rarely change.
+
+    Returns:
+        dict: The edition data, or None if it could not be fetched.
+    """
+    with _edition_cache_lock:
+        edition_data = _edition_cache.get(edition_key)
+    if edition_data is not None:
+        return edition_data
+
+    try:
+        edition_response = HttpClient.get_session().get(f"https://openlibrary.org/books/{edition_key}.json", timeout=timeout)
+        edition_response.raise_for_status()
+        edition_data = edition_response.json()
+    except Exception as e:
+        print(f"Failed to fetch edition {edition_key}: {e}")
+        return None
+
+    with _edition_cache_lock:
+        _edition_cache[edition_key] = edition_data
+    return edition_data
+
+
+def format_public_domain_textbooks(books: list[dict], editions: dict) -> str:
+    """
+    Formats Open Library search results, linking a PDF when the edition has one.
+
+    Args:
+        books (list[dict]): The search results.
+        editions (dict): Edition data by edition key; missing editions get the work link.
+    """
+    results = "Here are some textbooks you might find useful:\n"
+    for book in books:
+        title = book.get("title", "Unknown Title")
+        author = ', '.join(book.get("author_name", ["Unknown Author"]))
+        work_key = book.get('key')
+        edition_key = book.get('edition_key', [None])[0]
+
+        # Initialize PDF link
+        pdf_link = None
+
+        edition_data = editions.get(edition_key)
+        if edition_data:
+            formats = edition_data.get('formats', {})
+
+            # Check if a PDF is available in formats
+            if 'pdf' in formats:
+                pdf_link = formats['pdf'].get('url')
+
+            # Alternatively, check for Internet Archive links
+            elif 'ocaid' in edition_data:
+                ocaid = edition_data['ocaid']
+                pdf_link = f"https://archive.org/download/{ocaid}/{ocaid}.pdf"
+
+        # Fallback to the work link if no PDF is available
+        if pdf_link:
+            link = pdf_link
+            link_text = "Download PDF"
+        else:
+            link = f"https://openlibrary.org{work_key}"
+            link_text = "Read online"
+
+        results += f"- {title} by {author}\n  {link_text}: {link}\n"
+
+    return results
+
+
 def get_public_domain_textbooks(query: str):
     """
     Searches for textbooks in public domain libraries based on the user's query.
 
+    The editions of the results are fetched concurrently. Books whose edition is not
+    fetched within TEXTBOOK_SEARCH_DEADLINE_SECONDS are listed with their online link,
+    and the results are then returned as an IncompleteResult so they are not cached.
+
     Args:
         query (str): The search query.
 
     Returns:
         str: A formatted string containing the search results with PDF links if available.
     """
+    deadline = time.monotonic() + TEXTBOOK_SEARCH_DEADLINE_SECONDS
     try:
-        # Use Open Library Search API
-        search_response = requests.get(
+        # Use Open Library Search API, with a single attempt so the search itself stays
+        # within the deadline
+        search_response = HttpClient.get_session(retries=False).get(
             "https://openlibrary.org/search.json",
-            params={"title": query, "has_fulltext": "true"}
+            params={"title": query, "has_fulltext": "true"},
+            timeout=(min(HTTP_CONNECT_TIMEOUT_SECONDS, TEXTBOOK_SEARCH_DEADLINE_SECONDS), TEXTBOOK_SEARCH_DEADLINE_SECONDS)
         )
         search_data = search_response.json()
         books = search_data.get("docs", [])[:3]  # Get top 3 results
@@ -151,48 +245,87 @@ def get_public_domain_textbooks(query: str):
         if not books:
             return "No textbooks found for your query."
 
-        results = "Here are some textbooks you might find useful:\n"
-        for book in books:
-            title = book.get("title", "Unknown Title")
-            author = ', '.join(book.get("author_name", ["Unknown Author"]))
-            work_key = book.get('key')
-            edition_key = book.get('edition_key', [None])[0]
-
-            # Initialize PDF link
-            pdf_link = None
-
-            if edition_key:
-                # Fetch edition data to check for available formats
-                edition_response = requests.get(f"https://openlibrary.org/books/{edition_key}.json")
-                edition_data = edition_response.json()
-                formats = edition_data.get('formats', {})
-
-                # Check if a PDF is available in formats
-                if 'pdf' in formats:
-                    pdf_link = formats['pdf'].get('url')
-
-                # Alternatively, check for Internet Archive links
-                elif 'ocaid' in edition_data:
-                    ocaid = edition_data['ocaid']
-                    pdf_link = f"https://archive.org/download/{ocaid}/{ocaid}.pdf"
-
-            # Fallback to the work link if no PDF is available
-            if pdf_link:
-                link = pdf_link
-                link_text = "Download PDF"
-            else:
-                link = f"https://openlibrary.org{work_key}"
-                link_text = "Read online"
+        # Fetch edition data of all books at once to check for available formats
+        remaining = max(0.0, deadline - time.monotonic())
+        edition_keys = {book.get('edition_key', [None])[0] for book in books} - {None}
+        edition_futures = {
+            edition_key: _edition_executor.submit(fetch_openlibrary_edition, edition_key, (HTTP_CONNECT_TIMEOUT_SECONDS, remaining or 0.1))
+            for edition_key in edition_keys
+        }
+        wait(edition_futures.values(), timeout=remaining)
 
-            results += f"- {title} by {author}\n  {link_text}: {link}\n"
+        editions = {key: future.result() for key, future in edition_futures.items() if future.done()}
+        results = format_public_domain_textbooks(books, editions)
+        # Editions still being fetched are cached when they arrive, for the next search
+        return IncompleteResult(results) if None in (editions.get(key) for key in edition_keys) else results
 
-        return results
+    except Exception as e:
+        print(f"Failed to fetch textbooks: {e}")
+        return "Sorry, I couldn't fetch textbooks at the moment."
+
+
+async def aget_public_domain_textbooks(query: str):
+    """
+    Async version of get_public_domain_textbooks.
+    """
+    async def fetch_edition(edition_key):
+        with _edition_cache_lock:
+            edition_data = _edition_cache.get(edition_key)
+        if edition_data is None:
+            edition_data = await AsyncHttpClient.get_json(f"https://openlibrary.org/books/{edition_key}.json")
+            with _edition_cache_lock:
+                _edition_cache[edition_key] = edition_data
+        return edition_key, edition_data
+
+    deadline = time.monotonic() + TEXTBOOK_SEARCH_DEADLINE_SECONDS
+    try:
+        search_data = await asyncio.wait_for(
+            AsyncHttpClient.request_json("GET", "https://openlibrary.org/search.json", params={"title": query, "has_fulltext": "true"}, max_retries=0),
+            timeout=max(0.0, deadline - time.monotonic())
+        )
+        books = search_data.get("docs", [])[:3]  # Get top 3 results
+
+        if not books:
+            return "No textbooks found for your query."
+
+        edition_keys = {book.get('edition_key', [None])[0] for book in books} - {None}
+        tasks = [asyncio.ensure_future(fetch_edition(edition_key)) for edition_key in edition_keys]
+        done, pending = await asyncio.wait(tasks, timeout=max(0.0, deadline - time.monotonic())) if tasks else (set(), set())
+        for task in pending:
+            task.cancel()
+
+        editions = dict(task.result() for task in done if not task.exception())
+        results = format_public_domain_textbooks(books, editions)
+        return IncompleteResult(results) if None in (editions.get(key) for key in edition_keys) else results
 
     except Exception as e:
         print(f"Failed to fetch textbooks: {e}")
         return "Sorry, I couldn't fetch textbooks at the moment."
     
 
+def format_gutendex_textbooks(books: list[dict]) -> str:
+    results = "Here are some textbooks you might find useful:\n"
+    for book in books:
+        title = book.get("title", "Unknown Title")
+        authors = [author.get("name", "Unknown Author") for author in book.get("authors", [])]
+        author = ', '.join(authors) if authors else "Unknown Author"
+        formats = book.get("formats", {})
+        pdf_link = formats.get("application/pdf")
+        epub_link = formats.get("application/epub+zip")
+        txt_link = formats.get("text/plain; charset=utf-8")
+
+        # Provide available formats
+        results += f"- {title} by {author}\n"
+        if pdf_link:
+            results += f"  Download PDF: {pdf_link}\n"
+        if epub_link:
+            results += f"  Download EPUB: {epub_link}\n"
+        if txt_link:
+            results += f"  Download TXT: {txt_link}\n"
+
+    return results
+
+
 def get_gutendex_domain_textbooks(query: str):
     """
     Searches for textbooks in Project Gutenberg based on the user's query.
@@ -205,7 +338,7 @@ def get_gutendex_domain_textbooks(query: str):
     """
     try:
         # Use Project Gutenberg's catalog via a third-party API
-        search_response = requests.get(
+        search_response = HttpClient.get_session().get(
             "http://gutendex.com/books",
             params={"search": query}
         )
@@ -215,26 +348,25 @@ def get_gutendex_domain_textbooks(query: str):
         if not books:
             return "No textbooks found for your query."
 
-        results = "Here are some textbooks you might find useful:\n"
-        for book in books:
-            title = book.get("title", "Unknown Title")
-            authors = [author.get("name", "Unknown Author") for author in book.get("authors", [])]
-            author = ', '.join(authors) if authors else "Unknown Author"
-            formats = book.get("formats", {})
-            pdf_link = formats.get("application/pdf")
-            epub_link = formats.get("application/epub+zip")
-            txt_link = formats.get("text/plain; charset=utf-8")
-
-            # Provide available formats
-            results += f"- {title} by {author}\n"
-            if pdf_link:
-                results += f"  Download PDF: {pdf_link}\n"
-            if epub_link:
-                results += f"  Download EPUB: {epub_link}\n"
-            if txt_link:
-                results += f"  Download TXT: {txt_link}\n"
-
-        return results
+        return format_gutendex_textbooks(books)
+
+    except Exception as e:
+        print(f"Failed to fetch textbooks: {e}")
+        return "Sorry, I couldn't fetch textbooks at the moment."
+
+
+async def aget_gutendex_domain_textbooks(query: str):
+    """
+    Async version of get_gutendex_domain_textbooks.
+    """
+    try:
+        search_data = await AsyncHttpClient.get_json("http://gutendex.com/books", params={"search": query})
+        books = search_data.get("results", [])[:3]  # Get top 3 results
+
+        if not books:
+            return "No textbooks found for your query."
+
+        return format_gutendex_textbooks(books)
 
     except Exception as e:
         print(f"Failed to fetch textbooks: {e}")
@@ -307,22 +439,16 @@ def generate_document(content: str, format: str = 'pdf'):
     return download_url
 
 
-def get_job_listings(skills: str, location: str = None):
+def get_job_search_request(skills: str, location: str = None) -> tuple:
     """
-    Fetches job listings that match the user's skills.
-
-    Args:
-        skills (str): A comma-separated string of user skills.
-        location (str, optional): The location to search for jobs.
-
-    Returns:
-        str: A formatted string containing the job listings.
+    Returns the Adzuna (url, params) for a job search, or (None, None) if the API
+    credentials are not set.
     """
     # Replace with your Adzuna API credentials
     ADZUNA_APP_ID = os.getenv('ADZUNA_APP_ID')
     ADZUNA_APP_KEY = os.getenv('ADZUNA_APP_KEY')
     if not ADZUNA_APP_ID or not ADZUNA_APP_KEY:
-        return "Job search API credentials are not set."
+        return None, None
 
     # Prepare the API endpoint
     country = 'us'  # Change to your target country code
@@ -335,30 +461,75 @@ def get_job_listings(skills: str, location: str = None):
     }
     if location:
         params['where'] = location
+    return base_url, params
+
+
+def format_job_listings(data: dict) -> str:
+    results = data.get('results', [])
+    if not results:
+        return "No job listings found matching your skills."
+
+    # Format the job listings
+    job_listings = "Here are some job listings matching your skills:\n"
+    for job in results[:5]:  # Limit to top 5 results
+        title = job.get('title', 'No title')
+        company = job.get('company', {}).get('display_name', 'Unknown company')
+        job_location = job.get('location', {}).get('display_name', 'Unknown location')
+        url = job.get('redirect_url', '')
+        job_listings += f"- **{title}** at **{company}** in **{job_location}**\n"
+        job_listings += f"  [View Job Posting]({url})\n\n"
+    return job_listings
+
+
+def get_job_listings(skills: str, location: str = None):
+    """
+    Fetches job listings that match the user's skills.
+
+    Args:
+        skills (str): A comma-separated string of user skills.
+        location (str, optional): The location to search for jobs.
+
+    Returns:
+        str: A formatted string containing the job listings.
+    """
+    base_url, params = get_job_search_request(skills, location)
+    if not base_url:
+        return "Job search API credentials are not set."
 
     try:
-        response = requests.get(base_url, params=params)
-        data = response.json()
-        results = data.get('results', [])
-        if not results:
-            return "No job listings found matching your skills."
-
-        # Format the job listings
-        job_listings = "Here are some job listings matching your skills:\n"
-        for job in results[:5]:  # Limit to top 5 results
-            title = job.get('title', 'No title')
-            company = job.get('company', {}).get('display_name', 'Unknown company')
-            job_location = job.get('location', {}).get('display_name', 'Unknown location')
-            url = job.get('redirect_url', '')
-            job_listings += f"- **{title}** at **{company}** in **{job_location}**\n"
-            job_listings += f"  [View Job Posting]({url})\n\n"
-        return job_listings
+        response = HttpClient.get_session().get(base_url, params=params)
+        return format_job_listings(response.json())
+
+    except Exception as e:
+        print(f"Failed to fetch job listings: {e}")
+        return "Sorry, I couldn't fetch job listings at the moment."
+
+
+async def aget_job_listings(skills: str, location: str = None):
+    """
+    Async version of get_job_listings.
+    """
+    base_url, params = get_job_search_request(skills, location)
+    if not base_url:
+        return "Job search API credentials are not set."
+
+    try:
+        return format_job_listings(await AsyncHttpClient.get_json(base_url, params=params))
 
     except Exception as e:
         print(f"Failed to fetch job listings: {e}")
         return "Sorry, I couldn't fetch job listings at the moment."
     
 
+def get_meme_search_params(topic: str, giphy_api_key: str) -> dict:
+    return {
+        "api_key": giphy_api_key,
+        "q": topic,
+        "limit": 1,
+        "rating": "pg-13",
+    }
+
+
 def fetch_meme(topic: str) -> str:
     """
     Fetches a popular meme related to the given topic using Giphy API.
@@ -374,14 +545,9 @@ def fetch_meme(topic: str) -> str:
         return "Giphy API key is not configured."
 
     try:
-        response = requests.get(
+        response = HttpClient.get_session().get(
             "https://api.giphy.com/v1/gifs/search",
-            params={
-                "api_key": giphy_api_key,
-                "q": topic,
-                "limit": 1,
-                "rating": "pg-13",
-            }
+            params=get_meme_search_params(topic, giphy_api_key)
         )
         data = response.json()
         if data["data"]:
@@ -392,4 +558,26 @@ def fetch_meme(topic: str) -> str:
     except Exception as e:
         print(f"Error fetching meme: {e}")
         return "Failed to fetch meme."
+
+
+async def afetch_meme(topic: str) -> str:
+    """
+    Async version of fetch_meme.
+    """
+    giphy_api_key = os.getenv("GIPHY_API_KEY")
+    if not giphy_api_key:
+        return "Giphy API key is not configured."
+
+    try:
+        data = await AsyncHttpClient.get_json(
+            "https://api.giphy.com/v1/gifs/search",
+            params=get_meme_search_params(topic, giphy_api_key)
+        )
+        if data["data"]:
+            return data["data"][0]["images"]["downsized_medium"]["url"]
+        else:
+            return "No memes found for the given topic."
+    except Exception as e:
+        print(f"Error fetching meme: {e}")
+        return "Failed to fetch meme."
     
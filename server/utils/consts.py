@@ -5,6 +5,168 @@ APP_NAME = "MemeMingle"
 
 PROCESSING_STEP = 1 # The chat turn upon which the app would update the database
 CONTEXT_LENGTH_LIMIT=4096 
+USER_MEMORY_TOKEN_BUDGET = 1000 # Max tokens of past chat summaries carried into new conversations
+USER_MEMORY_BACKFILL_LIMIT = 20 # Chat summaries read when building a missing memory digest
+
+# Token budget of the agent prompt. Completions are capped separately at CONTEXT_LENGTH_LIMIT // 2.
+PROMPT_TOKEN_BUDGET = CONTEXT_LENGTH_LIMIT
+PROMPT_RESERVED_TOKENS = 2000 # Tool schemas and the agent scratchpad
+# Share of PROMPT_TOKEN_BUDGET each trimmable section may use
+PROMPT_SECTION_SHARES = {
+    "past_summaries": 0.1,
+    "history": 0.3,
+    "document": 0.4,
+}
+DOCUMENT_RETRIEVAL_TOP_K = 8 # Chunks of an uploaded document retrieved per question
+DOCUMENT_INDEX_CACHE_SIZE = 64 # Chat document indexes kept in memory per worker
+
+# Cache of text extracted from uploaded files, keyed by content hash and MIME type
+EXTRACTED_TEXT_MEMORY_CACHE_CHARS = 20_000_000 # In-memory tier, per worker
+EXTRACTED_TEXT_STORE_MAX_BYTES = 200 * 1024 * 1024 # Shared MongoDB tier
+EXTRACTED_TEXT_STORE_MAX_ENTRY_BYTES = 8 * 1024 * 1024 # Stay well below the 16MB document limit
+
+# Vector stores of the retriever tools (see services/db/vector_index.py)
+VECTOR_INDEX_NAME = "vectorSearchIndex"
+VECTOR_DIMENSIONS = 1536 # text-embedding-3-small
+VECTOR_STORE_REFRESH_SECONDS = 60 # How often retrievers look up the active vector store collection
+VECTOR_STORE_COPY_BATCH_SIZE = 1000 # Vectors copied at a time into a rebuilt collection
+
+# Cache and batching of text embeddings (see services/cached_embeddings.py)
+EMBEDDING_CACHE_MEMORY_SIZE = 10_000 # Vectors kept in memory per worker
+EMBEDDING_CACHE_TTL_DAYS = 30
+EMBEDDING_BATCH_SIZE = 256 # Texts per embeddings API call
+EMBEDDING_BATCH_WINDOW_SECONDS = 0.01 # How long a request waits for others to share its API call
+
+# Shared HTTP session for outbound API calls (see services/http_client.py)
+HTTP_CONNECT_TIMEOUT_SECONDS = 3.05
+HTTP_READ_TIMEOUT_SECONDS = 15
+HTTP_MAX_RETRIES = 3 # Retries on connection errors and 429/5xx responses
+HTTP_RETRY_BACKOFF_SECONDS = 0.5 # Doubles with every retry
+HTTP_MAX_RETRY_AFTER_SECONDS = 5 # Longest Retry-After honored; longer ones are shortened to this
+HTTP_POOL_CONNECTIONS = 16 # Hosts with a connection pool
+HTTP_POOL_MAXSIZE = 32 # Keep-alive connections per host
+
+# Open Library textbook search (see get_public_domain_textbooks in utils/agents.py)
+TEXTBOOK_SEARCH_DEADLINE_SECONDS = 8 # Editions not fetched by then are left out
+OPENLIBRARY_EDITION_WORKERS = 8
+OPENLIBRARY_EDITION_CACHE_SIZE = 2048
+OPENLIBRARY_EDITION_CACHE_TTL_SECONDS = 7 * 24 * 3600
+
+# Translation of API responses (see services/translator.py and utils/translate_decorator.py)
+TRANSLATION_BATCH_SIZE = 128 # Texts per Google Translate request (the API limit)
+USER_LANGUAGE_CACHE_SIZE = 10_000 # Preferred languages cached by JWT identity
+USER_LANGUAGE_CACHE_TTL_SECONDS = 300
+TRANSLATION_CACHE_MEMORY_SIZE = 20_000 # Translations kept in memory per worker
+TRANSLATION_CACHE_TTL_DAYS = 30 # Shared MongoDB tier
+AZURE_TRANSLATOR_MAX_ELEMENTS = 1000 # Texts per Azure Translator request (the API limit)
+AZURE_TRANSLATOR_MAX_CHARS = 50_000 # Characters per Azure Translator request (the API limit)
+AZURE_TRANSLATOR_CONCURRENCY = 4 # Requests sent at once
+UI_BUNDLE_MAX_AGE_SECONDS = 3600 # Browsers revalidate UI string bundles with their ETag after this
+
+# Cache of tool results from external APIs (see utils/tool_cache.py), in seconds per tool
+TOOL_CACHE_TTL_SECONDS = {
+    "fetch_meme": 6 * 3600,
+    "textbook_search": 24 * 3600,
+    "gutendex_textbook_search": 24 * 3600,
+    "job_search": 3600,
+    "web_search_bing": 15 * 60,
+}
+TOOL_CACHE_STALE_SECONDS = 15 * 60 # How long an expired result is served while it refreshes
+TOOL_CACHE_MAX_ENTRIES = 512 # Results kept per tool
+# Messages the tools return instead of raising; such results are never cached
+TOOL_FAILURE_PREFIXES = (
+    "Sorry, I couldn't fetch",
+    "Failed to fetch",
+    "Giphy API key is not configured",
+    "Job search API credentials are not set",
+)
+
+# Token events of the streaming ai_mentor route (see utils/sse.py)
+STREAM_TOKEN_HOLD_CHARS = 120 # Text an LLM call generates before it is streamed, unless it calls a tool
+
+# Opt-in semantic cache of agent answers (see agents/semantic_cache.py)
+SEMANTIC_CACHE_SIMILARITY_THRESHOLD = 0.95 # Cosine similarity a question needs to reuse an answer
+SEMANTIC_CACHE_TTL_SECONDS = 24 * 3600
+SEMANTIC_CACHE_REFRESH_SECONDS = 60 # How often a worker reloads answers cached by others
+SEMANTIC_CACHE_MAX_ENTRIES = 2000 # Answers kept per role and language
+SEMANTIC_CACHE_MAX_PROMPT_CHARS = 300 # Longer prompts are unlikely to repeat
+SEMANTIC_CACHE_MIN_PROMPT_WORDS = 3 # Shorter prompts ("yes", "why?") answer the previous turn
+# Words that refer back to the conversation, per language; a question using none of them
+# is answered without the chat history. Other languages are never cached.
+SEMANTIC_CACHE_CONTEXT_WORDS = {
+    "en": [
+        "it", "its", "this", "that", "these", "those", "they", "them", "their",
+        "he", "she", "him", "her", "his", "above", "earlier", "previous", "before",
+        "again", "more", "else", "also", "another", "same", "continue", "said", "mentioned", "last",
+    ],
+}
+# Tools whose results depend on the user; answers using them are never cached
+PERSONALIZED_TOOL_NAMES = [
+    "user_profile_retrieval",
+    "user_journey_retrieval",
+    "location_search_gplaces",
+    "generate_document",
+]
+
+# Background finalization of chat sessions
+FINALIZATION_MAX_ATTEMPTS = 5
+FINALIZATION_RETRY_BASE_SECONDS = 30 # Doubled after every failed attempt
+FINALIZATION_LEASE_SECONDS = 300 # A running job is taken over by another worker after this
+FINALIZATION_POLL_SECONDS = 2
+FINALIZATION_JOB_RETENTION_DAYS = 7
+
+# Tools available to the mentor agent on the conversation routes
+MENTOR_TOOL_NAMES = [
+    "gutendex_textbook_search",
+    "generate_suggestions",
+    "web_search_tavily",
+    "location_search_gplaces",
+    "textbook_search",
+    "user_profile_retrieval",
+    "agent_facts",
+    "generate_document",
+    "job_search",
+    "web_search_bing",
+    "fetch_meme",
+]
+
+# Options the avatar can use to present a response
+FACIAL_EXPRESSIONS = [
+    "smile",
+    "sad",
+    "angry",
+    "surprised",
+    "funnyFace",
+    "default"
+]
+
+ANIMATIONS = [
+    "Talking_0",
+    "Talking_1",
+    "Talking_2",
+    "Crying",
+    "Laughing",
+    "Rumba",
+    "Idle",
+    "Terrified",
+    "Angry"
+]
+
+WELCOME_MEME_TOPICS = ["welcome", "hello", "introduction", "greeting"]
+
+# Seconds each post-response enrichment step may take before its fallback is used
+ENRICHMENT_STEP_TIMEOUTS = {
+    "annotation": 10,
+    "meme_topic": 10,
+    "meme_url": 10,
+    "speech": 30,
+    "expression": 10,
+    "avatar_audio": 20,
+    "lip_sync_data": 30,
+}
+
+# Feedback LLM calls made at once for the wrong answers of a quiz submission (see utils/quiz_feedback.py)
+QUIZ_FEEDBACK_MAX_CONCURRENCY = 8
 
 """STEP 2: Define the system message for the agent."""
 SYSTEM_MESSAGE = """
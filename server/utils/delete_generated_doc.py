@@ -10,7 +10,8 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 def delete_old_files_job():
     directories = [
         os.path.join(os.path.dirname(__file__), '..', 'generated_documents'),
-        os.path.join(os.path.dirname(__file__), '..', 'generated_audio')
+        os.path.join(os.path.dirname(__file__), '..', 'generated_audio'),
+        os.path.join(os.path.dirname(__file__), '..', 'document_indexes')
     ]
     days = 1  # Files older than 1 day will be deleted
     now = time.time()
@@ -0,0 +1,81 @@
+"""This module contains the grading and feedback generation for quiz submissions."""
+"""Step 1: Import necessary modules"""
+import logging
+from utils.similar_answer import is_similar
+from utils.consts import QUIZ_FEEDBACK_MAX_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+NO_FEEDBACK = "No feedback available."
+
+
+"""Step 2: Define the functions"""
+def grade_answer(question: dict, user_answer: str) -> tuple[bool, int]:
+    """
+    Grades an answer: 10 points if it is correct, -5 otherwise.
+
+    Returns:
+        tuple[bool, int]: Whether the answer is correct and the points awarded.
+    """
+    user_answer = user_answer.strip().lower()
+    correct_answer = question.get('correct_answer', '').strip().lower()
+    is_correct = False
+
+    if question.get('question_type') == 'MC':
+        # For MCQs, exact match of the option
+        is_correct = user_answer == correct_answer
+    elif question.get('question_type') == 'SA':
+        # Handle numerical answers separately
+        try:
+            is_correct = float(user_answer) == float(correct_answer)
+        except ValueError:
+            # Non-numeric answers: use similarity check
+            is_correct = is_similar(user_answer, correct_answer)
+    else:
+        return False, 0
+
+    return is_correct, 10 if is_correct else -5
+
+
+def build_feedback_prompt(question: dict, user_answer: str, language_name: str) -> str:
+    return (
+        f"You are an educational assistant helping users (5-15 years old) understand their mistakes in quizzes.\n\n"
+        f"Question: {question['question']} ({language_name})\n"
+        f"User's Answer: {user_answer} ({language_name})\n"
+        f"Correct Answer: {question['correct_answer']} ({language_name})\n\n"
+        f"Provide constructive and detailed feedback in {language_name} that explains why the user's answer is incorrect and how to arrive at the correct answer. "
+        f"Ensure the feedback is clear, educational, and encourages the user to understand the concept better.\n\n"
+        f"Feedback:"
+    )
+
+
+def generate_feedbacks(llm, prompts: dict) -> dict:
+    """
+    Generates the feedback of several answers with concurrent LLM calls. A failed call
+    gets NO_FEEDBACK without affecting the others.
+
+    Args:
+        llm: The chat model.
+        prompts (dict): The feedback prompts by key, e.g. the index of the answer.
+
+    Returns:
+        dict: The feedback by the same keys.
+    """
+    if not prompts:
+        return {}
+
+    keys = list(prompts)
+    responses = llm.batch(
+        [prompts[key] for key in keys],
+        config={"max_concurrency": QUIZ_FEEDBACK_MAX_CONCURRENCY},
+        return_exceptions=True,
+    )
+
+    feedbacks = {}
+    for key, response in zip(keys, responses):
+        if isinstance(response, Exception):
+            logger.error(f"Failed to generate feedback for answer {key}: {response}")
+            feedbacks[key] = NO_FEEDBACK
+        else:
+            feedbacks[key] = response.content.strip()
+    return feedbacks
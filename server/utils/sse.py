@@ -0,0 +1,74 @@
+"""This module contains helpers for sending server-sent events (SSE)."""
+"""Step 1: Import necessary modules"""
+import json
+import queue
+from langchain_core.callbacks import BaseCallbackHandler
+from utils.consts import STREAM_TOKEN_HOLD_CHARS
+
+"""Step 2: Define the SSE helpers"""
+def format_sse(event: str, data: dict) -> str:
+    """
+    Formats a single server-sent event.
+
+    Args:
+        event (str): The event name.
+        data (dict): The JSON-serializable payload of the event.
+    """
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+"""Step 3: Define the token streaming callback"""
+class TokenQueueCallbackHandler(BaseCallbackHandler):
+    """
+    Forwards the tokens of an agent's answer to a queue as ('token', data) events.
+
+    The agent calls the LLM once per step, and only the call without tool calls answers
+    the user. The text of a call is held back until it reaches STREAM_TOKEN_HOLD_CHARS
+    or the call ends, and dropped if the call turns out to call tools, so the short text
+    a model may write before its tool calls is not streamed.
+    """
+
+    def __init__(self, events: queue.Queue):
+        self.events = events
+        self.runs = {}  # run_id -> {"held": [...], "held_chars": int, "streaming": bool, "calls_tools": bool}
+
+    def put_tokens(self, tokens: list[str]) -> None:
+        for token in tokens:
+            self.events.put(("token", {"token": token}))
+
+    def on_llm_new_token(self, token: str, *, chunk=None, run_id=None, **kwargs) -> None:
+        run = self.runs.setdefault(run_id, {"held": [], "held_chars": 0, "streaming": False, "calls_tools": False})
+        if run["calls_tools"]:
+            return
+        if getattr(getattr(chunk, "message", None), "tool_call_chunks", None):
+            run["calls_tools"] = True
+            run["held"] = []
+            return
+        # Tool-call chunks carry no text
+        if not token:
+            return
+        if run["streaming"]:
+            self.put_tokens([token])
+            return
+
+        run["held"].append(token)
+        run["held_chars"] += len(token)
+        if run["held_chars"] >= STREAM_TOKEN_HOLD_CHARS:
+            run["streaming"] = True
+            self.put_tokens(run["held"])
+            run["held"] = []
+
+    def on_llm_end(self, response, *, run_id=None, **kwargs) -> None:
+        run = self.runs.pop(run_id, None)
+        if run is None or run["calls_tools"]:
+            return
+        calls_tools = any(
+            getattr(getattr(generation, "message", None), "tool_calls", None)
+            for generations in response.generations
+            for generation in generations
+        )
+        if not calls_tools:
+            self.put_tokens(run["held"])
+
+    def on_llm_error(self, error: BaseException, *, run_id=None, **kwargs) -> None:
+        self.runs.pop(run_id, None)
@@ -0,0 +1,54 @@
+"""This module contains helpers for counting and trimming text by LLM tokens."""
+"""Step 1: Import necessary modules"""
+import logging
+import tiktoken
+
+"""Step 2: Define the token helpers"""
+_encoding = None
+_encoding_loaded = False
+
+# Rough characters-per-token ratio used when the tokenizer is unavailable
+CHARS_PER_TOKEN = 4
+
+
+def get_encoding():
+    """
+    Returns the tokenizer for the chat model, or None if it cannot be loaded
+    (tiktoken downloads its vocabulary on first use).
+    """
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        try:
+            _encoding = tiktoken.encoding_for_model("gpt-4o")
+        except Exception as e:
+            logging.warning(f"Tokenizer unavailable, estimating token counts instead: {e}")
+            _encoding = None
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """
+    Counts the tokens in a text.
+    """
+    if not text:
+        return 0
+    encoding = get_encoding()
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Truncates a text to at most max_tokens tokens.
+    """
+    if max_tokens <= 0 or not text:
+        return ""
+    encoding = get_encoding()
+    if encoding is None:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
@@ -0,0 +1,154 @@
+"""This module contains a cache for the results of agent tools that call external APIs."""
+"""Step 1: Import necessary modules"""
+import time
+import asyncio
+import inspect
+import logging
+import threading
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import LRUCache
+from utils.consts import TOOL_CACHE_MAX_ENTRIES, TOOL_CACHE_STALE_SECONDS, TOOL_FAILURE_PREFIXES
+
+# Shared by every cached tool to refresh stale results in the background
+_refresh_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="tool-cache")
+
+
+"""Step 2: Define the helper functions"""
+class IncompleteResult(str):
+    """
+    A tool result that was cut short, e.g. by a deadline. It is returned like any other
+    result but never cached, so a slow API does not degrade the answers for a whole TTL.
+    """
+
+
+def normalize_argument(value):
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    return value
+
+
+def is_cacheable_result(result) -> bool:
+    """
+    Tools report failures as messages rather than exceptions; those are never cached,
+    and neither are incomplete results.
+    """
+    if result is None or isinstance(result, IncompleteResult):
+        return False
+    if isinstance(result, str):
+        return not result.startswith(TOOL_FAILURE_PREFIXES)
+    return True
+
+
+"""Step 3: Define the cached_tool decorator"""
+def cached_tool(ttl: float, stale_ttl: float = TOOL_CACHE_STALE_SECONDS, maxsize: int = TOOL_CACHE_MAX_ENTRIES, cache_if=is_cacheable_result):
+    """
+    Caches the results of a tool function by its normalized arguments.
+
+    A result younger than `ttl` is returned as is. For another `stale_ttl` seconds it is
+    still returned right away, while a single background call refreshes it. Older
+    results are fetched again before returning.
+
+    An async version of the tool can be passed along; it is exposed as the wrapper's
+    `coroutine` attribute and shares the same cache.
+
+    Args:
+        ttl (float): Seconds a result is fresh. 0 disables the cache.
+        stale_ttl (float): Seconds a stale result may still be served.
+        maxsize (int): Results kept, least recently used evicted first.
+        cache_if (callable): Whether a result may be cached.
+
+    Usage:
+        fetch_meme = cached_tool(ttl=3600)(fetch_meme, coroutine=afetch_meme)
+    """
+    def decorator(func, coroutine=None):
+        signature = inspect.signature(func)
+        entries = LRUCache(maxsize=maxsize)  # key -> (result, stored_at)
+        refreshing = set()
+        refresh_tasks = set()  # keeps the async refreshes referenced until they finish
+        lock = threading.Lock()
+        stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0}
+
+        def get_key(args, kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return tuple((name, normalize_argument(value)) for name, value in bound.arguments.items())
+
+        def lookup(key) -> tuple:
+            """
+            Returns (entry, is_usable, start_refresh) for a key.
+            """
+            with lock:
+                entry = entries.get(key) if ttl > 0 else None
+                age = time.monotonic() - entry[1] if entry else None
+                if entry and age < ttl:
+                    stats["hits"] += 1
+                    return entry, True, False
+                is_stale = entry is not None and age < ttl + stale_ttl
+                start_refresh = is_stale and key not in refreshing
+                if start_refresh:
+                    refreshing.add(key)
+                    stats["refreshes"] += 1
+                stats["stale_hits" if is_stale else "misses"] += 1
+                return entry, is_stale, start_refresh
+
+        def store(key, result):
+            if ttl > 0 and cache_if(result):
+                with lock:
+                    entries[key] = (result, time.monotonic())
+            return result
+
+        def refresh(key, args, kwargs):
+            try:
+                store(key, func(*args, **kwargs))
+            except Exception as e:
+                logging.error(f"Error refreshing the cached result of {func.__name__}: {e}")
+            finally:
+                with lock:
+                    refreshing.discard(key)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = get_key(args, kwargs)
+            entry, is_usable, start_refresh = lookup(key)
+            if not is_usable:
+                return store(key, func(*args, **kwargs))
+            if start_refresh:
+                _refresh_executor.submit(refresh, key, args, kwargs)
+            return entry[0]
+
+        def cache_clear():
+            with lock:
+                entries.clear()
+
+        wrapper.cache_stats = stats
+        wrapper.cache_clear = cache_clear
+        wrapper.coroutine = None
+
+        if coroutine is not None:
+            async def arefresh(key, args, kwargs):
+                try:
+                    store(key, await coroutine(*args, **kwargs))
+                except Exception as e:
+                    logging.error(f"Error refreshing the cached result of {coroutine.__name__}: {e}")
+                finally:
+                    with lock:
+                        refreshing.discard(key)
+
+            @functools.wraps(coroutine)
+            async def async_wrapper(*args, **kwargs):
+                key = get_key(args, kwargs)
+                entry, is_usable, start_refresh = lookup(key)
+                if not is_usable:
+                    return store(key, await coroutine(*args, **kwargs))
+                if start_refresh:
+                    task = asyncio.get_running_loop().create_task(arefresh(key, args, kwargs))
+                    refresh_tasks.add(task)
+                    task.add_done_callback(refresh_tasks.discard)
+                return entry[0]
+
+            wrapper.coroutine = async_wrapper
+
+        return wrapper
+
+    return decorator
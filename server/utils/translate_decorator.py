@@ -1,47 +1,123 @@
 """This module contains a decorator that translates JSON responses to the user's preferred language."""
 """ Step 1: Import required libraries """
 from functools import wraps
+import threading
 from flask import request, jsonify
-from services.translator import translate_text_cached
-from models.user import User
-from services.azure_mongodb import MongoDBClient
+from cachetools import TTLCache
+from services.translator import translate_texts_cached
+from services.db.user import get_user_preferred_language
+from utils.consts import USER_LANGUAGE_CACHE_SIZE, USER_LANGUAGE_CACHE_TTL_SECONDS
 import logging
 
-""" Step 2: Define the translate_response decorator """
-def translate_response(func):
-    @wraps(func)
-    def wrapper(*args, **kwargs):
-        response = func(*args, **kwargs)
-        
-        # Only translate JSON responses
-        if isinstance(response, tuple):
-            data, status = response
-        else:
-            data = response
-            status = 200
-
-        if not isinstance(data, dict):
-            return response  # Non-dict responses are not handled
-
-        # Retrieve user ID from JWT token
-        try:
-            from flask_jwt_extended import get_jwt_identity
-            user_id = get_jwt_identity()
-        except:
-            user_id = None
-
-        if user_id:
-            user = User.find_by_id(user_id)
-            if user and user.preferredLanguage:
-                target_language = user.preferredLanguage
-                translated_data = {}
-                for key, value in data.items():
-                    if isinstance(value, str):
-                        translated_text = translate_text_cached(value, target_language)
-                        translated_data[key] = translated_text
-                    else:
-                        translated_data[key] = value
-                return jsonify(translated_data), status
-
-        return jsonify(data), status
-    return wrapper
\ No newline at end of file
+# Preferred languages by JWT identity, so translated routes skip the users lookup
+_user_languages = TTLCache(maxsize=USER_LANGUAGE_CACHE_SIZE, ttl=USER_LANGUAGE_CACHE_TTL_SECONDS)
+_user_languages_lock = threading.Lock()
+
+
+""" Step 2: Define the helper functions """
+def get_target_language(user_id: str) -> str:
+    with _user_languages_lock:
+        language = _user_languages.get(user_id)
+    if language is None:
+        language = get_user_preferred_language(user_id)
+        with _user_languages_lock:
+            _user_languages[user_id] = language
+    return language
+
+
+def forget_user_language(user_id: str) -> None:
+    """
+    Drops the cached language of a user, e.g. after they changed it. Other workers
+    pick the change up within USER_LANGUAGE_CACHE_TTL_SECONDS.
+    """
+    with _user_languages_lock:
+        _user_languages.pop(user_id, None)
+
+
+def is_translatable(text: str) -> bool:
+    # Values without words, links and encoded data are left as they are
+    return (
+        any(char.isalpha() for char in text)
+        and "://" not in text
+        and not text.startswith("data:")
+    )
+
+
+def map_field_strings(data, path: list[str], func):
+    """
+    Returns a copy of a JSON payload with `func` applied to the strings at a field path.
+    Lists along the path are walked through, so ["questions", "text"] is the text of
+    every question.
+    """
+    if isinstance(data, list):
+        return [map_field_strings(value, path, func) for value in data]
+    if not path:
+        return func(data) if isinstance(data, str) else data
+    if isinstance(data, dict) and path[0] in data:
+        return {**data, path[0]: map_field_strings(data[path[0]], path[1:], func)}
+    return data
+
+
+def translate_payload(data, target_language: str, fields: list[str]):
+    """
+    Translates the strings of a JSON payload at the given fields (dotted paths such as
+    "questions.text") with a single batch request for the strings missing from the
+    translation cache. Other values, such as ids and enum values, are left as they are.
+    """
+    paths = [field.split(".") for field in dict.fromkeys(fields)]
+
+    strings = []
+    def collect(text: str) -> str:
+        if is_translatable(text):
+            strings.append(text)
+        return text
+    for path in paths:
+        map_field_strings(data, path, collect)
+
+    strings = list(dict.fromkeys(strings))
+    if not strings:
+        return data
+
+    translations = dict(zip(strings, translate_texts_cached(strings, target_language)))
+    for path in paths:
+        data = map_field_strings(data, path, lambda text: translations.get(text, text))
+    return data
+
+
+""" Step 3: Define the translate_response decorator """
+def translate_response(*fields: str):
+    """
+    Translates the given fields of a view's JSON response to the preferred language of
+    the JWT identity, e.g. @translate_response("message", "questions.text").
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            response = func(*args, **kwargs)
+
+            # Only translate JSON responses
+            if isinstance(response, tuple):
+                data, status = response
+            else:
+                data = response
+                status = 200
+
+            if not isinstance(data, (dict, list)):
+                return response  # Other responses are not handled
+
+            # Retrieve user ID from JWT token
+            try:
+                from flask_jwt_extended import get_jwt_identity
+                user_id = get_jwt_identity()
+            except:
+                user_id = None
+
+            if user_id:
+                target_language = get_target_language(user_id)
+                # Responses are written in English
+                if target_language != "en":
+                    return jsonify(translate_payload(data, target_language, fields)), status
+
+            return jsonify(data), status
+        return wrapper
+    return decorator
@@ -0,0 +1,46 @@
+"""
+Static texts of the Angular frontend that are translated as pre-built bundles (see
+services/ui_bundles.py) rather than through /translate on every page load. Keep this
+list in sync with the data-translate elements and additionalTexts of the components.
+"""
+
+"""Sidebar"""
+SIDEBAR_STRINGS = [
+    'Chat Wizard', 'Buddy', 'Quizify', 'Profile', 'Log Out',
+    'Toggle Sidebar', 'New Chat', 'AI Avatar', 'Quiz AI', 'Logout',
+]
+
+"""Quiz AI"""
+QUIZ_STRINGS = [
+    'AI-Powered Quiz', 'Generate Your Quiz', 'Select Topic', 'Select Level', 'Upload File',
+    'Remove selected file', 'Number of Questions', 'Generate Quiz',
+    'Please select a topic or upload a file to generate a quiz.', 'Quiz generated successfully!',
+    'Failed to generate quiz. Please try again.', 'Your Answer', 'Submit Answers',
+    'Please answer all questions before submitting.', 'No quiz to submit.', 'Quiz Feedback',
+    'Your Score', 'Total Score', 'Your Total Score', 'Generate New Quiz',
+    'Ready to generate a new quiz!', 'Go back to quiz generation',
+    'Mathematics', 'Physics', 'Chemistry', 'Computer Science', 'History', 'Geography',
+    'Biology', 'Literature', 'Easy', 'Medium', 'Hard', 'Quiz',
+]
+
+"""Live conversation"""
+LIVE_CONVERSATION_STRINGS = [
+    'Welcome to AI Chat', 'Choose a historical figure to inspire your conversation.',
+    'Select Your Mentor', 'Start Conversation',
+    'Ada Lovelace', 'Albert Einstein', 'Aryabhatta', 'Galileo Galilei', 'Isaac Newton',
+    'Leonardo da Vinci', 'Marie Curie', 'Nikola Tesla', 'Thomas Edison',
+    'Astronomy', 'Art and Science', 'Electrical Engineering', 'Inventing', 'mathematician',
+    'Type your message here...', 'Pause Listening', 'Resume Listening', 'File upload',
+    'New Conversation', 'Unmute', 'Mute', 'Replay Audio', 'AI is speaking...', 'AI is listening...',
+]
+
+"""User profile"""
+USER_PROFILE_STRINGS = [
+    'My Profile', 'Name:', 'Username:', 'Email:', 'Gender:', 'Place of Residence:',
+    'Field of Study:', 'Language:', 'male', 'female', 'other',
+    'English', 'Spanish', 'French', 'German', 'Chinese', 'Japanese', 'Korean', 'Russian',
+    'Arabic', 'Hindi', 'Portuguese', 'Italian', 'Gujarati', 'Bengali', 'Telugu',
+    'Preferred Language', 'Processing...', 'Edit Profile', 'Delete Account', 'Updating...',
+]
+
+UI_STRINGS = SIDEBAR_STRINGS + QUIZ_STRINGS + LIVE_CONVERSATION_STRINGS + USER_PROFILE_STRINGS